@@ -4,14 +4,65 @@ Objetivo: Aplicar POO para modelar mesas, clientes y reservas.
 """
 
 
+# ==========================================
+# RESULTADOS Y SUMIDEROS DE EVENTOS
+# ==========================================
+class Resultado:
+    """
+    Resultado de una operación: si tuvo éxito, un código con el motivo
+    y el mensaje legible. Se evalúa como booleano igual que antes.
+    """
+
+    __slots__ = ("ok", "codigo", "mensaje")
+
+    def __init__(self, ok, codigo, mensaje):
+        self.ok = ok
+        self.codigo = codigo
+        self.mensaje = mensaje
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        return f"Resultado(ok={self.ok}, codigo={self.codigo!r}, mensaje={self.mensaje!r})"
+
+
+class SumideroNulo:
+    """Descarta los eventos (procesamiento por lotes sin salida)."""
+
+    def emitir(self, resultado):
+        pass
+
+
+class SumideroBuffer:
+    """Guarda los eventos en memoria para revisarlos después."""
+
+    def __init__(self):
+        self.eventos = []
+
+    def emitir(self, resultado):
+        self.eventos.append(resultado)
+
+
+class SumideroConsola:
+    """Imprime el mensaje de cada evento (comportamiento original)."""
+
+    def emitir(self, resultado):
+        print(resultado.mensaje)
+
+
+CONSOLA = SumideroConsola()
+
+
 class Mesa:
     """Clase base para representar una mesa en el restaurante."""
 
-    def __init__(self, numero, capacidad):
+    def __init__(self, numero, capacidad, sumidero=None):
         self.__numero = numero
         self.__capacidad = capacidad
         self.__disponible = True  # Estado inicial: disponible
         self.__cliente = None  # Quién la tiene reservada
+        self.__sumidero = sumidero or CONSOLA  # Dónde se notifican las operaciones
 
     def get_numero(self):
         return self.__numero
@@ -26,22 +77,24 @@ class Mesa:
         if self.__disponible:
             self.__disponible = False
             self.__cliente = cliente
-            print(f" Mesa {self.__numero} reservada para {cliente.get_nombre()}.")
-            return True
+            resultado = Resultado(True, "ok", f" Mesa {self.__numero} reservada para {cliente.get_nombre()}.")
         else:
-            print(f" Mesa {self.__numero} ya está ocupada.")
-            return False
+            resultado = Resultado(False, "ocupada", f" Mesa {self.__numero} ya está ocupada.")
+        self.__sumidero.emitir(resultado)
+        return resultado
 
     def liberar(self):
         if not self.__disponible:
             self.__disponible = True
             cliente_anterior = self.__cliente
             self.__cliente = None
-            print(f" Mesa {self.__numero} liberada. Anterior cliente: {cliente_anterior.get_nombre()}")
-            return True
+            resultado = Resultado(
+                True, "ok", f" Mesa {self.__numero} liberada. Anterior cliente: {cliente_anterior.get_nombre()}"
+            )
         else:
-            print(f" Mesa {self.__numero} ya estaba disponible.")
-            return False
+            resultado = Resultado(False, "ya_disponible", f" Mesa {self.__numero} ya estaba disponible.")
+        self.__sumidero.emitir(resultado)
+        return resultado
 
     def mostrar_estado(self):
         estado = "Disponible" if self.__disponible else f"Reservada por {self.__cliente.get_nombre()}"
@@ -86,13 +139,14 @@ class Cliente:
 class Restaurante:
     """Clase que gestiona las mesas y clientes del restaurante."""
 
-    def __init__(self, nombre):
+    def __init__(self, nombre, sumidero=None):
         self.__nombre = nombre
         self.__mesas = []
         self.__clientes = []
+        self.__sumidero = sumidero  # Se comparte con las mesas creadas
 
     def agregar_mesa(self, numero, capacidad):
-        mesa = Mesa(numero, capacidad)
+        mesa = Mesa(numero, capacidad, self.__sumidero)
         self.__mesas.append(mesa)
         print(f" Mesa {numero} (capacidad {capacidad}) añadida al restaurante.")
         return mesa
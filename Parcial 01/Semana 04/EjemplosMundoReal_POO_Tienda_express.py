@@ -4,9 +4,62 @@ Objetivo: Modelar una tienda de ropa utilizando POO en Python.
 """
 
 
+# ==========================================
+# RESULTADOS Y SUMIDEROS DE EVENTOS
+# ==========================================
+class Resultado:
+    """
+    Resultado de una operación: si tuvo éxito, un código con el motivo
+    y el mensaje legible. Se evalúa como booleano igual que antes.
+    """
+
+    __slots__ = ("ok", "codigo", "mensaje")
+
+    def __init__(self, ok, codigo, mensaje):
+        self.ok = ok
+        self.codigo = codigo
+        self.mensaje = mensaje
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        return f"Resultado(ok={self.ok}, codigo={self.codigo!r}, mensaje={self.mensaje!r})"
+
+
+class SumideroNulo:
+    """Descarta los eventos (procesamiento por lotes sin salida)."""
+
+    def emitir(self, resultado):
+        pass
+
+
+class SumideroBuffer:
+    """Guarda los eventos en memoria para revisarlos después."""
+
+    def __init__(self):
+        self.eventos = []
+
+    def emitir(self, resultado):
+        self.eventos.append(resultado)
+
+
+class SumideroConsola:
+    """Imprime el mensaje de cada evento (comportamiento original)."""
+
+    def emitir(self, resultado):
+        print(resultado.mensaje)
+
+
+CONSOLA = SumideroConsola()
+
+
 class Producto:
     """Clase base para representar un producto en la tienda."""
 
+    # __slots__ evita un __dict__ por objeto (menos memoria con muchos productos)
+    __slots__ = ("__nombre", "__precio", "__stock")
+
     def __init__(self, nombre, precio, stock):
         self.__nombre = nombre  # Encapsulamiento: atributos privados
         self.__precio = precio
@@ -46,6 +99,8 @@ class Producto:
 class Camisa(Producto):
     """Clase derivada de Producto para camisas."""
 
+    __slots__ = ("__talla", "__color")
+
     def __init__(self, nombre, precio, stock, talla, color):
         super().__init__(nombre, precio, stock)
         self.__talla = talla
@@ -59,6 +114,8 @@ class Camisa(Producto):
 class Pantalon(Producto):
     """Clase derivada de Producto para pantalones."""
 
+    __slots__ = ("__talla", "__material")
+
     def __init__(self, nombre, precio, stock, talla, material):
         super().__init__(nombre, precio, stock)
         self.__talla = talla
@@ -72,6 +129,8 @@ class Pantalon(Producto):
 class Zapato(Producto):
     """Clase derivada de Producto para zapatos."""
 
+    __slots__ = ("__numero", "__tipo")
+
     def __init__(self, nombre, precio, stock, numero, tipo):
         super().__init__(nombre, precio, stock)
         self.__numero = numero
@@ -127,14 +186,17 @@ class Cliente:
 class Tienda:
     """Clase que gestiona la tienda y sus productos."""
 
-    def __init__(self, nombre):
+    def __init__(self, nombre, sumidero=None):
         self.__nombre = nombre
         self.__productos = []
+        self.__sumidero = sumidero or CONSOLA  # Dónde se notifican las operaciones
 
     def agregar_producto(self, producto):
         """Agrega un producto al inventario de la tienda."""
         self.__productos.append(producto)
-        print(f"Producto '{producto.get_nombre()}' agregado al inventario.")
+        resultado = Resultado(True, "ok", f"Producto '{producto.get_nombre()}' agregado al inventario.")
+        self.__sumidero.emitir(resultado)
+        return resultado
 
     def mostrar_inventario(self):
         """Muestra todos los productos disponibles en la tienda."""
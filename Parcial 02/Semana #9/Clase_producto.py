@@ -2,10 +2,24 @@
 Sistema de Gestión de Inventarios - Versión Simple y Funcional
 """
 
+import os
+import sys
+
+# Módulos compartidos entre semanas (carpeta "comun" de este parcial)
+_COMUN = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+if _COMUN not in sys.path:
+    sys.path.insert(0, _COMUN)
+
+from indice_nombres import IndiceNombres
+from resultados import CONSOLA, Resultado, SumideroBuffer, SumideroConsola, SumideroNulo
+
 
 class Producto:
     """Representa un producto en el inventario."""
 
+    # Sin __dict__ por instancia: reduce la memoria con muchos productos
+    __slots__ = ("_id_producto", "_nombre", "_cantidad", "_precio", "_indices_nombre")
+
     def __init__(self, id_producto, nombre, cantidad, precio):
         if not nombre or not nombre.strip():
             raise ValueError("El nombre del producto no puede estar vacío")
@@ -16,6 +30,9 @@ class Producto:
 
         self._id_producto = id_producto
         self._nombre = nombre.strip()
+        # Índices de nombres que deben enterarse cuando cambia el nombre
+        # (tupla vacía compartida hasta que el producto entra en un inventario)
+        self._indices_nombre = ()
         self._cantidad = cantidad
         self._precio = round(precio, 2)
 
@@ -32,6 +49,8 @@ class Producto:
         if not nuevo_nombre or not nuevo_nombre.strip():
             raise ValueError("El nombre del producto no puede estar vacío")
         self._nombre = nuevo_nombre.strip()
+        for indice in self._indices_nombre:
+            indice.actualizar(self._id_producto, self._nombre)
 
     @property
     def cantidad(self):
@@ -63,36 +82,47 @@ class Producto:
 class Inventario:
     """Gestiona una colección de productos."""
 
-    def __init__(self):
-        self._productos = []
+    def __init__(self, sumidero=None):
+        # Diccionario indexado por ID: búsqueda, alta y baja en O(1).
+        # Conserva el orden de inserción igual que la lista anterior.
+        self._productos = {}
+        self._indice_nombres = IndiceNombres()
+        # Destino de los eventos: consola por defecto, SumideroNulo en lotes
+        self.sumidero = sumidero or CONSOLA
+
+    def _emitir(self, ok, codigo, mensaje, producto=None):
+        resultado = Resultado(ok, codigo, mensaje, producto)
+        self.sumidero.emitir(resultado)
+        return resultado
 
     def agregar_producto(self, producto):
         if not isinstance(producto, Producto):
             raise TypeError("El objeto debe ser una instancia de Producto")
 
         if self._buscar_por_id(producto.id_producto):
-            print(f"ERROR: Ya existe un producto con ID {producto.id_producto}")
-            return False
+            return self._emitir(False, "id_duplicado", f"ERROR: Ya existe un producto con ID {producto.id_producto}")
 
-        self._productos.append(producto)
-        print(f"Producto '{producto.nombre}' agregado exitosamente")
-        return True
+        self._productos[producto.id_producto] = producto
+        self._indice_nombres.agregar(producto.id_producto, producto.nombre)
+        producto._indices_nombre += (self._indice_nombres,)
+        return self._emitir(True, "ok", f"Producto '{producto.nombre}' agregado exitosamente", producto)
 
     def eliminar_producto(self, id_producto):
         producto = self._buscar_por_id(id_producto)
         if producto:
-            self._productos.remove(producto)
-            print(f"Producto '{producto.nombre}' (ID: {id_producto}) eliminado")
-            return True
+            del self._productos[id_producto]
+            self._indice_nombres.quitar(id_producto)
+            producto._indices_nombre = tuple(
+                indice for indice in producto._indices_nombre if indice is not self._indice_nombres
+            )
+            return self._emitir(True, "ok", f"Producto '{producto.nombre}' (ID: {id_producto}) eliminado", producto)
         else:
-            print(f"ERROR: No se encontro producto con ID {id_producto}")
-            return False
+            return self._emitir(False, "no_encontrado", f"ERROR: No se encontro producto con ID {id_producto}")
 
     def actualizar_producto(self, id_producto, nueva_cantidad=None, nuevo_precio=None):
         producto = self._buscar_por_id(id_producto)
         if not producto:
-            print(f"ERROR: No se encontro producto con ID {id_producto}")
-            return False
+            return self._emitir(False, "no_encontrado", f"ERROR: No se encontro producto con ID {id_producto}")
 
         cambios = []
         if nueva_cantidad is not None:
@@ -104,21 +134,23 @@ class Inventario:
             cambios.append(f"precio a ${nuevo_precio:.2f}")
 
         if cambios:
-            print(f"Producto '{producto.nombre}' actualizado: {', '.join(cambios)}")
-            return True
+            return self._emitir(
+                True, "ok", f"Producto '{producto.nombre}' actualizado: {', '.join(cambios)}", producto
+            )
         else:
-            print("No se especificaron cambios para actualizar")
-            return False
+            return self._emitir(False, "sin_cambios", "No se especificaron cambios para actualizar", producto)
 
     def buscar_por_nombre(self, nombre_busqueda):
-        nombre_busqueda = nombre_busqueda.strip().lower()
+        nombre_busqueda = nombre_busqueda.strip()
         if not nombre_busqueda:
-            return self._productos[:]
+            return list(self._productos.values())
 
-        return [
-            producto for producto in self._productos
-            if nombre_busqueda in producto.nombre.lower()
-        ]
+        return [self._productos[id_p] for id_p in self._indice_nombres.buscar(nombre_busqueda)]
+
+    def buscar_por_prefijo(self, prefijo):
+        """Productos cuyo nombre empieza por el prefijo (sin distinguir mayúsculas)."""
+        ids = self._indice_nombres.buscar(prefijo.strip(), prefijo=True)
+        return [self._productos[id_p] for id_p in ids]
 
     def mostrar_inventario(self):
         if not self._productos:
@@ -131,7 +163,7 @@ class Inventario:
         print(f"{'ID':<6} | {'NOMBRE':<20} | {'CANTIDAD':<10} | {'PRECIO':<12}")
         print("-" * 70)
 
-        for producto in sorted(self._productos, key=lambda p: p.id_producto):
+        for producto in sorted(self._productos.values(), key=lambda p: p.id_producto):
             print(f"{producto.id_producto:<6} | {producto.nombre:<20} | "
                   f"{producto.cantidad:<10} | ${producto.precio:<11.2f}")
 
@@ -140,10 +172,7 @@ class Inventario:
         print("=" * 70 + "\n")
 
     def _buscar_por_id(self, id_producto):
-        for producto in self._productos:
-            if producto.id_producto == id_producto:
-                return producto
-        return None
+        return self._productos.get(id_producto)
 
     @property
     def cantidad_productos(self):
@@ -0,0 +1,59 @@
+import random
+import time
+
+from Clase_producto import Inventario, Producto, SumideroNulo
+
+# -------------------------------
+# Prueba de escalabilidad: coste por operación por ID (alta, actualización,
+# baja) con 10 mil, 100 mil y 1 millón de productos. Con el índice por ID
+# el coste debe mantenerse plano; como referencia se mide también la
+# búsqueda lineal que hacía la versión anterior.
+# -------------------------------
+TAMAÑOS = (10_000, 100_000, 1_000_000)
+OPERACIONES = 5_000
+BUSQUEDAS_LINEALES = 20
+
+
+def microsegundos(inicio, cantidad):
+    return (time.perf_counter() - inicio) / cantidad * 1e6
+
+
+def ejecutar(num_productos):
+    azar = random.Random(num_productos)
+    # Nombres cortos: el índice de n-gramas no es lo que se mide aquí
+    productos = [Producto(i, f"P{i % 100}", i % 50, float(i % 300)) for i in range(1, num_productos + 1)]
+    inventario = Inventario(sumidero=SumideroNulo())
+
+    inicio = time.perf_counter()
+    for producto in productos:
+        inventario.agregar_producto(producto)
+    alta = microsegundos(inicio, num_productos)
+
+    ids = [azar.randint(1, num_productos) for _ in range(OPERACIONES)]
+    inicio = time.perf_counter()
+    for id_producto in ids:
+        inventario.actualizar_producto(id_producto, nueva_cantidad=7)
+    actualizacion = microsegundos(inicio, OPERACIONES)
+
+    a_eliminar = azar.sample(range(1, num_productos + 1), OPERACIONES)
+    inicio = time.perf_counter()
+    for id_producto in a_eliminar:
+        assert inventario.eliminar_producto(id_producto)
+    baja = microsegundos(inicio, OPERACIONES)
+    assert inventario.cantidad_productos == num_productos - OPERACIONES
+
+    # Referencia: la búsqueda lineal de la versión anterior sobre la misma colección
+    lista = list(inventario._productos.values())
+    buscados = [p.id_producto for p in azar.sample(lista, BUSQUEDAS_LINEALES)]
+    inicio = time.perf_counter()
+    for id_producto in buscados:
+        next((p for p in lista if p.id_producto == id_producto), None)
+    lineal = microsegundos(inicio, BUSQUEDAS_LINEALES)
+
+    print(f"{num_productos:>9,} productos | alta {alta:5.2f} µs | actualización {actualizacion:5.2f} µs | "
+          f"baja {baja:6.2f} µs | búsqueda lineal anterior {lineal:10,.1f} µs")
+
+
+if __name__ == "__main__":
+    for num_productos in TAMAÑOS:
+        ejecutar(num_productos)
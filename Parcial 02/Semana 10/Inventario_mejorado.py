@@ -1,5 +1,16 @@
 import json
 import os
+import sys
+import threading
+from contextlib import contextmanager
+
+# Módulos compartidos entre semanas (carpeta "comun" de este parcial)
+_COMUN = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+if _COMUN not in sys.path:
+    sys.path.insert(0, _COMUN)
+
+from almacenamiento import AlmacenamientoJSON, AlmacenamientoJSONLines
+from resultados import CONSOLA, Resultado, SumideroBuffer, SumideroConsola, SumideroNulo
 
 
 # ==========================================
@@ -8,8 +19,11 @@ import os
 class Producto:
     """
     Representa un producto individual en el inventario.
+    Usa __slots__ para no reservar un __dict__ por cada producto.
     """
 
+    __slots__ = ("id_producto", "nombre", "cantidad", "precio")
+
     def __init__(self, id_producto, nombre, cantidad, precio):
         self.id_producto = id_producto
         self.nombre = nombre
@@ -47,11 +61,36 @@ class Inventario:
     """
     Gestiona la colección de productos y la persistencia en archivo.
     Implementa manejo de excepciones para operaciones de archivo.
+
+    Con usar_diario=True cada cambio se añade como una línea al archivo de
+    diario ('<archivo>.log') en lugar de reescribir todo el inventario.
+    Cuando el diario supera 'limite_diario' registros se compacta en segundo
+    plano: se escribe una nueva instantánea y se descarta el diario antiguo.
+
+    El formato de la instantánea lo decide 'almacenamiento' (por defecto
+    JSON Lines, que migra automáticamente los archivos con el arreglo JSON).
+
+    Las operaciones devuelven un Resultado y lo emiten a 'sumidero'
+    (consola por defecto; SumideroNulo para cargas masivas silenciosas).
     """
 
-    def __init__(self, archivo_nombre='inventario.txt'):
+    def __init__(self, archivo_nombre='inventario.txt', usar_diario=False, limite_diario=1000,
+                 almacenamiento=None, sumidero=None):
         self.archivo_nombre = archivo_nombre
+        self.almacenamiento = almacenamiento or AlmacenamientoJSONLines(archivo_nombre)
+        self.archivo_diario = archivo_nombre + '.log'
+        # Segmento de diario que se está compactando (aún no cubierto por la instantánea)
+        self.archivo_diario_compactando = archivo_nombre + '.log.compactando'
+        self.usar_diario = usar_diario
+        self.limite_diario = limite_diario
         self.productos = []
+        self._registros_diario = 0
+        self._candado = threading.Lock()
+        self._hilo_compactacion = None
+        # Estado del group commit (ver lote())
+        self._profundidad_lote = 0
+        self._registros_pendientes = []
+        self.sumidero = sumidero or CONSOLA
         self._cargar_inventario()
 
     def _cargar_inventario(self):
@@ -59,16 +98,16 @@ class Inventario:
         Carga los productos desde el archivo de texto al iniciar.
         Maneja FileNotFoundError, PermissionError y JSONDecodeError.
         """
-        if not os.path.exists(self.archivo_nombre):
+        if not self.almacenamiento.existe():
             print(f"[INFO] No se encontró '{self.archivo_nombre}'. Se iniciará un inventario vacío.")
+            self._reproducir_diario()
             return
 
         try:
-            with open(self.archivo_nombre, 'r', encoding='utf-8') as f:
-                datos = json.load(f)
-                self.productos = [Producto.from_dict(p) for p in datos]
-                print(
-                    f"[ÉXITO] Inventario cargado correctamente desde '{self.archivo_nombre}'. ({len(self.productos)} productos)")
+            # Los productos se construyen a medida que se lee cada registro
+            self.productos = list(map(Producto.from_dict, self.almacenamiento.leer()))
+            print(
+                f"[ÉXITO] Inventario cargado correctamente desde '{self.archivo_nombre}'. ({len(self.productos)} productos)")
 
         except FileNotFoundError:
             # Este caso técnicamente ya se cubre con os.path.exists, pero es buena práctica
@@ -81,17 +120,189 @@ class Inventario:
                 f"[ERROR] El archivo '{self.archivo_nombre}' está corrupto o tiene formato inválido. Se iniciará un inventario vacío para evitar pérdida de datos.")
         except Exception as e:
             print(f"[ERROR INESPERADO] Ocurrió un error al cargar: {e}")
+        else:
+            self._reproducir_diario()
+            if self.almacenamiento.requiere_migracion:
+                exito, mensaje = self._guardar_inventario()
+                if exito:
+                    print(f"[INFO] '{self.archivo_nombre}' migrado al formato JSON Lines.")
+                else:
+                    print(f"[ADVERTENCIA] No se pudo migrar el archivo: {mensaje}")
 
-    def _guardar_inventario(self):
+    def _reproducir_diario(self):
         """
-        Guarda el estado actual del inventario en el archivo de texto.
-        Se llama después de cada modificación (CRUD).
+        Aplica sobre la instantánea cargada los cambios registrados en el diario.
+        Primero el segmento que quedó a medio compactar y luego el diario actual.
+
+        Una línea sin terminar solo puede ser la última (escritura interrumpida):
+        se descarta y se recorta el archivo hasta el final de la línea anterior,
+        para que el siguiente cambio no se escriba pegado a ella. Un registro
+        completo pero ilegible (o al que le faltan campos) se salta y se avisa,
+        sin tocar los registros válidos que vengan detrás.
+        """
+        aplicados = 0
+        # Índice ID -> Producto para aplicar cada registro en O(1); conserva el orden
+        por_id = {p.id_producto: p for p in self.productos}
+        for archivo in (self.archivo_diario_compactando, self.archivo_diario):
+            if not os.path.exists(archivo):
+                continue
+            try:
+                validos = 0  # Bytes hasta el final de la última línea terminada
+                dañados = 0
+                with open(archivo, 'rb') as f:
+                    for numero, linea in enumerate(f, start=1):
+                        if not linea.endswith(b'\n'):
+                            print(f"[ADVERTENCIA] Se descartó la última línea de '{archivo}' (escritura interrumpida).")
+                            break
+                        validos += len(linea)
+                        if not linea.strip():
+                            continue
+                        try:
+                            self._aplicar_registro(json.loads(linea), por_id)
+                            aplicados += 1
+                        except (ValueError, KeyError, TypeError) as e:
+                            dañados += 1
+                            print(f"[ADVERTENCIA] Se ignoró el registro dañado de la línea {numero} de '{archivo}': {e!r}")
+                    recortar = f.seek(0, os.SEEK_END) > validos
+                if recortar:
+                    with open(archivo, 'r+b') as f:
+                        f.truncate(validos)
+                if dañados:
+                    print(f"[ADVERTENCIA] {dañados} registro(s) dañado(s) en '{archivo}' no se aplicaron.")
+            except (PermissionError, OSError) as e:
+                print(f"[ERROR] No se pudo leer el diario '{archivo}': {e}")
+
+        self._registros_diario = aplicados
+        if aplicados:
+            self.productos = list(por_id.values())
+            print(f"[INFO] Se aplicaron {aplicados} cambios pendientes del diario.")
+
+    @staticmethod
+    def _aplicar_registro(registro, por_id):
+        """
+        Aplica un registro del diario sobre el índice ID -> Producto (sin volver
+        a persistirlo). Lanza ValueError, KeyError o TypeError si el registro no
+        tiene la forma esperada; en ese caso no modifica nada.
         """
+        if not isinstance(registro, dict):
+            raise ValueError("el registro no es un objeto JSON")
+        operacion = registro.get("op")
+        if operacion == "agregar":
+            producto = Producto.from_dict(registro["producto"])
+            por_id.setdefault(producto.id_producto, producto)
+        elif operacion == "eliminar":
+            por_id.pop(registro["id"], None)
+        elif operacion == "actualizar":
+            p = por_id.get(registro["id"])
+            if p is not None:
+                if registro.get("cantidad") is not None:
+                    p.cantidad = registro["cantidad"]
+                if registro.get("precio") is not None:
+                    p.precio = registro["precio"]
+        else:
+            raise ValueError(f"operación desconocida: {operacion!r}")
+
+    def _registrar_cambio(self, registro):
+        """
+        Persiste un cambio. En modo diario añade una sola línea compacta al
+        archivo de diario; si no, reescribe el inventario completo.
+        """
+        if self._profundidad_lote:
+            # Dentro de lote() todo se confirma junto al salir del bloque
+            self._registros_pendientes.append(registro)
+            return True, "Cambio pendiente de confirmar en el lote"
+        if not self.usar_diario:
+            return self._guardar_inventario()
+        return self._anexar_diario([registro])
+
+    def _anexar_diario(self, registros):
+        """Añade los registros al diario y los fuerza a disco con un único fsync."""
         try:
-            with open(self.archivo_nombre, 'w', encoding='utf-8') as f:
-                # Convertimos la lista de objetos a lista de diccionarios
-                datos = [p.to_dict() for p in self.productos]
-                json.dump(datos, f, indent=4, ensure_ascii=False)
+            with self._candado:
+                with open(self.archivo_diario, 'a', encoding='utf-8') as f:
+                    for registro in registros:
+                        f.write(json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._registros_diario += len(registros)
+                debe_compactar = self._registros_diario >= self.limite_diario
+        except PermissionError:
+            return False, "Error: No tienes permisos de escritura en el disco."
+        except OSError as e:
+            return False, f"Error de Sistema Operativo al escribir: {e}"
+
+        if debe_compactar:
+            self._compactar_en_segundo_plano()
+        return True, "Cambio registrado en el diario"
+
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa varios cambios en una sola escritura durable (group commit).
+        Dentro del bloque los cambios solo se aplican en memoria; al salir se
+        añaden todos al diario con un único fsync, o se escribe una única
+        instantánea si no se usa diario.
+        """
+        self._profundidad_lote += 1
+        try:
+            yield self
+        finally:
+            self._profundidad_lote -= 1
+            if self._profundidad_lote == 0:
+                exito, mensaje = self._confirmar_lote()
+                if not exito:
+                    print(f"[ADVERTENCIA] Los cambios del lote quedaron solo en memoria: {mensaje}")
+
+    def _confirmar_lote(self):
+        """Persiste de una vez los cambios acumulados durante lote()."""
+        registros, self._registros_pendientes = self._registros_pendientes, []
+        if not registros:
+            return True, "Sin cambios pendientes"
+        if self.usar_diario:
+            return self._anexar_diario(registros)
+        return self._guardar_inventario()
+
+    def _compactar_en_segundo_plano(self):
+        """Lanza un hilo que escribe una nueva instantánea y descarta el diario ya cubierto."""
+        if self._hilo_compactacion is not None and self._hilo_compactacion.is_alive():
+            return
+
+        with self._candado:
+            if os.path.exists(self.archivo_diario_compactando):
+                # Un segmento anterior no llegó a cubrirse; se compactará todo de una vez
+                with open(self.archivo_diario_compactando, 'a', encoding='utf-8') as destino, \
+                        open(self.archivo_diario, 'r', encoding='utf-8') as origen:
+                    destino.write(origen.read())
+                os.remove(self.archivo_diario)
+            elif os.path.exists(self.archivo_diario):
+                os.replace(self.archivo_diario, self.archivo_diario_compactando)
+            # Copia del estado actual: los cambios posteriores van al nuevo diario
+            datos = [p.to_dict() for p in self.productos]
+            self._registros_diario = 0
+
+        self._hilo_compactacion = threading.Thread(target=self._compactar, args=(datos,), daemon=True)
+        self._hilo_compactacion.start()
+
+    def _compactar(self, datos):
+        """Escribe la instantánea y elimina el segmento de diario que ya contiene."""
+        exito, mensaje = self._escribir_instantanea(datos)
+        if not exito:
+            print(f"[ADVERTENCIA] No se pudo compactar el diario: {mensaje}")
+            return
+        try:
+            os.remove(self.archivo_diario_compactando)
+        except OSError:
+            pass
+
+    def esperar_compactacion(self):
+        """Bloquea hasta que termine la compactación en curso, si la hay."""
+        if self._hilo_compactacion is not None:
+            self._hilo_compactacion.join()
+
+    def _escribir_instantanea(self, datos):
+        """Escribe los diccionarios (cualquier iterable) en el archivo principal."""
+        try:
+            self.almacenamiento.escribir(datos)
             return True, "Guardado exitoso"
 
         except PermissionError:
@@ -101,22 +312,47 @@ class Inventario:
         except Exception as e:
             return False, f"Error inesperado al guardar: {e}"
 
+    def _guardar_inventario(self):
+        """
+        Guarda el estado actual del inventario en el archivo de texto.
+        Sin diario se llama después de cada modificación (CRUD); con diario
+        deja la instantánea al día y vacía el diario.
+        """
+        self.esperar_compactacion()
+        with self._candado:
+            # Los diccionarios se generan uno a uno mientras se escriben
+            exito, mensaje = self._escribir_instantanea(p.to_dict() for p in self.productos)
+            if exito and self.usar_diario:
+                for archivo in (self.archivo_diario_compactando, self.archivo_diario):
+                    if os.path.exists(archivo):
+                        os.remove(archivo)
+                self._registros_diario = 0
+        return exito, mensaje
+
+    def _emitir(self, ok, codigo, mensaje, producto=None):
+        resultado = Resultado(ok, codigo, mensaje, producto)
+        self.sumidero.emitir(resultado)
+        return resultado
+
     def agregar_producto(self, producto):
         """Añade un producto y persiste el cambio."""
         # Validar que el ID no exista
         if any(p.id_producto == producto.id_producto for p in self.productos):
-            print("[ERROR] Ya existe un producto con ese ID.")
-            return False
+            return self._emitir(False, "id_duplicado", "[ERROR] Ya existe un producto con ese ID.")
 
         self.productos.append(producto)
-        exito, mensaje = self._guardar_inventario()
+        exito, mensaje = self._registrar_cambio({"op": "agregar", "producto": producto.to_dict()})
 
         if exito:
-            print(f"[ÉXITO] Producto '{producto.nombre}' añadido y guardado en archivo.")
-            return True
+            return self._emitir(
+                True, "ok", f"[ÉXITO] Producto '{producto.nombre}' añadido y guardado en archivo.", producto
+            )
         else:
-            print(f"[ADVERTENCIA] Producto añadido en memoria, pero {mensaje}. Los cambios podrían perderse al cerrar.")
-            return False
+            return self._emitir(
+                False, "no_persistido",
+                f"[ADVERTENCIA] Producto añadido en memoria, pero {mensaje}. Los cambios podrían perderse al cerrar.",
+                producto
+            )
 
     def eliminar_producto(self, id_producto):
         """Elimina un producto por ID y persiste el cambio."""
@@ -128,17 +364,20 @@ class Inventario:
 
         if producto_encontrado:
             self.productos.remove(producto_encontrado)
-            exito, mensaje = self._guardar_inventario()
+            exito, mensaje = self._registrar_cambio({"op": "eliminar", "id": id_producto})
 
             if exito:
-                print(f"[ÉXITO] Producto ID {id_producto} eliminado y archivo actualizado.")
-                return True
+                return self._emitir(
+                    True, "ok", f"[ÉXITO] Producto ID {id_producto} eliminado y archivo actualizado.",
+                    producto_encontrado
+                )
             else:
-                print(f"[ADVERTENCIA] Producto eliminado en memoria, pero {mensaje}.")
-                return False
+                return self._emitir(
+                    False, "no_persistido", f"[ADVERTENCIA] Producto eliminado en memoria, pero {mensaje}.",
+                    producto_encontrado
+                )
         else:
-            print(f"[ERROR] No se encontró el producto con ID {id_producto}.")
-            return False
+            return self._emitir(False, "no_encontrado", f"[ERROR] No se encontró el producto con ID {id_producto}.")
 
     def actualizar_producto(self, id_producto, nueva_cantidad=None, nuevo_precio=None):
         """Actualiza campos de un producto y persiste el cambio."""
@@ -149,16 +388,22 @@ class Inventario:
                 if nuevo_precio is not None:
                     p.precio = nuevo_precio
 
-                exito, mensaje = self._guardar_inventario()
+                exito, mensaje = self._registrar_cambio({
+                    "op": "actualizar",
+                    "id": id_producto,
+                    "cantidad": nueva_cantidad,
+                    "precio": nuevo_precio
+                })
                 if exito:
-                    print(f"[ÉXITO] Producto ID {id_producto} actualizado en archivo.")
-                    return True
+                    return self._emitir(True, "ok", f"[ÉXITO] Producto ID {id_producto} actualizado en archivo.", p)
                 else:
-                    print(f"[ADVERTENCIA] Producto actualizado en memoria, pero {mensaje}.")
-                    return False
+                    return self._emitir(
+                        False, "no_persistido", f"[ADVERTENCIA] Producto actualizado en memoria, pero {mensaje}.", p
+                    )
 
-        print(f"[ERROR] No se encontró el producto con ID {id_producto} para actualizar.")
-        return False
+        return self._emitir(
+            False, "no_encontrado", f"[ERROR] No se encontró el producto con ID {id_producto} para actualizar."
+        )
 
     def mostrar_inventario(self):
         """Muestra todos los productos en consola."""
@@ -196,7 +441,8 @@ def menu():
     print("\n========================================")
     print("   SISTEMA DE GESTIÓN DE INVENTARIOS   ")
     print("========================================")
-    inventario = Inventario()  # Al iniciar, carga el archivo automáticamente
+    # Al iniciar, carga el archivo (y aplica el diario) automáticamente
+    inventario = Inventario(usar_diario=True)
 
     while True:
         print("\n1. Agregar Producto")
@@ -249,7 +495,7 @@ def menu():
 
         elif opcion == '5':
             print("[INFO] Guardando cambios finales y saliendo...")
-            # Se guarda explícitamente al salir por seguridad, aunque ya se guarda en cada cambio
+            # Al salir se compacta el diario en una instantánea completa
             inventario._guardar_inventario()
             print("¡Hasta luego!")
             break
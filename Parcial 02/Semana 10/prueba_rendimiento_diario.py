@@ -0,0 +1,64 @@
+import os
+import random
+import tempfile
+import time
+
+from Inventario_mejorado import AlmacenamientoJSON, AlmacenamientoJSONLines, Inventario, Producto, SumideroNulo
+
+# -------------------------------
+# Prueba de rendimiento: actualizaciones por segundo con el guardado
+# original (reescribir el arreglo JSON completo en cada cambio) frente al
+# diario (una línea por cambio, con fsync).
+# -------------------------------
+NUM_PRODUCTOS = 200_000
+SEGUNDOS_POR_MODO = 5
+
+
+def crear_archivo(ruta, almacenamiento):
+    """Escribe un inventario inicial de NUM_PRODUCTOS productos."""
+    almacenamiento.escribir(
+        {"id": i, "nombre": f"Producto {i}", "cantidad": i % 100, "precio": float(i % 1000)}
+        for i in range(NUM_PRODUCTOS)
+    )
+
+
+def medir(nombre, inventario):
+    """Actualiza productos al azar durante SEGUNDOS_POR_MODO y devuelve actualizaciones/s."""
+    azar = random.Random(1)
+    actualizaciones = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < SEGUNDOS_POR_MODO:
+        resultado = inventario.actualizar_producto(azar.randrange(NUM_PRODUCTOS), nueva_cantidad=azar.randrange(100))
+        assert resultado, resultado.mensaje
+        actualizaciones += 1
+    duracion = time.perf_counter() - inicio
+    por_segundo = actualizaciones / duracion
+    print(f"{nombre}: {actualizaciones} actualizaciones en {duracion:.1f} s ({por_segundo:,.1f} por segundo)")
+    return por_segundo
+
+
+def ejecutar():
+    with tempfile.TemporaryDirectory() as carpeta:
+        # Comportamiento original: arreglo JSON con sangría reescrito tras cada cambio
+        ruta = os.path.join(carpeta, "original.txt")
+        crear_archivo(ruta, AlmacenamientoJSON(ruta))
+        original = Inventario(ruta, almacenamiento=AlmacenamientoJSON(ruta), sumidero=SumideroNulo())
+        base = medir("Reescritura completa", original)
+
+        # Diario: una línea compacta por cambio; la compactación va en segundo plano
+        ruta = os.path.join(carpeta, "diario.txt")
+        crear_archivo(ruta, AlmacenamientoJSONLines(ruta))
+        inventario = Inventario(ruta, usar_diario=True, limite_diario=10_000, sumidero=SumideroNulo())
+        con_diario = medir("Diario de cambios", inventario)
+        inventario.esperar_compactacion()
+
+        # La recarga (instantánea + diario) debe ver las mismas cantidades
+        recargado = Inventario(ruta, usar_diario=True, sumidero=SumideroNulo())
+        assert [(p.id_producto, p.cantidad) for p in recargado.productos] == \
+               [(p.id_producto, p.cantidad) for p in inventario.productos], "El diario no reproduce el estado"
+
+    print(f"El diario es {con_diario / base:,.0f} veces más rápido con {NUM_PRODUCTOS:,} productos")
+
+
+if __name__ == "__main__":
+    ejecutar()
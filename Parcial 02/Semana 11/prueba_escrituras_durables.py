@@ -0,0 +1,63 @@
+import os
+import random
+import tempfile
+import time
+
+from sitema_inventario import AlmacenamientoJSONLines, Inventario, SumideroNulo
+
+# -------------------------------
+# Prueba de rendimiento: cambios durables por segundo (cada guardado hace
+# fsync y os.replace) guardando tras cada cambio frente a agruparlos con
+# lote() (group commit), que los deja en disco con una sola escritura.
+# -------------------------------
+NUM_PRODUCTOS = 10_000
+SEGUNDOS_POR_MODO = 5
+TAMAÑOS_LOTE = (1, 10, 100, 1000)
+
+
+def crear_archivo(ruta):
+    """Escribe un inventario inicial de NUM_PRODUCTOS productos."""
+    AlmacenamientoJSONLines(ruta).escribir(
+        {"id": i, "nombre": f"Producto {i}", "cantidad": i % 100, "precio": float(i % 1000)}
+        for i in range(NUM_PRODUCTOS)
+    )
+
+
+def medir(inventario, tamaño_lote):
+    """Aplica cambios al azar en lotes de 'tamaño_lote' y devuelve cambios durables por segundo."""
+    azar = random.Random(tamaño_lote)
+    cambios = escrituras = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < SEGUNDOS_POR_MODO:
+        with inventario.lote():
+            for _ in range(tamaño_lote):
+                resultado = inventario.actualizar_producto(azar.randrange(NUM_PRODUCTOS), cantidad=azar.randrange(100))
+                assert resultado, resultado.mensaje
+        cambios += tamaño_lote
+        escrituras += 1
+    duracion = time.perf_counter() - inicio
+    por_segundo = cambios / duracion
+    print(f"Lote de {tamaño_lote:>4}: {cambios:>7,} cambios en {escrituras:>4,} escrituras "
+          f"({por_segundo:>9,.1f} cambios durables por segundo)")
+    return por_segundo
+
+
+def ejecutar():
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "inventario.json")
+        crear_archivo(ruta)
+        inventario = Inventario(ruta, sumidero=SumideroNulo())
+        resultados = {tamaño: medir(inventario, tamaño) for tamaño in TAMAÑOS_LOTE}
+
+        # Lo último guardado debe coincidir con el estado en memoria
+        recargado = Inventario(ruta, sumidero=SumideroNulo())
+        assert {i: p.cantidad for i, p in recargado.productos.items()} == \
+               {i: p.cantidad for i, p in inventario.productos.items()}, "El archivo no refleja los cambios"
+
+    mayor = TAMAÑOS_LOTE[-1]
+    print(f"Con lotes de {mayor} el group commit da {resultados[mayor] / resultados[1]:,.0f} veces más "
+          f"cambios durables por segundo con {NUM_PRODUCTOS:,} productos")
+
+
+if __name__ == "__main__":
+    ejecutar()
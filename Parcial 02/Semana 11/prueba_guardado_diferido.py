@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+import time
+
+from sitema_inventario import Inventario, Producto, SumideroBuffer, SumideroNulo
+
+# -------------------------------
+# Prueba del guardado diferido:
+# - flush() no vuelve antes de que los cambios estén en disco, aunque el
+#   hilo de guardado ya los hubiera tomado y aún no hubiera empezado a
+#   escribir (se fuerza ese hueco retrasando al hilo ante el candado).
+# - Un error inesperado al escribir se informa al sumidero, el hilo sigue
+#   vivo y los cambios se reintentan.
+# -------------------------------
+RONDAS = 5
+RETRASO = 0.3  # Lo que tarda el hilo de guardado en tomar el candado de escritura
+
+
+class CandadoConRetraso:
+    """Candado de escritura que el hilo de guardado tarda RETRASO segundos en pedir."""
+
+    def __init__(self, hilo_lento):
+        self._candado = threading.Lock()
+        self._hilo_lento = hilo_lento
+
+    def __enter__(self):
+        if threading.current_thread() is self._hilo_lento:
+            time.sleep(RETRASO)
+        self._candado.acquire()
+
+    def __exit__(self, *excepcion):
+        self._candado.release()
+
+
+def probar_flush_durable(carpeta):
+    for ronda in range(RONDAS):
+        ruta = os.path.join(carpeta, f"flush_{ronda}.json")
+        inventario = Inventario(ruta, guardado_diferido=True, intervalo_ms=10, sumidero=SumideroNulo())
+        inventario._candado_escritura = CandadoConRetraso(inventario._hilo_guardado)
+        inventario.agregar_producto(Producto(1, "Tornillo", 5, 0.1))
+        time.sleep(0.05)  # Pasado el intervalo: el hilo ya va a escribir y espera el candado
+        inventario.flush()
+        assert os.path.exists(ruta), "flush() volvió sin haber escrito los cambios"
+        inventario.cerrar()
+        recargado = Inventario(ruta, sumidero=SumideroNulo())
+        assert list(recargado.productos) == [1]
+    print(f"flush() durable en {RONDAS} rondas con el hilo de guardado a medio escribir")
+
+
+def probar_error_inesperado(carpeta):
+    ruta = os.path.join(carpeta, "errores.json")
+    sumidero = SumideroBuffer()
+    inventario = Inventario(ruta, guardado_diferido=True, intervalo_ms=20, sumidero=sumidero)
+    escribir = inventario.almacenamiento.escribir
+    fallos = [2]
+
+    def escribir_con_fallos(registros):
+        if fallos[0]:
+            fallos[0] -= 1
+            raise RuntimeError("fallo simulado")
+        return escribir(registros)
+
+    inventario.almacenamiento.escribir = escribir_con_fallos
+    inventario.agregar_producto(Producto(1, "Tuerca", 3, 0.2))
+    limite = time.monotonic() + 5
+    while not os.path.exists(ruta):
+        assert time.monotonic() < limite, "los cambios no se reintentaron"
+        time.sleep(0.01)
+    assert inventario._hilo_guardado.is_alive()
+    errores = [resultado for resultado in sumidero.eventos if resultado.codigo == "error_guardado"]
+    assert len(errores) == 2, errores
+    inventario.cerrar()
+    print("Error inesperado al guardar: se informa, el hilo sigue vivo y se reintenta")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as carpeta:
+        probar_flush_durable(carpeta)
+        probar_error_inesperado(carpeta)
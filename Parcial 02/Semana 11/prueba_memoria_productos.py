@@ -0,0 +1,59 @@
+import gc
+import tracemalloc
+
+from sitema_inventario import Producto
+
+# -------------------------------
+# Prueba de memoria: bytes por producto con la clase Producto actual
+# (__slots__) frente a la misma clase guardando sus atributos en un
+# __dict__, con 1 millón de productos. Se comprueba también que los
+# setters siguen validando.
+# -------------------------------
+NUM_PRODUCTOS = 1_000_000
+
+# Réplica de Producto con los mismos métodos y propiedades, pero sin __slots__
+ProductoConDict = type("ProductoConDict", (), {
+    nombre: valor for nombre, valor in vars(Producto).items()
+    if nombre not in Producto.__slots__ and nombre not in ("__slots__", "__dict__", "__weakref__")
+})
+
+
+def medir(clase):
+    """Crea NUM_PRODUCTOS productos y devuelve los bytes reservados por producto."""
+    gc.collect()
+    tracemalloc.start()
+    productos = [clase(i, f"Producto {i}", i % 100, float(i % 1000)) for i in range(NUM_PRODUCTOS)]
+    usados, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(productos) == NUM_PRODUCTOS
+    return usados / NUM_PRODUCTOS
+
+
+def comprobar_validacion(clase):
+    """Los valores inválidos deben seguir rechazándose con ValueError."""
+    producto = clase(1, "Lápiz", 10, 0.5)
+    for campo, valor in (("nombre", ""), ("cantidad", -1), ("precio", -0.01)):
+        try:
+            setattr(producto, campo, valor)
+        except ValueError:
+            continue
+        raise AssertionError(f"{clase.__name__}.{campo} aceptó el valor inválido {valor!r}")
+    try:
+        clase(2, "Borrador", -5, 1.0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError(f"{clase.__name__} aceptó una cantidad inicial negativa")
+
+
+if __name__ == "__main__":
+    comprobar_validacion(Producto)
+    comprobar_validacion(ProductoConDict)
+    assert not hasattr(Producto(1, "Lápiz", 1, 1.0), "__dict__")
+
+    con_slots = medir(Producto)
+    con_dict = medir(ProductoConDict)
+    print(f"{NUM_PRODUCTOS:,} productos | con __slots__ {con_slots:6.1f} B/producto "
+          f"({con_slots * NUM_PRODUCTOS / 2**20:,.0f} MB) | con __dict__ {con_dict:6.1f} B/producto "
+          f"({con_dict * NUM_PRODUCTOS / 2**20:,.0f} MB)")
+    print(f"__slots__ ahorra {(1 - con_slots / con_dict) * 100:.0f} % de la memoria de los productos")
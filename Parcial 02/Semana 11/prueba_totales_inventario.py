@@ -0,0 +1,122 @@
+import math
+import os
+import random
+import tempfile
+
+from sitema_inventario import Inventario, Producto, SumideroNulo
+
+# -------------------------------
+# Prueba de los agregados: tras cada operación de secuencias aleatorias
+# (altas, bajas, actualizaciones, cambios directos en los setters y
+# operaciones masivas) el valor total, las unidades y el stock bajo deben
+# coincidir con recalcularlos recorriendo todos los productos.
+# -------------------------------
+SECUENCIAS = 50
+OPERACIONES_POR_SECUENCIA = 400
+MAX_ID = 200  # IDs pocos y repetidos: bajas y altas del mismo ID, montículo con entradas viejas
+UMBRALES = (0, 3, 10, 50)
+
+
+def recalcular(inventario):
+    """Los agregados calculados desde cero, como hacía la versión anterior."""
+    productos = list(inventario.productos.values())
+    valor = sum(p.cantidad * p.precio for p in productos)
+    unidades = sum(p.cantidad for p in productos)
+    bajo_stock = {umbral: sorted((p.cantidad, p.id) for p in productos if p.cantidad <= umbral)
+                  for umbral in UMBRALES}
+    return valor, unidades, bajo_stock
+
+
+def comprobar(inventario, contexto):
+    valor, unidades, bajo_stock = recalcular(inventario)
+    assert math.isclose(inventario.valor_total(), valor, rel_tol=1e-9, abs_tol=1e-6), \
+        f"{contexto}: valor total {inventario.valor_total()} != {valor}"
+    assert inventario.unidades_totales() == unidades, \
+        f"{contexto}: unidades {inventario.unidades_totales()} != {unidades}"
+    assert inventario.total_productos() == len(inventario.productos)
+    for umbral, esperado in bajo_stock.items():
+        obtenido = [(p.cantidad, p.id) for p in inventario.productos_bajo_stock(umbral)]
+        # De menor a mayor cantidad; a igual cantidad el orden no está definido
+        assert [c for c, _ in obtenido] == [c for c, _ in esperado] and sorted(obtenido) == esperado, \
+            f"{contexto}: stock bajo (<= {umbral}) {obtenido} != {esperado}"
+
+
+def producto_al_azar(azar, id_producto):
+    return Producto(id_producto, f"Producto {id_producto}", azar.randrange(60), round(azar.uniform(0, 500), 2))
+
+
+def operacion_al_azar(azar, inventario, retirados):
+    """Aplica una operación al azar y devuelve su nombre."""
+    ids = list(inventario.productos)
+    tipo = azar.randrange(9)
+    if tipo == 0 or not ids:
+        inventario.agregar_producto(producto_al_azar(azar, azar.randrange(MAX_ID)))
+        return "agregar"
+    if tipo == 1:
+        producto = inventario.productos[azar.choice(ids)]
+        inventario.eliminar_producto(producto.id)
+        retirados.append(producto)
+        return "eliminar"
+    if tipo == 2:
+        inventario.actualizar_producto(azar.choice(ids),
+                                       cantidad=azar.choice((None, azar.randrange(60))),
+                                       precio=azar.choice((None, round(azar.uniform(0, 500), 2))))
+        return "actualizar"
+    if tipo == 3:
+        # Cambio directo en el setter: lo recogen los observadores
+        producto = inventario.productos[azar.choice(ids)]
+        campo = azar.choice(("cantidad", "precio", "nombre"))
+        if campo == "nombre":
+            producto.nombre = f"Renombrado {azar.randrange(1000)}"
+        else:
+            setattr(producto, campo, azar.choice((azar.randrange(60), round(azar.uniform(1, 500), 2))))
+        return "setter"
+    if tipo == 4:
+        # Valor inválido: debe rechazarse sin tocar los agregados
+        producto = inventario.productos[azar.choice(ids)]
+        try:
+            setattr(producto, azar.choice(("cantidad", "precio")), -1)
+        except ValueError:
+            return "setter inválido"
+        raise AssertionError("El setter aceptó un valor negativo")
+    if tipo == 5 and retirados:
+        # Un producto ya eliminado no debe afectar a los totales
+        retirados[azar.randrange(len(retirados))].cantidad = azar.randrange(1000)
+        return "setter de eliminado"
+    if tipo == 6:
+        filas = [producto_al_azar(azar, azar.randrange(MAX_ID)).to_dict() for _ in range(azar.randint(1, 10))]
+        inventario.agregar_muchos(filas, todo_o_nada=azar.random() < 0.3)
+        return "agregar_muchos"
+    if tipo == 7:
+        filas = [{"id": azar.choice(ids), "cantidad": azar.randrange(-2, 60)} for _ in range(azar.randint(1, 10))]
+        inventario.actualizar_muchos(filas, todo_o_nada=azar.random() < 0.3)
+        return "actualizar_muchos"
+    a_eliminar = azar.sample(ids, min(len(ids), azar.randint(1, 10)))
+    retirados.extend(inventario.productos[id_p] for id_p in a_eliminar)
+    inventario.eliminar_muchos(a_eliminar + [MAX_ID + 1], todo_o_nada=azar.random() < 0.3)
+    return "eliminar_muchos"
+
+
+def ejecutar():
+    with tempfile.TemporaryDirectory() as carpeta:
+        for semilla in range(SECUENCIAS):
+            azar = random.Random(semilla)
+            ruta = os.path.join(carpeta, f"inventario_{semilla}.json")
+            inventario = Inventario(ruta, sumidero=SumideroNulo())
+            retirados = []
+            # Un solo guardado por secuencia (group commit): aquí no se mide el disco
+            with inventario.lote():
+                for paso in range(OPERACIONES_POR_SECUENCIA):
+                    nombre = operacion_al_azar(azar, inventario, retirados)
+                    comprobar(inventario, f"semilla {semilla}, paso {paso} ({nombre})")
+
+            # Los agregados de la recarga deben coincidir con los del inventario en memoria
+            recargado = Inventario(ruta, sumidero=SumideroNulo())
+            comprobar(recargado, f"semilla {semilla}, recarga")
+            assert recargado.unidades_totales() == inventario.unidades_totales()
+
+    print(f"Agregados correctos en {SECUENCIAS} secuencias de {OPERACIONES_POR_SECUENCIA} operaciones")
+
+
+if __name__ == "__main__":
+    ejecutar()
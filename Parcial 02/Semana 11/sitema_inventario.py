@@ -1,5 +1,21 @@
+import atexit
+import csv
+import heapq
 import json
 import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Módulos compartidos entre semanas (carpeta "comun" de este parcial)
+_COMUN = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+if _COMUN not in sys.path:
+    sys.path.insert(0, _COMUN)
+
+from almacenamiento import AlmacenamientoJSON, AlmacenamientoJSONLines
+from indice_nombres import IndiceNombres
+from resultados import CONSOLA, Resultado, SumideroBuffer, SumideroConsola, SumideroNulo
 
 
 # ==============================================================================
@@ -9,10 +25,16 @@ class Producto:
     """
     Representa un ítem individual en el inventario.
     Encapsula los datos del producto y valida su integridad.
+    Usa __slots__ para no reservar un __dict__ por cada producto.
     """
 
+    __slots__ = ("_id", "_nombre", "_cantidad", "_precio", "_observadores")
+
     def __init__(self, id_producto, nombre, cantidad, precio):
         self._id = id_producto
+        # Inventarios que deben enterarse cuando cambia un campo (índices y totales).
+        # Tupla vacía compartida hasta que el producto entra en un inventario.
+        self._observadores = ()
         self.nombre = nombre
         self.cantidad = cantidad
         self.precio = precio
@@ -31,6 +53,7 @@ class Producto:
         if not valor:
             raise ValueError("El nombre no puede estar vacío.")
         self._nombre = valor
+        self._notificar("nombre")
 
     @property
     def cantidad(self):
@@ -41,6 +64,7 @@ class Producto:
         if valor < 0:
             raise ValueError("La cantidad no puede ser negativa.")
         self._cantidad = int(valor)
+        self._notificar("cantidad")
 
     @property
     def precio(self):
@@ -51,6 +75,11 @@ class Producto:
         if valor < 0:
             raise ValueError("El precio no puede ser negativo.")
         self._precio = float(valor)
+        self._notificar("precio")
+
+    def _notificar(self, campo):
+        for observador in self._observadores:
+            observador.producto_modificado(self, campo)
 
     def to_dict(self):
         """Convierte el objeto a un diccionario para serialización JSON."""
@@ -75,6 +104,75 @@ class Producto:
         return f"ID: {self._id} | {self._nombre} | Cant: {self._cantidad} | Precio: ${self._precio:.2f}"
 
 
+# ==============================================================================
+# TOTALES DEL INVENTARIO
+# ==============================================================================
+class TotalesInventario:
+    """
+    Agregados que se mantienen al día con cada cambio en lugar de recorrer
+    todos los productos: valor total (cantidad x precio), unidades en stock
+    y un montículo (min-heap) por cantidad para consultar el stock bajo.
+    """
+
+    def __init__(self):
+        self.valor_total = 0.0
+        self.unidades = 0
+        self._valores = {}   # ID -> (cantidad, precio) tal como se sumaron
+        self._monticulo = []  # (cantidad, ID); las entradas viejas se descartan al leer
+
+    def agregar(self, producto):
+        self._valores[producto.id] = (producto.cantidad, producto.precio)
+        self.valor_total += producto.cantidad * producto.precio
+        self.unidades += producto.cantidad
+        heapq.heappush(self._monticulo, (producto.cantidad, producto.id))
+
+    def quitar(self, id_producto):
+        cantidad, precio = self._valores.pop(id_producto)
+        self.valor_total -= cantidad * precio
+        self.unidades -= cantidad
+        if not self._valores:
+            # Sin productos se reinicia para no arrastrar errores de redondeo
+            self.valor_total = 0.0
+            self._monticulo = []
+        self._compactar_si_hace_falta()
+
+    def actualizar(self, producto):
+        cantidad, precio = self._valores[producto.id]
+        self._valores[producto.id] = (producto.cantidad, producto.precio)
+        self.valor_total += producto.cantidad * producto.precio - cantidad * precio
+        self.unidades += producto.cantidad - cantidad
+        if producto.cantidad != cantidad:
+            # La entrada anterior queda obsoleta y se ignora al consultar
+            heapq.heappush(self._monticulo, (producto.cantidad, producto.id))
+            self._compactar_si_hace_falta()
+
+    def _compactar_si_hace_falta(self):
+        """Reconstruye el montículo cuando las entradas viejas superan a las vigentes."""
+        if len(self._monticulo) > 2 * len(self._valores) + 16:
+            self._monticulo = [(cantidad, id_p) for id_p, (cantidad, _) in self._valores.items()]
+            heapq.heapify(self._monticulo)
+
+    def bajo_stock(self, umbral):
+        """
+        IDs con cantidad <= umbral, de menor a mayor cantidad.
+        Solo se visitan los nodos del montículo que cumplen el umbral.
+        """
+        encontrados = set()
+        pendientes = [0] if self._monticulo else []
+        while pendientes:
+            i = pendientes.pop()
+            cantidad, id_p = self._monticulo[i]
+            if cantidad > umbral:
+                continue  # Ningún descendiente puede cumplir el umbral
+            valores = self._valores.get(id_p)
+            if valores is not None and valores[0] == cantidad:
+                encontrados.add(id_p)
+            for hijo in (2 * i + 1, 2 * i + 2):
+                if hijo < len(self._monticulo):
+                    pendientes.append(hijo)
+        return sorted(encontrados, key=lambda id_p: self._valores[id_p][0])
+
+
 # ==============================================================================
 # CLASE INVENTARIO
 # ==============================================================================
@@ -83,63 +181,252 @@ class Inventario:
     Gestiona la colección de productos.
     Utiliza un diccionario para acceso rápido por ID (O(1)).
     Maneja la persistencia de datos en archivos JSON.
+    El formato lo decide 'almacenamiento' (por defecto JSON Lines, que migra
+    automáticamente los archivos guardados con el arreglo JSON original).
+
+    Con guardado_diferido=True, guardar() solo marca el inventario como
+    modificado y un hilo en segundo plano escribe el archivo como mucho cada
+    'intervalo_ms' milisegundos o tras 'max_cambios' cambios. flush() escribe
+    de inmediato los cambios pendientes y se ejecuta también al terminar el
+    programa; cerrar() guarda, detiene el hilo y anula ese flush de salida.
+
+    Las operaciones devuelven un Resultado y emiten sus mensajes a 'sumidero'
+    (consola por defecto; SumideroNulo para cargas masivas silenciosas).
     """
 
-    def __init__(self, archivo_guardado="inventario.json"):
+    def __init__(self, archivo_guardado="inventario.json", almacenamiento=None,
+                 guardado_diferido=False, intervalo_ms=500, max_cambios=100, sumidero=None):
         self.archivo_guardado = archivo_guardado
+        self.sumidero = sumidero or CONSOLA
+        self.almacenamiento = almacenamiento or AlmacenamientoJSONLines(archivo_guardado)
         # Usamos un DICCIONARIO donde la clave es el ID del producto.
         # Esto optimiza la búsqueda, eliminación y actualización a O(1).
         self.productos = {}
+        # Índice de n-gramas para buscar por nombre sin recorrer todo el diccionario
+        self._indice_nombres = IndiceNombres()
+        # Valor total, unidades y stock bajo, actualizados con cada cambio
+        self._totales = TotalesInventario()
+        # Estado del group commit (ver lote())
+        self._profundidad_lote = 0
+        self._guardado_pendiente = False
+        # Estado del guardado diferido (ver _bucle_guardado())
+        self.guardado_diferido = guardado_diferido
+        self.intervalo_ms = intervalo_ms
+        self.max_cambios = max_cambios
+        self._condicion = threading.Condition()
+        self._candado_escritura = threading.Lock()
+        self._cambios_sin_guardar = 0
+        self._primer_cambio = None
+        self._cerrando = False
+        self._hilo_guardado = None
         self.cargar()
+        if guardado_diferido:
+            self._hilo_guardado = threading.Thread(target=self._bucle_guardado, daemon=True)
+            self._hilo_guardado.start()
+            atexit.register(self.flush)
 
     def cargar(self):
-        """Lee el archivo JSON y reconstruye el inventario en memoria."""
-        if os.path.exists(self.archivo_guardado):
-            try:
-                with open(self.archivo_guardado, "r", encoding="utf-8") as f:
-                    datos = json.load(f)
-                    # Convertimos cada diccionario de la lista en un objeto Producto
-                    for item in datos:
-                        producto = Producto.from_dict(item)
-                        self.productos[producto.id] = producto
-                print(f"Inventario cargado exitosamente desde {self.archivo_guardado}.")
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Error al cargar el archivo: {e}. Iniciando inventario vacío.")
-                self.productos = {}
+        """
+        Lee el archivo y reconstruye el inventario en memoria, registro a registro.
+
+        Returns:
+            Resultado: verdadero si se cargó el archivo o no existía; código
+            "error_carga" si estaba dañado (el inventario queda vacío).
+        """
+        if not self.almacenamiento.existe():
+            return self._emitir(True, "inventario_nuevo", "No se encontró archivo previo. Iniciando inventario nuevo.")
+        try:
+            # Cada diccionario se convierte en Producto en cuanto se lee
+            for item in self.almacenamiento.leer():
+                producto = Producto.from_dict(item)
+                self._indexar(producto)
+            resultado = self._emitir(True, "cargado", f"Inventario cargado exitosamente desde {self.archivo_guardado}.")
+        except (json.JSONDecodeError, KeyError) as e:
+            self.productos = {}
+            self._indice_nombres = IndiceNombres()
+            self._totales = TotalesInventario()
+            return self._emitir(False, "error_carga", f"Error al cargar el archivo: {e}. Iniciando inventario vacío.")
+        if self.almacenamiento.requiere_migracion:
+            self._emitir(True, "migracion", "Migrando el archivo al formato JSON Lines...")
+            self.guardar()
+        return resultado
+
+    def _indexar(self, producto):
+        """Registra el producto en el diccionario, el índice de nombres y los totales."""
+        self.productos[producto.id] = producto
+        self._indice_nombres.agregar(producto.id, producto.nombre)
+        self._totales.agregar(producto)
+        producto._observadores += (self,)
+
+    def _desindexar(self, id_producto):
+        """Quita el producto del diccionario, del índice de nombres y de los totales."""
+        producto = self.productos.pop(id_producto)
+        self._indice_nombres.quitar(id_producto)
+        self._totales.quitar(id_producto)
+        producto._observadores = tuple(
+            observador for observador in producto._observadores if observador is not self
+        )
+        return producto
+
+    def producto_modificado(self, producto, campo):
+        """Lo llaman los setters de Producto para mantener índices y totales."""
+        if self.productos.get(producto.id) is not producto:
+            return
+        if campo == "nombre":
+            self._indice_nombres.actualizar(producto.id, producto.nombre)
         else:
-            print("No se encontró archivo previo. Iniciando inventario nuevo.")
+            self._totales.actualizar(producto)
+
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa varios cambios en una sola escritura durable (group commit).
+        Las llamadas a guardar() dentro del bloque se aplazan hasta salir de él.
+        """
+        self._profundidad_lote += 1
+        try:
+            yield self
+        finally:
+            self._profundidad_lote -= 1
+            if self._profundidad_lote == 0 and self._guardado_pendiente:
+                self.guardar()
 
     def guardar(self):
-        """Serializa el inventario actual y lo escribe en el archivo JSON."""
+        """Serializa el inventario actual y lo escribe en el archivo."""
+        if self._profundidad_lote:
+            self._guardado_pendiente = True
+            return
+        self._guardado_pendiente = False
+        if self.guardado_diferido:
+            self._marcar_cambio()
+            return
+        self._escribir()
+
+    def flush(self):
+        """
+        Escribe ahora mismo los cambios pendientes y no vuelve hasta que están
+        en disco, también si el hilo de guardado ya los estaba escribiendo.
+        Sin cambios pendientes no escribe nada.
+        """
+        self._escribir_pendientes()
+
+    def cerrar(self):
+        """
+        Detiene el hilo de guardado diferido, escribe lo pendiente y quita el
+        flush() registrado para la salida del programa. Después, guardar()
+        vuelve a escribir en el momento.
+        """
+        if self._hilo_guardado is None:
+            return
+        with self._condicion:
+            self._cerrando = True
+            self._condicion.notify()
+        self._hilo_guardado.join()
+        self._hilo_guardado = None
+        atexit.unregister(self.flush)
+        self.guardado_diferido = False
+        self.flush()
+
+    def _escribir(self, mostrar=True):
+        with self._candado_escritura:
+            return self._volcar(mostrar)
+
+    def _escribir_pendientes(self, mostrar=True):
+        """
+        Escribe si hay cambios sin guardar. El contador se pone a cero con el
+        candado de escritura tomado, así que quien lo vea a cero sabe que la
+        escritura que cubre esos cambios ya terminó. Si la escritura falla, los
+        cambios vuelven a contar como pendientes y se reintentan más tarde.
+
+        Returns:
+            bool: False si había cambios y no se pudieron escribir.
+        """
+        with self._candado_escritura:
+            with self._condicion:
+                pendientes = self._cambios_sin_guardar
+                self._cambios_sin_guardar = 0
+            if not pendientes or self._volcar(mostrar):
+                return True
+            with self._condicion:
+                if self._cambios_sin_guardar == 0:
+                    self._primer_cambio = time.monotonic()
+                self._cambios_sin_guardar += pendientes
+            return False
+
+    def _volcar(self, mostrar):
+        """Escribe el inventario (con el candado de escritura tomado). Devuelve si lo consiguió."""
         try:
-            # Convertimos la colección de objetos a una lista de diccionarios
-            lista_datos = [p.to_dict() for p in self.productos.values()]
-            with open(self.archivo_guardado, "w", encoding="utf-8") as f:
-                json.dump(lista_datos, f, indent=4, ensure_ascii=False)
-            print("Inventario guardado correctamente.")
+            # Copia de los valores: el hilo de guardado no debe recorrer el
+            # diccionario mientras el programa principal lo modifica
+            productos = list(self.productos.values())
+            # Los diccionarios se generan uno a uno mientras se escriben
+            self.almacenamiento.escribir(p.to_dict() for p in productos)
         except IOError as e:
-            print(f"Error al guardar el archivo: {e}")
+            self._emitir(False, "error_guardado", f"Error al guardar el archivo: {e}")
+            return False
+        except Exception as e:
+            # Cualquier otro fallo se informa igual: el hilo de guardado debe seguir vivo
+            self._emitir(False, "error_guardado", f"Error inesperado al guardar el archivo: {e!r}")
+            return False
+        if mostrar:
+            self._emitir(True, "guardado", "Inventario guardado correctamente.")
+        return True
+
+    def _emitir(self, ok, codigo, mensaje, producto=None):
+        resultado = Resultado(ok, codigo, mensaje, producto)
+        self.sumidero.emitir(resultado)
+        return resultado
+
+    def _marcar_cambio(self):
+        """Anota un cambio pendiente y despierta al hilo de guardado."""
+        with self._condicion:
+            if self._cambios_sin_guardar == 0:
+                self._primer_cambio = time.monotonic()
+            self._cambios_sin_guardar += 1
+            self._condicion.notify()
+
+    def _bucle_guardado(self):
+        """
+        Hilo de guardado diferido: espera al primer cambio y escribe cuando
+        pasa 'intervalo_ms' desde él o se acumulan 'max_cambios' cambios.
+        """
+        while True:
+            with self._condicion:
+                while not self._cambios_sin_guardar and not self._cerrando:
+                    self._condicion.wait()
+                if self._cerrando:
+                    return  # cerrar() escribe lo pendiente
+                limite = self._primer_cambio + self.intervalo_ms / 1000
+                while 0 < self._cambios_sin_guardar < self.max_cambios and not self._cerrando:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+                if self._cerrando:
+                    return
+            # El contador se consulta y se pone a cero dentro, con el candado de
+            # escritura: si un flush() se adelantó, aquí no queda nada que escribir
+            if not self._escribir_pendientes(mostrar=False):
+                # Falló: se reintenta pasado el intervalo (o al cerrar)
+                with self._condicion:
+                    self._condicion.wait_for(lambda: self._cerrando, self.intervalo_ms / 1000)
 
     def agregar_producto(self, producto):
         """Añade un nuevo producto si el ID no existe."""
         if producto.id in self.productos:
-            print(f"Error: El producto con ID {producto.id} ya existe.")
-            return False
-        self.productos[producto.id] = producto
+            return self._emitir(False, "id_duplicado", f"Error: El producto con ID {producto.id} ya existe.")
+        self._indexar(producto)
         self.guardar()
-        print(f"Producto '{producto.nombre}' añadido correctamente.")
-        return True
+        return self._emitir(True, "ok", f"Producto '{producto.nombre}' añadido correctamente.", producto)
 
     def eliminar_producto(self, id_producto):
         """Elimina un producto por su ID único."""
         if id_producto in self.productos:
-            eliminado = self.productos.pop(id_producto)
+            eliminado = self._desindexar(id_producto)
             self.guardar()
-            print(f"Producto '{eliminado.nombre}' eliminado.")
-            return True
+            return self._emitir(True, "ok", f"Producto '{eliminado.nombre}' eliminado.", eliminado)
         else:
-            print(f"Error: No se encontró el producto con ID {id_producto}.")
-            return False
+            return self._emitir(False, "no_encontrado", f"Error: No se encontró el producto con ID {id_producto}.")
 
     def actualizar_producto(self, id_producto, cantidad=None, precio=None):
         """Actualiza cantidad o precio de un producto existente."""
@@ -150,26 +437,194 @@ class Inventario:
             if precio is not None:
                 prod.precio = precio
             self.guardar()
-            print(f"Producto '{prod.nombre}' actualizado.")
-            return True
+            return self._emitir(True, "ok", f"Producto '{prod.nombre}' actualizado.", prod)
         else:
-            print(f"Error: No se encontró el producto con ID {id_producto}.")
-            return False
+            return self._emitir(False, "no_encontrado", f"Error: No se encontró el producto con ID {id_producto}.")
+
+    # --------------------------------------------------------------------------
+    # Operaciones masivas: se validan todas las filas, se aplican las válidas
+    # de una vez y se guarda el archivo una sola vez.
+    # Cada método devuelve (cantidad_aplicada, errores), donde errores es una
+    # lista de tuplas (número_de_fila, mensaje).
+    # --------------------------------------------------------------------------
+    def agregar_muchos(self, filas, todo_o_nada=False, convertir=None):
+        """
+        Añade muchos productos. Cada fila puede ser un Producto o un diccionario
+        con las claves de to_dict(); 'convertir' se aplica antes a cada fila.
+        Con todo_o_nada=True, si alguna fila es inválida no se aplica ninguna.
+        """
+        validos = []
+        ids_lote = set()
+        errores = []
+        for num, fila in enumerate(filas, start=1):
+            try:
+                if convertir is not None:
+                    fila = convertir(fila)
+                producto = fila if isinstance(fila, Producto) else Producto.from_dict(fila)
+            except KeyError as e:
+                errores.append((num, f"Falta el campo {e}."))
+                continue
+            except (ValueError, TypeError) as e:
+                errores.append((num, str(e)))
+                continue
+
+            if producto.id in self.productos or producto.id in ids_lote:
+                errores.append((num, f"El producto con ID {producto.id} ya existe."))
+                continue
+            ids_lote.add(producto.id)
+            validos.append(producto)
+
+        return self._aplicar_lote(validos, errores, todo_o_nada, self._indexar, "añadido(s)")
+
+    def actualizar_muchos(self, filas, todo_o_nada=False):
+        """
+        Actualiza muchos productos. Cada fila es un diccionario con "id" y,
+        opcionalmente, "cantidad" y/o "precio".
+        """
+        validos = []
+        errores = []
+        for num, fila in enumerate(filas, start=1):
+            try:
+                id_producto = fila["id"]
+            except (KeyError, TypeError):
+                errores.append((num, "Falta el campo 'id'."))
+                continue
+            if id_producto not in self.productos:
+                errores.append((num, f"No se encontró el producto con ID {id_producto}."))
+                continue
+
+            prod = self.productos[id_producto]
+            cantidad = fila.get("cantidad")
+            precio = fila.get("precio")
+            try:
+                # Se validan los valores con los mismos setters, sin tocar el original
+                Producto(id_producto, prod.nombre,
+                         prod.cantidad if cantidad is None else cantidad,
+                         prod.precio if precio is None else precio)
+            except (ValueError, TypeError) as e:
+                errores.append((num, str(e)))
+                continue
+            validos.append((prod, cantidad, precio))
+
+        def aplicar(cambio):
+            prod, cantidad, precio = cambio
+            if cantidad is not None:
+                prod.cantidad = cantidad
+            if precio is not None:
+                prod.precio = precio
+
+        return self._aplicar_lote(validos, errores, todo_o_nada, aplicar, "actualizado(s)")
+
+    def eliminar_muchos(self, ids, todo_o_nada=False):
+        """Elimina muchos productos a partir de sus IDs."""
+        validos = []
+        ids_lote = set()
+        errores = []
+        for num, id_producto in enumerate(ids, start=1):
+            if id_producto not in self.productos or id_producto in ids_lote:
+                errores.append((num, f"No se encontró el producto con ID {id_producto}."))
+                continue
+            ids_lote.add(id_producto)
+            validos.append(id_producto)
+
+        return self._aplicar_lote(validos, errores, todo_o_nada, self._desindexar, "eliminado(s)")
+
+    def _aplicar_lote(self, validos, errores, todo_o_nada, aplicar, accion):
+        """Aplica las operaciones ya validadas y persiste una sola vez."""
+        if errores and todo_o_nada:
+            self._emitir(
+                False, "lote_rechazado",
+                f"Lote rechazado: {len(errores)} fila(s) con errores. No se aplicó ningún cambio."
+            )
+            return 0, errores
+
+        for operacion in validos:
+            aplicar(operacion)
+        if validos:
+            self.guardar()
+        self._emitir(True, "ok", f"{len(validos)} producto(s) {accion}. {len(errores)} fila(s) rechazada(s).")
+        return len(validos), errores
+
+    def importar(self, ruta, formato="csv", todo_o_nada=False):
+        """Añade los productos de un archivo CSV o JSON Lines mediante agregar_muchos."""
+        with open(ruta, "r", encoding="utf-8", newline="") as f:
+            if formato == "csv":
+                return self.agregar_muchos(csv.DictReader(f), todo_o_nada, convertir=_fila_csv_a_dict)
+            elif formato == "jsonl":
+                filas = (linea for linea in f if linea.strip())
+                return self.agregar_muchos(filas, todo_o_nada, convertir=json.loads)
+            else:
+                raise ValueError(f"Formato no soportado: {formato}")
+
+    def exportar(self, ruta, formato="csv"):
+        """
+        Exporta el inventario a CSV o JSON Lines escribiendo producto a producto,
+        sin construir antes la lista completa de diccionarios.
+
+        Returns:
+            Resultado: verdadero si se exportó; código "error_exportacion" si falló la escritura.
+        """
+        if formato not in ("csv", "jsonl"):
+            raise ValueError(f"Formato no soportado: {formato}")
+        try:
+            if formato == "csv":
+                with open(ruta, "w", encoding="utf-8", newline="") as f:
+                    escritor = csv.writer(f)
+                    escritor.writerow(["id", "nombre", "cantidad", "precio"])
+                    for p in self.productos.values():
+                        escritor.writerow([p.id, p.nombre, p.cantidad, p.precio])
+            else:
+                AlmacenamientoJSONLines(ruta).escribir(p.to_dict() for p in self.productos.values())
+            return self._emitir(True, "exportado", f"Inventario exportado a {ruta}.")
+        except IOError as e:
+            return self._emitir(False, "error_exportacion", f"Error al exportar el archivo: {e}")
 
     def buscar_por_nombre(self, nombre_busqueda):
         """
         Busca productos por nombre.
-        Utiliza una LISTA por comprensión para filtrar los valores del diccionario.
+        Consulta el índice de n-gramas en lugar de recorrer todo el diccionario.
         La búsqueda es insensible a mayúsculas/minúsculas.
         """
-        resultados = [p for p in self.productos.values() if nombre_busqueda.lower() in p.nombre.lower()]
-        return resultados
+        return [self.productos[id_p] for id_p in self._indice_nombres.buscar(nombre_busqueda)]
+
+    def buscar_por_prefijo(self, prefijo):
+        """Busca productos cuyo nombre empieza por el prefijo (insensible a mayúsculas)."""
+        return [self.productos[id_p] for id_p in self._indice_nombres.buscar(prefijo, prefijo=True)]
+
+    # --------------------------------------------------------------------------
+    # Consultas agregadas: O(1), salvo el stock bajo (proporcional al resultado)
+    # --------------------------------------------------------------------------
+    def valor_total(self):
+        """Suma de cantidad x precio de todos los productos."""
+        return self._totales.valor_total
+
+    def unidades_totales(self):
+        """Suma de las cantidades de todos los productos."""
+        return self._totales.unidades
+
+    def total_productos(self):
+        """Número de productos distintos en el inventario."""
+        return len(self.productos)
+
+    def productos_bajo_stock(self, umbral):
+        """Productos con cantidad <= umbral, de menor a mayor cantidad."""
+        return [self.productos[id_p] for id_p in self._totales.bajo_stock(umbral)]
 
     def mostrar_todos(self):
         """Retorna una lista con todos los productos actuales."""
         return list(self.productos.values())
 
 
+def _fila_csv_a_dict(fila):
+    """Convierte una fila de texto de un CSV al formato de Producto.to_dict()."""
+    return {
+        "id": int(fila["id"]),
+        "nombre": fila["nombre"],
+        "cantidad": int(fila["cantidad"]),
+        "precio": float(fila["precio"])
+    }
+
+
 # ==============================================================================
 # INTERFAZ DE USUARIO (MAIN)
 # ==============================================================================
@@ -203,7 +658,9 @@ def obtener_float(mensaje):
 
 
 def main():
-    sistema = Inventario()
+    # El guardado se hace en segundo plano para que el menú responda igual
+    # de rápido aunque el inventario sea muy grande
+    sistema = Inventario(guardado_diferido=True)
 
     while True:
         opcion = mostrar_menu()
@@ -262,7 +719,7 @@ def main():
 
         elif opcion == "6":  # Salir
             print("Guardando cambios antes de salir...")
-            sistema.guardar()
+            sistema.cerrar()
             print("¡Hasta luego!")
             break
 
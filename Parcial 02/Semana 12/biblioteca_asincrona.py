@@ -0,0 +1,220 @@
+"""
+Servicio asíncrono de circulación para la Biblioteca Digital
+------------------------------------------------------------
+Fachada asyncio sobre Biblioteca: préstamos, devoluciones, reservas y búsquedas como
+corrutinas que devuelven resultados estructurados (diccionarios) en lugar
+de imprimir. Todo lo que puede esperar (las búsquedas, y los préstamos,
+devoluciones y reservas cuando toman candados o escriben en la base de
+datos) se ejecuta en un pool de hilos para que el bucle de eventos nunca
+se quede bloqueado.
+
+Incluye un servidor local (JSON Lines sobre TCP) y un cliente de prueba de
+carga que lo ataca desde muchas conexiones simultáneas.
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sistema_gestion_biblioteca_digital import Biblioteca, Libro, SumideroNulo
+
+
+def libro_a_dict(libro):
+    """Convierte un Libro en un diccionario serializable."""
+    return {"isbn": libro.isbn, "titulo": libro.titulo, "autor": libro.autor, "categoria": libro.categoria}
+
+
+class BibliotecaAsincrona:
+    """
+    Fachada asyncio sobre una Biblioteca.
+
+    Las búsquedas se envían al ejecutor. Los préstamos, devoluciones y
+    reservas también, si la biblioteca usa candados (concurrente) o base de
+    datos: esperar un candado o el disco bloquearía el bucle. Solo en memoria
+    y sin candados son O(1) y se resuelven directamente en el bucle.
+    """
+
+    def __init__(self, biblioteca=None, max_hilos=4):
+        """
+        Args:
+            biblioteca (Biblioteca): Biblioteca a servir. Debe ser concurrente,
+                porque las búsquedas se ejecutan en otros hilos.
+            max_hilos (int): Tamaño del pool de hilos.
+        """
+        self.biblioteca = biblioteca or Biblioteca(concurrente=True)
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="biblioteca")
+        self._circulacion_en_ejecutor = (self.biblioteca._candados_isbn is not None
+                                         or self.biblioteca._conexion is not None)
+
+    async def prestar_libro(self, isbn, id_usuario, dias=None):
+        # El vencimiento lo devuelve _prestar: leerlo después del registro
+        # ya sin el candado podría encontrarlo devuelto por otro hilo
+        codigo, _, _, vencimiento = await self._circulacion(self.biblioteca._prestar, isbn, id_usuario, dias)
+        resultado = {"ok": codigo == "ok", "codigo": codigo, "isbn": isbn, "id_usuario": id_usuario}
+        if codigo == "ok":
+            resultado["vence"] = vencimiento.isoformat()
+        return resultado
+
+    async def devolver_libro(self, isbn, id_usuario):
+        codigo, _, siguiente = await self._circulacion(self.biblioteca._devolver, isbn, id_usuario)
+        return {
+            "ok": codigo == "ok",
+            "codigo": codigo,
+            "isbn": isbn,
+            "id_usuario": id_usuario,
+            # Usuario que recibió el libro por tener la primera reserva
+            "entregado_a": siguiente.id_usuario if siguiente is not None else None,
+        }
+
+    async def reservar_libro(self, isbn, id_usuario):
+        codigo, _, _, posicion = await self._circulacion(self.biblioteca._reservar, isbn, id_usuario)
+        return {"ok": codigo == "ok", "codigo": codigo, "isbn": isbn, "id_usuario": id_usuario,
+                "posicion": posicion}
+
+    async def disponible(self, isbn):
+        # Sin candados de ISBN, pero con base de datos lee las tablas con el candado de la conexión
+        if self.biblioteca._conexion is not None:
+            return await self._en_ejecutor(self._disponible, isbn)
+        return self._disponible(isbn)
+
+    def _disponible(self, isbn):
+        existe = isbn in self.biblioteca.catalogo_libros
+        return {
+            "ok": existe,
+            "codigo": "ok" if existe else "libro_no_encontrado",
+            "isbn": isbn,
+            "disponible": existe and isbn not in self.biblioteca.prestamos_activos,
+        }
+
+    async def buscar_libros(self, criterio, tipo="titulo"):
+        libros = await self._en_ejecutor(self.biblioteca.buscar_libros, criterio, tipo)
+        return {"ok": True, "codigo": "ok", "libros": [libro_a_dict(libro) for libro in libros]}
+
+    async def buscar_texto(self, consulta, k=10, cursor=None):
+        resultados, siguiente = await self._en_ejecutor(self.biblioteca.buscar_texto, consulta, k, cursor)
+        return {
+            "ok": True,
+            "codigo": "ok",
+            "libros": [dict(libro_a_dict(libro), puntuacion=puntuacion) for libro, puntuacion in resultados],
+            "cursor": list(siguiente) if siguiente else None,
+        }
+
+    async def _en_ejecutor(self, funcion, *args):
+        bucle = asyncio.get_running_loop()
+        return await bucle.run_in_executor(self._ejecutor, funcion, *args)
+
+    async def _circulacion(self, funcion, *args):
+        """Préstamo, devolución o reserva: en el ejecutor si puede esperar, si no en el bucle."""
+        if self._circulacion_en_ejecutor:
+            return await self._en_ejecutor(funcion, *args)
+        return funcion(*args)
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=True)
+
+    # --- Servidor (JSON Lines sobre TCP) ---
+
+    async def _atender(self, lector, escritor):
+        """Atiende una conexión: una petición JSON por línea, una respuesta por línea."""
+        operaciones = {
+            "prestar": lambda p: self.prestar_libro(p["isbn"], p["id_usuario"], p.get("dias")),
+            "devolver": lambda p: self.devolver_libro(p["isbn"], p["id_usuario"]),
+            "reservar": lambda p: self.reservar_libro(p["isbn"], p["id_usuario"]),
+            "disponible": lambda p: self.disponible(p["isbn"]),
+            "buscar": lambda p: self.buscar_libros(p["criterio"], p.get("tipo", "titulo")),
+            "buscar_texto": lambda p: self.buscar_texto(
+                p["consulta"], p.get("k", 10), tuple(p["cursor"]) if p.get("cursor") else None
+            ),
+        }
+        try:
+            while True:
+                try:
+                    linea = await lector.readline()
+                    if not linea:
+                        break
+                    peticion = json.loads(linea)
+                    respuesta = await operaciones[peticion["op"]](peticion)
+                except (ValueError, KeyError, TypeError) as e:
+                    # ValueError: JSON mal formado, bytes que no son UTF-8
+                    # (UnicodeDecodeError) o línea más larga que el límite del lector
+                    respuesta = {"ok": False, "codigo": "peticion_invalida", "error": str(e)}
+                escritor.write(json.dumps(respuesta, ensure_ascii=False).encode("utf-8") + b"\n")
+                await escritor.drain()
+        except ConnectionResetError:
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host="127.0.0.1", puerto=8765):
+        """Arranca el servidor y devuelve el objeto asyncio.Server."""
+        return await asyncio.start_server(self._atender, host, puerto)
+
+
+# ==========================================
+# CLIENTE DE PRUEBA DE CARGA
+# ==========================================
+async def cliente_carga(host, puerto, peticiones, num_libros, num_usuarios, latencias, semilla):
+    """Un cliente: abre una conexión y lanza peticiones mezcladas midiendo la latencia."""
+    azar = random.Random(semilla)
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        for _ in range(peticiones):
+            isbn = f"ISBN-{azar.randrange(num_libros)}"
+            eleccion = azar.random()
+            if eleccion < 0.6:
+                peticion = {"op": "disponible", "isbn": isbn}
+            elif eleccion < 0.8:
+                peticion = {"op": "prestar", "isbn": isbn, "id_usuario": azar.randrange(num_usuarios)}
+            elif eleccion < 0.95:
+                peticion = {"op": "devolver", "isbn": isbn, "id_usuario": azar.randrange(num_usuarios)}
+            else:
+                peticion = {"op": "buscar_texto", "consulta": f"autor {azar.randrange(50)}", "k": 5}
+
+            inicio = time.perf_counter()
+            escritor.write(json.dumps(peticion).encode("utf-8") + b"\n")
+            await escritor.drain()
+            await lector.readline()
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+
+
+async def prueba_carga(num_clientes=200, peticiones=50, num_libros=5000, num_usuarios=1000):
+    """Levanta el servidor en la interfaz local y lo ataca con muchos clientes a la vez."""
+    # Sumidero nulo para no inundar la consola con los mensajes de alta
+    biblioteca = Biblioteca(concurrente=True, sumidero=SumideroNulo())
+    for i in range(num_libros):
+        biblioteca.añadir_libro(Libro(f"Libro {i}", f"Autor {i % 50}", "Prueba", f"ISBN-{i}"))
+    for i in range(num_usuarios):
+        biblioteca.registrar_usuario(f"Usuario {i}", i)
+
+    fachada = BibliotecaAsincrona(biblioteca)
+    servidor = await fachada.servir(puerto=0)  # Puerto libre elegido por el sistema
+    host, puerto = servidor.sockets[0].getsockname()[:2]
+
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        cliente_carga(host, puerto, peticiones, num_libros, num_usuarios, latencias, i)
+        for i in range(num_clientes)
+    ))
+    duracion = time.perf_counter() - inicio
+
+    servidor.close()
+    await servidor.wait_closed()
+    fachada.cerrar()
+
+    latencias.sort()
+    total = len(latencias)
+    print(f"\n{num_clientes} clientes x {peticiones} peticiones = {total} peticiones en {duracion:.2f} s")
+    print(f"Rendimiento: {total / duracion:,.0f} peticiones/s")
+    print(f"Latencia p50: {statistics.median(latencias) * 1000:.2f} ms | "
+          f"p99: {latencias[int(total * 0.99) - 1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(prueba_carga())
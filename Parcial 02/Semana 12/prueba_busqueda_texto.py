@@ -0,0 +1,117 @@
+import itertools
+import random
+import statistics
+import time
+
+from sistema_gestion_biblioteca_digital import Libro, MotorBusqueda
+
+# -------------------------------
+# Prueba de rendimiento: percentiles de latencia de la búsqueda de texto
+# completo (BM25, top-k con cursor) sobre un catálogo generado de 1 millón
+# de libros. Se usa el MotorBusqueda que hay detrás de
+# Biblioteca.buscar_texto: la Biblioteca completa añade además los índices
+# de n-gramas de buscar_libros, que no caben en memoria con este tamaño.
+# -------------------------------
+NUM_LIBROS = 1_000_000
+NUM_CONSULTAS = 1000
+K = 10
+PAGINAS = 3
+PALABRAS_VACIAS = ("el", "la", "de", "los", "las", "del", "y", "en")
+SILABAS = ("ca", "sa", "mi", "lo", "ra", "te", "no", "pe", "dra", "mon", "sol", "ver", "cas", "tri", "go", "ña")
+CATEGORIAS = ("Novela", "Poesía", "Ciencia", "Historia", "Ensayo", "Infantil", "Teatro", "Biografía")
+
+
+def crear_vocabulario(azar, cantidad):
+    palabras = set()
+    while len(palabras) < cantidad:
+        palabras.add("".join(azar.choices(SILABAS, k=azar.randint(2, 4))))
+    return sorted(palabras)
+
+
+def crear_motor(azar, vocabulario, autores):
+    """Catálogo sintético: palabras con popularidad tipo Zipf y palabras vacías frecuentes."""
+    # Pesos acumulados calculados una vez: choices() no los recalcula en cada libro
+    acumulados = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocabulario))))
+    motor = MotorBusqueda()
+    inicio = time.perf_counter()
+    for i in range(NUM_LIBROS):
+        palabras = azar.choices(vocabulario, cum_weights=acumulados, k=azar.randint(1, 4))
+        if azar.random() < 0.6:
+            palabras.insert(azar.randrange(len(palabras)), azar.choice(PALABRAS_VACIAS))
+        libro = Libro(" ".join(palabras).capitalize(), azar.choice(autores), azar.choice(CATEGORIAS), f"ISBN-{i}")
+        motor.agregar(libro.isbn, libro)
+    print(f"Índice de {NUM_LIBROS:,} libros construido en {time.perf_counter() - inicio:.1f} s "
+          f"({len(motor._postings):,} términos)")
+    return motor
+
+
+def crear_consultas(azar, vocabulario, autores):
+    """Mezcla de consultas amplias (palabras vacías, categorías), medias y raras."""
+    consultas = []
+    for _ in range(NUM_CONSULTAS):
+        tipo = azar.random()
+        if tipo < 0.2:
+            consultas.append(f"{azar.choice(PALABRAS_VACIAS)} {azar.choice(vocabulario[:50])}")
+        elif tipo < 0.3:
+            consultas.append(f"{azar.choice(CATEGORIAS).lower()} {azar.choice(vocabulario[:200])}")
+        elif tipo < 0.4:
+            consultas.append(azar.choice(autores).split()[-1])
+        else:
+            consultas.append(" ".join(azar.choices(vocabulario, k=azar.randint(1, 3))))
+    return consultas
+
+
+def percentiles(tiempos):
+    cortes = statistics.quantiles(tiempos, n=100)
+    return f"p50 {cortes[49] * 1e3:7.2f} ms | p95 {cortes[94] * 1e3:7.2f} ms | p99 {cortes[98] * 1e3:7.2f} ms"
+
+
+def medir(motor, consultas):
+    """Latencia de las PAGINAS primeras páginas de cada consulta."""
+    por_pagina = [[] for _ in range(PAGINAS)]
+    for consulta in consultas:
+        cursor = None
+        for pagina in range(PAGINAS):
+            inicio = time.perf_counter()
+            resultados, cursor = motor.buscar(consulta, K, cursor)
+            por_pagina[pagina].append(time.perf_counter() - inicio)
+            assert len(resultados) <= K
+            if cursor is None:
+                break
+    for pagina, tiempos in enumerate(por_pagina, start=1):
+        if len(tiempos) > 1:
+            print(f"Página {pagina} ({len(tiempos):>4} consultas): {percentiles(tiempos)}")
+
+
+def puntuar_todo(motor, consulta):
+    """Referencia: la puntuación de todos los documentos que contienen algún término."""
+    terminos = motor._terminos(consulta)
+    longitud_media = motor._longitud_total / len(motor._longitudes)
+    candidatos = set().union(*(documentos for _, _, documentos in terminos))
+    return {isbn: motor._puntuacion(isbn, terminos, longitud_media) for isbn in candidatos}
+
+
+def comparar_con_todo(motor):
+    """Para las consultas más amplias, el top-k debe coincidir con ordenar todas las puntuaciones."""
+    for consulta in ("el", "la novela", "de historia"):
+        inicio = time.perf_counter()
+        puntuaciones = puntuar_todo(motor, consulta)
+        esperado = sorted(puntuaciones, key=lambda isbn: (-puntuaciones[isbn], isbn))[:K]
+        completo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        resultados, _ = motor.buscar(consulta, K)
+        top_k = time.perf_counter() - inicio
+        assert [isbn for isbn, _ in resultados] == esperado, consulta
+        print(f"'{consulta}': {len(puntuaciones):,} coincidencias | top-{K} {top_k * 1e3:.0f} ms guardando "
+              f"{K + 1} candidatos | puntuar y ordenar todas {completo * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    azar = random.Random(2024)
+    vocabulario = crear_vocabulario(azar, 20_000)
+    autores = [f"{azar.choice(vocabulario).capitalize()} {azar.choice(vocabulario).capitalize()}"
+               for _ in range(5000)]
+    motor = crear_motor(azar, vocabulario, autores)
+    medir(motor, crear_consultas(azar, vocabulario, autores))
+    comparar_con_todo(motor)
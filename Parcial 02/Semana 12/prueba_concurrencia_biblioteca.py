@@ -0,0 +1,175 @@
+import contextlib
+import io
+import random
+import threading
+import time
+
+from sistema_gestion_biblioteca_digital import Biblioteca, Libro, SumideroNulo
+
+# -------------------------------
+# Prueba de estrés: varios mostradores (hilos) prestando y devolviendo
+# libros sobre una misma Biblioteca en modo concurrente.
+# -------------------------------
+NUM_LIBROS = 200
+NUM_USUARIOS = 50
+OPERACIONES_POR_HILO = 5000
+
+
+def crear_biblioteca():
+    """Crea una biblioteca concurrente con libros y usuarios de prueba."""
+    # Sumidero nulo: sin mensajes por consola, se mide solo el trabajo
+    biblioteca = Biblioteca(concurrente=True, sumidero=SumideroNulo())
+    for i in range(NUM_LIBROS):
+        biblioteca.añadir_libro(Libro(f"Libro {i}", f"Autor {i % 20}", "Prueba", f"ISBN-{i}"))
+    for i in range(NUM_USUARIOS):
+        biblioteca.registrar_usuario(f"Usuario {i}", i)
+    return biblioteca
+
+
+# Función que simula un mostrador de préstamos para un hilo
+def mostrador(biblioteca, identificador, saldos):
+    azar = random.Random(identificador)
+    saldo = {}  # ISBN -> préstamos exitosos - devoluciones exitosas de este hilo
+    for _ in range(OPERACIONES_POR_HILO):
+        isbn = f"ISBN-{azar.randrange(NUM_LIBROS)}"
+        if azar.random() < 0.5:
+            if biblioteca.prestar_libro(isbn, azar.randrange(NUM_USUARIOS)):
+                saldo[isbn] = saldo.get(isbn, 0) + 1
+        else:
+            usuario = biblioteca.quien_tiene(isbn)
+            if usuario is not None and biblioteca.devolver_libro(isbn, usuario.id_usuario):
+                saldo[isbn] = saldo.get(isbn, 0) - 1
+    saldos[identificador] = saldo
+
+
+def comprobar(biblioteca, saldos):
+    """Verifica que ningún libro se prestó dos veces a la vez."""
+    total = {}
+    for saldo in saldos.values():
+        for isbn, valor in saldo.items():
+            total[isbn] = total.get(isbn, 0) + valor
+
+    for isbn, valor in total.items():
+        prestado = 1 if isbn in biblioteca.prestamos_activos else 0
+        assert valor == prestado, f"{isbn}: saldo {valor}, pero prestado={prestado} (¿doble préstamo?)"
+
+    poseedores = {}
+    for usuario in biblioteca.usuarios_registrados.values():
+        for libro in usuario.listar_prestamos():
+            assert libro.isbn not in poseedores, f"{libro.isbn} lo tienen dos usuarios a la vez"
+            poseedores[libro.isbn] = usuario.id_usuario
+    assert poseedores == dict(biblioteca.prestamos_activos), "El índice de préstamos no coincide"
+
+
+def ejecutar(num_hilos):
+    biblioteca = crear_biblioteca()
+    saldos = {}
+    hilos = [threading.Thread(target=mostrador, args=(biblioteca, i, saldos)) for i in range(num_hilos)]
+
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    comprobar(biblioteca, saldos)
+    operaciones = num_hilos * OPERACIONES_POR_HILO
+    print(f"{num_hilos} hilo(s): {operaciones} operaciones en {duracion:.2f} s "
+          f"({operaciones / duracion:,.0f} op/s) - sin dobles préstamos")
+
+
+def catalogo_cambiante(biblioteca, parar, errores):
+    """Da de alta libros nuevos y quita libros (prestados o no) sin parar."""
+    azar = random.Random("catalogo")
+    siguiente = NUM_LIBROS
+    try:
+        while not parar.is_set():
+            biblioteca.añadir_libro(Libro(f"Libro {siguiente}", f"Autor {siguiente % 20}", "Prueba",
+                                          f"ISBN-{siguiente}"))
+            siguiente += 1
+            biblioteca.quitar_libro(f"ISBN-{azar.randrange(siguiente)}")
+    except Exception as e:
+        errores.append(e)
+
+
+def altas_y_bajas(biblioteca, parar, errores):
+    """Da de baja usuarios al azar (tengan o no préstamos) y los vuelve a registrar."""
+    azar = random.Random("usuarios")
+    try:
+        while not parar.is_set():
+            id_usuario = azar.randrange(NUM_USUARIOS)
+            biblioteca.dar_baja_usuario(id_usuario)
+            biblioteca.registrar_usuario(f"Usuario {id_usuario}", id_usuario)
+    except Exception as e:
+        errores.append(e)
+
+
+def buscador(biblioteca, parar, errores):
+    """Busca en los índices mientras el catálogo cambia."""
+    try:
+        while not parar.is_set():
+            biblioteca.buscar_libros("libro 1")
+            biblioteca.buscar_texto("libro autor", k=5)
+            biblioteca.libros_por_autor("Autor 3")
+    except Exception as e:
+        errores.append(e)
+
+
+def mostrador_con_bajas(biblioteca, identificador, errores):
+    """Como mostrador(), pero con usuarios y libros que desaparecen a mitad de camino."""
+    azar = random.Random(identificador)
+    try:
+        for _ in range(OPERACIONES_POR_HILO):
+            isbn = f"ISBN-{azar.randrange(NUM_LIBROS)}"
+            if azar.random() < 0.5:
+                biblioteca.prestar_libro(isbn, azar.randrange(NUM_USUARIOS))
+            else:
+                usuario = biblioteca.quien_tiene(isbn)
+                if usuario is not None:
+                    biblioteca.devolver_libro(isbn, usuario.id_usuario)
+    except Exception as e:
+        errores.append(e)
+
+
+def ejecutar_con_cambios(num_hilos):
+    """
+    Préstamos y devoluciones mientras otros hilos cambian el catálogo, dan de
+    baja usuarios y buscan. Ningún hilo debe fallar y al final cada préstamo
+    debe pertenecer a un usuario registrado que tenga el libro.
+    """
+    biblioteca = crear_biblioteca()
+    # Libros con texto en los índices (desde el principio) para que las búsquedas tengan trabajo
+    biblioteca.buscar_libros("libro")
+    errores = []
+    parar = threading.Event()
+    fondo = [threading.Thread(target=funcion, args=(biblioteca, parar, errores))
+             for funcion in (catalogo_cambiante, altas_y_bajas, buscador)]
+    hilos = [threading.Thread(target=mostrador_con_bajas, args=(biblioteca, i, errores)) for i in range(num_hilos)]
+
+    # Con SumideroNulo ninguna operación (tampoco quitar_libro ni dar_baja_usuario)
+    # debe escribir en la consola
+    with contextlib.redirect_stdout(io.StringIO()) as salida:
+        for hilo in fondo + hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        parar.set()
+        for hilo in fondo:
+            hilo.join()
+
+    assert not errores, f"Errores en los hilos: {errores!r}"
+    assert not salida.getvalue(), f"Salida por consola con SumideroNulo: {salida.getvalue()[:200]!r}"
+    for isbn, id_usuario in dict(biblioteca.prestamos_activos).items():
+        assert id_usuario in biblioteca.ids_registrados, f"{isbn} prestado a {id_usuario}, dado de baja"
+        assert biblioteca.usuarios_registrados[id_usuario].tiene_libro(isbn), f"{isbn} no figura en su usuario"
+    comprobar(biblioteca, {})
+    print(f"{num_hilos} hilo(s) con altas, bajas y búsquedas a la vez: sin errores ni préstamos huérfanos")
+
+
+if __name__ == "__main__":
+    for num_hilos in (1, 2, 4, 8, 16):
+        ejecutar(num_hilos)
+    for num_hilos in (2, 8):
+        ejecutar_con_cambios(num_hilos)
+    print("Programa principal: Todas las pruebas han sido completadas.")
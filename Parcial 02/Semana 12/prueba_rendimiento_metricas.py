@@ -0,0 +1,98 @@
+import asyncio
+import random
+import time
+
+from biblioteca_asincrona import BibliotecaAsincrona
+from sistema_gestion_biblioteca_digital import Biblioteca, Libro, Metricas, SumideroNulo
+
+# -------------------------------
+# Prueba de rendimiento: coste de las métricas por préstamo + devolución.
+# Desactivadas (metricas=None) no deben costar nada: la instancia tiene que
+# usar las funciones de la clase tal cual, sin envoltorio. Se mide además
+# lo que añaden activadas.
+# También se comprueba que se cuentan las operaciones de BibliotecaAsincrona.
+# -------------------------------
+NUM_LIBROS = 10_000
+NUM_USUARIOS = 1_000
+CICLOS = 200_000
+REPETICIONES = 5
+
+
+def crear_biblioteca(metricas=None):
+    biblioteca = Biblioteca(sumidero=SumideroNulo(), metricas=metricas)
+    for i in range(NUM_LIBROS):
+        biblioteca.añadir_libro(Libro(f"Libro {i}", f"Autor {i % 100}", "Prueba", f"ISBN-{i}"))
+    for i in range(NUM_USUARIOS):
+        biblioteca.registrar_usuario(f"Usuario {i}", i)
+    return biblioteca
+
+
+def operaciones():
+    azar = random.Random(1)
+    return [(f"ISBN-{azar.randrange(NUM_LIBROS)}", azar.randrange(NUM_USUARIOS)) for _ in range(CICLOS)]
+
+
+def medir(crear, metodos, pares):
+    """
+    Mejor tiempo por ciclo (préstamo + devolución) de REPETICIONES pasadas, en ns.
+    Cada pasada usa una biblioteca nueva: el historial y el montículo de
+    vencimientos crecen con cada préstamo y falsearían la comparación.
+    """
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        prestar, devolver = metodos(crear())
+        inicio = time.perf_counter()
+        for isbn, id_usuario in pares:
+            prestar(isbn, id_usuario)
+            devolver(isbn, id_usuario)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(pares) * 1e9
+
+
+def comparar(pares):
+    # Desactivadas, la instancia usa los métodos de la clase sin envolver
+    biblioteca = crear_biblioteca()
+    assert not {"_prestar", "_devolver", "_reservar"} & set(vars(biblioteca))
+    assert biblioteca._prestar.__func__ is Biblioteca._prestar
+
+    desactivadas = medir(crear_biblioteca, lambda b: (b._prestar, b._devolver), pares)
+
+    metricas = Metricas()
+    activadas = medir(lambda: crear_biblioteca(metricas), lambda b: (b._prestar, b._devolver), pares)
+    contados = metricas.instantanea()["contadores"]["prestar_libro"]
+    assert sum(contados.values()) == REPETICIONES * CICLOS
+
+    print(f"Préstamo + devolución: {desactivadas:,.0f} ns con métricas desactivadas (sin envoltorio) | "
+          f"{activadas:,.0f} ns activadas "
+          f"(+{activadas - desactivadas:,.0f} ns)")
+
+
+async def operar_asincrono(servicio):
+    await servicio.prestar_libro("ISBN-1", 1)
+    await servicio.reservar_libro("ISBN-1", 2)
+    await servicio.devolver_libro("ISBN-1", 1)
+    await servicio.prestar_libro("ISBN-1", 3)
+
+
+def comprobar_asincrona():
+    """Las operaciones de BibliotecaAsincrona van directas a los métodos internos: también cuentan."""
+    metricas = Metricas()
+    biblioteca = Biblioteca(concurrente=True, sumidero=SumideroNulo(), metricas=metricas)
+    biblioteca.añadir_libro(Libro("Libro 1", "Autor", "Prueba", "ISBN-1"))
+    for i in range(1, 4):
+        biblioteca.registrar_usuario(f"Usuario {i}", i)
+    servicio = BibliotecaAsincrona(biblioteca)
+    try:
+        asyncio.run(operar_asincrono(servicio))
+    finally:
+        servicio.cerrar()
+    contadores = metricas.instantanea()["contadores"]
+    assert contadores["prestar_libro"] == {"ok": 1, "no_disponible": 1}, contadores
+    assert contadores["reservar_libro"] == {"ok": 1}, contadores
+    assert contadores["devolver_libro"] == {"ok": 1}, contadores
+    print("BibliotecaAsincrona: préstamos, reservas y devoluciones contados en las métricas")
+
+
+if __name__ == "__main__":
+    comparar(operaciones())
+    comprobar_asincrona()
@@ -0,0 +1,89 @@
+import random
+import time
+
+from sistema_gestion_biblioteca_digital import Biblioteca, Libro, SumideroNulo
+
+# -------------------------------
+# Prueba de rendimiento: un día sintético de 1 millón de préstamos y
+# devoluciones con 50 mil usuarios. Con el índice ISBN -> usuario cada
+# comprobación de disponibilidad es O(1); como referencia se mide también
+# el recorrido de todos los usuarios que hacía la versión anterior.
+# -------------------------------
+NUM_LIBROS = 200_000
+NUM_USUARIOS = 50_000
+OPERACIONES = 1_000_000
+PRESTAMOS_OBJETIVO = 100_000  # Préstamos vigentes alrededor de los que oscila el día
+COMPROBACIONES_ANTERIORES = 20
+
+
+def crear_biblioteca():
+    biblioteca = Biblioteca(sumidero=SumideroNulo())
+    for i in range(NUM_LIBROS):
+        biblioteca.añadir_libro(Libro(f"Libro {i}", f"Autor {i % 500}", "Prueba", f"ISBN-{i}"))
+    for i in range(NUM_USUARIOS):
+        biblioteca.registrar_usuario(f"Usuario {i}", i)
+    return biblioteca
+
+
+def reproducir_dia(biblioteca):
+    """
+    Préstamos de libros al azar y devoluciones de préstamos vigentes. La
+    probabilidad de devolver crece con los préstamos abiertos, así que el
+    día se estabiliza alrededor de PRESTAMOS_OBJETIVO préstamos vigentes.
+    """
+    azar = random.Random(2024)
+    prestados = []  # (isbn, id_usuario) vigentes, para elegir qué devolver
+    exitos = fallos = 0
+    inicio = time.perf_counter()
+    for _ in range(OPERACIONES):
+        if azar.random() < len(prestados) / (2 * PRESTAMOS_OBJETIVO):
+            # Devolución: se saca un préstamo al azar en O(1) (intercambio con el último)
+            i = azar.randrange(len(prestados))
+            prestados[i], prestados[-1] = prestados[-1], prestados[i]
+            isbn, id_usuario = prestados.pop()
+            assert biblioteca.devolver_libro(isbn, id_usuario)
+            exitos += 1
+        else:
+            isbn = f"ISBN-{azar.randrange(NUM_LIBROS)}"
+            id_usuario = azar.randrange(NUM_USUARIOS)
+            if biblioteca.prestar_libro(isbn, id_usuario):
+                prestados.append((isbn, id_usuario))
+                exitos += 1
+            else:
+                fallos += 1  # Ya estaba prestado
+    duracion = time.perf_counter() - inicio
+    print(f"{OPERACIONES:,} operaciones en {duracion:.2f} s ({OPERACIONES / duracion:,.0f} op/s); "
+          f"{exitos:,} con éxito, {fallos:,} libros ya prestados; {len(prestados):,} préstamos al final")
+
+
+def comprobacion_anterior(biblioteca, isbn):
+    """Disponibilidad como se calculaba antes: recorriendo los préstamos de todos los usuarios."""
+    for usuario in biblioteca.usuarios_registrados.values():
+        for libro in usuario.libros_prestados:
+            if libro.isbn == isbn:
+                return False
+    return True
+
+
+def comparar_comprobaciones(biblioteca):
+    azar = random.Random(7)
+    isbns = [f"ISBN-{azar.randrange(NUM_LIBROS)}" for _ in range(COMPROBACIONES_ANTERIORES)]
+
+    inicio = time.perf_counter()
+    for isbn in isbns:
+        assert comprobacion_anterior(biblioteca, isbn) == (isbn not in biblioteca.prestamos_activos)
+    anterior = (time.perf_counter() - inicio) / len(isbns)
+
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        for isbn in isbns:
+            isbn not in biblioteca.prestamos_activos
+    indice = (time.perf_counter() - inicio) / (1000 * len(isbns))
+    print(f"Disponibilidad: {indice * 1e9:.0f} ns con el índice frente a "
+          f"{anterior * 1e3:.1f} ms recorriendo a los {NUM_USUARIOS:,} usuarios")
+
+
+if __name__ == "__main__":
+    biblioteca = crear_biblioteca()
+    reproducir_dia(biblioteca)
+    comparar_comprobaciones(biblioteca)
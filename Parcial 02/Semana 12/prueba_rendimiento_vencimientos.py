@@ -0,0 +1,83 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from sistema_gestion_biblioteca_digital import Biblioteca, SumideroNulo
+
+# -------------------------------
+# Prueba de rendimiento: "préstamos vencidos ahora mismo" con 5 millones de
+# préstamos activos. Con el montículo de vencimientos el coste depende de
+# cuántos han vencido, no del total; como referencia se mide también el
+# recorrido de todos los préstamos.
+# Los préstamos se abren directamente con _abrir_registro (lo que hace
+# prestar_libro tras sus comprobaciones): un catálogo de 5 millones de
+# libros con sus índices de búsqueda no cabe en memoria, y aquí solo
+# importa el ISBN.
+# -------------------------------
+NUM_PRESTAMOS = 5_000_000
+NUM_USUARIOS = 1_000_000
+DEVOLUCIONES = 1_000_000
+DIAS_APERTURA = 30  # Los préstamos se abren repartidos a lo largo de un mes
+INICIO = datetime(2026, 1, 1)
+
+
+class LibroLigero:
+    """Solo el ISBN, que es lo único que usan los registros de préstamo."""
+
+    __slots__ = ("isbn",)
+
+    def __init__(self, isbn):
+        self.isbn = isbn
+
+
+def abrir_prestamos(biblioteca, ahora):
+    azar = random.Random(5)
+    inicio = time.perf_counter()
+    por_minuto = NUM_PRESTAMOS // (DIAS_APERTURA * 24 * 60) + 1
+    for i in range(NUM_PRESTAMOS):
+        if i % por_minuto == 0:
+            ahora[0] = INICIO + timedelta(minutes=i // por_minuto)
+        biblioteca._abrir_registro(LibroLigero(i), i % NUM_USUARIOS, azar.choice((7, 14, 21, 28)))
+    duracion = time.perf_counter() - inicio
+    print(f"{NUM_PRESTAMOS:,} préstamos abiertos en {duracion:.1f} s "
+          f"({duracion / NUM_PRESTAMOS * 1e6:.2f} µs por préstamo)")
+
+
+def devolver(biblioteca):
+    """Cierra préstamos al azar: sus entradas del montículo se descartan al consultar."""
+    azar = random.Random(6)
+    inicio = time.perf_counter()
+    for isbn in azar.sample(range(NUM_PRESTAMOS), DEVOLUCIONES):
+        biblioteca._cerrar_registro(isbn)
+    duracion = time.perf_counter() - inicio
+    print(f"{DEVOLUCIONES:,} devoluciones en {duracion:.1f} s")
+
+
+def recorrido_completo(biblioteca, ahora):
+    """Referencia: revisar todos los préstamos activos."""
+    return sorted((p for p in biblioteca.registros_prestamo.values() if p.fecha_vencimiento <= ahora),
+                  key=lambda p: p.fecha_vencimiento)
+
+
+def consultar(biblioteca):
+    for desfase in (timedelta(hours=1), timedelta(hours=12), timedelta(days=2)):
+        ahora = INICIO + timedelta(days=7) + desfase
+        inicio = time.perf_counter()
+        vencidos = biblioteca.prestamos_vencidos(ahora)
+        con_monticulo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        esperado = recorrido_completo(biblioteca, ahora)
+        completo = time.perf_counter() - inicio
+        assert {p.libro.isbn for p in vencidos} == {p.libro.isbn for p in esperado}
+        print(f"{len(vencidos):>9,} vencidos de {len(biblioteca.registros_prestamo):,} | montículo "
+              f"{con_monticulo * 1e3:8.2f} ms | recorrido completo {completo * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    ahora = [INICIO]
+    biblioteca = Biblioteca(sumidero=SumideroNulo(), reloj=lambda: ahora[0])
+    abrir_prestamos(biblioteca, ahora)
+    consultar(biblioteca)
+    devolver(biblioteca)
+    consultar(biblioteca)
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+
+from biblioteca_asincrona import BibliotecaAsincrona
+from sistema_gestion_biblioteca_digital import Biblioteca, Libro, SumideroNulo
+
+# -------------------------------
+# Prueba del servidor asíncrono con una biblioteca concurrente y en SQLite:
+# - Un préstamo que espera el candado de su ISBN no bloquea el bucle de
+#   eventos (se ejecuta en el pool de hilos).
+# - El préstamo responde con su vencimiento.
+# - Una línea mal formada (bytes que no son UTF-8, JSON roto, sin "op")
+#   recibe una respuesta de error y la conexión sigue atendiendo.
+# -------------------------------
+RETENCION = 0.3  # Segundos que otro hilo retiene el candado del ISBN
+LATIDO = 0.01
+
+
+def crear_biblioteca(carpeta):
+    biblioteca = Biblioteca(os.path.join(carpeta, "biblioteca.db"), concurrente=True, sumidero=SumideroNulo())
+    for i in range(3):
+        biblioteca.añadir_libro(Libro(f"Libro {i}", "Autor", "Prueba", f"ISBN-{i}"))
+    biblioteca.registrar_usuario("Usuario 1", 1)
+    return biblioteca
+
+
+async def probar_bucle_libre(servicio):
+    latidos = 0
+    candado = servicio.biblioteca._candado_isbn("ISBN-0")
+    tomado = threading.Event()
+
+    def retener():
+        with candado:
+            tomado.set()
+            time.sleep(RETENCION)
+
+    hilo = threading.Thread(target=retener)
+    hilo.start()
+    tomado.wait()
+    prestamo = asyncio.ensure_future(servicio.prestar_libro("ISBN-0", 1))
+    while not prestamo.done():
+        await asyncio.sleep(LATIDO)
+        latidos += 1
+    hilo.join()
+    resultado = prestamo.result()
+    assert resultado["ok"] and "vence" in resultado, resultado
+    # Si el préstamo se hubiera ejecutado en el bucle, no habría ningún latido mientras espera
+    assert latidos >= RETENCION / LATIDO / 3, latidos
+    print(f"Préstamo esperando el candado: el bucle siguió atendiendo ({latidos} latidos)")
+
+
+async def probar_lineas_mal_formadas(servicio):
+    servidor = await servicio.servir(puerto=0)
+    host, puerto = servidor.sockets[0].getsockname()[:2]
+    lector, escritor = await asyncio.open_connection(host, puerto)
+
+    async def enviar(linea):
+        escritor.write(linea + b"\n")
+        await escritor.drain()
+        return json.loads(await lector.readline())
+
+    try:
+        for linea in (b"\xff\xfe{\"op\"", b"{no es json", b"[1, 2]", b'{"isbn": "ISBN-1"}'):
+            respuesta = await enviar(linea)
+            assert respuesta["codigo"] == "peticion_invalida", (linea, respuesta)
+        respuesta = await enviar(json.dumps({"op": "prestar", "isbn": "ISBN-1", "id_usuario": 1}).encode())
+        assert respuesta["ok"] and respuesta["vence"], respuesta
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+        servidor.close()
+        await servidor.wait_closed()
+    print("Líneas mal formadas: respuesta de error y la conexión sigue atendiendo")
+
+
+async def principal(servicio):
+    await probar_bucle_libre(servicio)
+    await probar_lineas_mal_formadas(servicio)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as carpeta:
+        biblioteca = crear_biblioteca(carpeta)
+        servicio = BibliotecaAsincrona(biblioteca)
+        try:
+            asyncio.run(principal(servicio))
+        finally:
+            servicio.cerrar()
+            biblioteca.cerrar()
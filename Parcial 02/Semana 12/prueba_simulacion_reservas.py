@@ -0,0 +1,126 @@
+import heapq
+import itertools
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sistema_gestion_biblioteca_digital import Biblioteca, Libro, SumideroNulo
+
+# -------------------------------
+# Simulación: mostradores pidiendo libros con popularidad Zipf (unos pocos
+# títulos concentran casi todas las peticiones). Se compara el sondeo de
+# antes (reintentar prestar_libro cada hora hasta que el libro quede libre)
+# con las colas de reserva: una sola reserva y el libro pasa solo al
+# siguiente al devolverse. Cada paso de la simulación es una hora.
+# -------------------------------
+NUM_LIBROS = 20_000
+NUM_USUARIOS = 100_000
+HORAS = 30 * 24
+PETICIONES_POR_HORA = 100
+EXPONENTE_ZIPF = 1.1
+DIAS_ESPERA = 7  # Lo que dura una reserva (y lo que insiste un usuario en el sondeo)
+INICIO = datetime(2026, 1, 1)
+
+
+def crear_biblioteca(hora):
+    biblioteca = Biblioteca(sumidero=SumideroNulo(), reloj=lambda: INICIO + timedelta(hours=hora[0]),
+                            dias_reserva=DIAS_ESPERA)
+    for i in range(NUM_LIBROS):
+        biblioteca.añadir_libro(Libro(f"Libro {i}", f"Autor {i % 500}", "Prueba", f"ISBN-{i}"))
+    for i in range(NUM_USUARIOS):
+        biblioteca.registrar_usuario(f"Usuario {i}", i)
+    return biblioteca
+
+
+def peticiones():
+    """Las mismas peticiones (hora, ISBN, usuario, horas que se queda el libro) para los dos modos."""
+    azar = random.Random(2024)
+    acumulados = list(itertools.accumulate(1 / (i + 1) ** EXPONENTE_ZIPF for i in range(NUM_LIBROS)))
+    for hora in range(HORAS):
+        libros = azar.choices(range(NUM_LIBROS), cum_weights=acumulados, k=PETICIONES_POR_HORA)
+        for libro in libros:
+            yield hora, f"ISBN-{libro}", azar.randrange(NUM_USUARIOS), azar.randint(24, 7 * 24)
+
+
+class Simulacion:
+    def __init__(self, con_reservas):
+        self.con_reservas = con_reservas
+        self.hora = [0]
+        self.biblioteca = crear_biblioteca(self.hora)
+        self.llamadas = 0       # Llamadas a la biblioteca (préstamos, reservas, devoluciones)
+        self.esperas = []       # Horas desde la petición hasta tener el libro
+        self.abandonos = 0      # Peticiones que no consiguieron el libro a tiempo
+        self.devoluciones = []  # Montículo (hora, ISBN, usuario)
+        self.pendientes = {}    # (ISBN, usuario) -> (hora de la petición, duración del préstamo)
+
+    def _prestado(self, isbn, id_usuario, hora_peticion, duracion):
+        self.esperas.append(self.hora[0] - hora_peticion)
+        heapq.heappush(self.devoluciones, (self.hora[0] + duracion, isbn, id_usuario))
+
+    def _pedir(self, isbn, id_usuario, duracion):
+        self.llamadas += 1
+        if self.biblioteca.prestar_libro(isbn, id_usuario):
+            self._prestado(isbn, id_usuario, self.hora[0], duracion)
+        elif (isbn, id_usuario) not in self.pendientes:
+            if self.con_reservas:
+                self.llamadas += 1
+                if not self.biblioteca.reservar_libro(isbn, id_usuario):
+                    return  # Ya lo tenía: no hay nada que esperar
+            self.pendientes[(isbn, id_usuario)] = (self.hora[0], duracion)
+
+    def _devolver_vencidos(self):
+        while self.devoluciones and self.devoluciones[0][0] <= self.hora[0]:
+            _, isbn, id_usuario = heapq.heappop(self.devoluciones)
+            self.llamadas += 1
+            assert self.biblioteca.devolver_libro(isbn, id_usuario)
+            if self.con_reservas:
+                # El libro pasa solo al primero de la cola, si queda alguien
+                siguiente = self.biblioteca.quien_tiene(isbn)
+                if siguiente is not None:
+                    hora_peticion, duracion = self.pendientes.pop((isbn, siguiente.id_usuario))
+                    self._prestado(isbn, siguiente.id_usuario, hora_peticion, duracion)
+
+    def _reintentar(self):
+        """Sondeo: cada petición pendiente vuelve a intentar el préstamo."""
+        for (isbn, id_usuario), (hora_peticion, duracion) in list(self.pendientes.items()):
+            self.llamadas += 1
+            if self.biblioteca.prestar_libro(isbn, id_usuario):
+                del self.pendientes[(isbn, id_usuario)]
+                self._prestado(isbn, id_usuario, hora_peticion, duracion)
+
+    def _abandonar(self):
+        """Las esperas de más de DIAS_ESPERA se dan por perdidas (en las reservas, caducan solas)."""
+        limite = self.hora[0] - DIAS_ESPERA * 24
+        for clave, (hora_peticion, _) in list(self.pendientes.items()):
+            if hora_peticion < limite:
+                del self.pendientes[clave]
+                self.abandonos += 1
+
+    def ejecutar(self):
+        inicio = time.perf_counter()
+        for hora, grupo in itertools.groupby(peticiones(), key=lambda p: p[0]):
+            self.hora[0] = hora
+            self._devolver_vencidos()
+            if not self.con_reservas:
+                self._reintentar()
+            for _, isbn, id_usuario, duracion in grupo:
+                self._pedir(isbn, id_usuario, duracion)
+            if hora % 24 == 0:
+                self._abandonar()
+        duracion = time.perf_counter() - inicio
+
+        atendidas = len(self.esperas)
+        cortes = statistics.quantiles(self.esperas, n=100)
+        modo = "Colas de reserva" if self.con_reservas else "Sondeo (antes)  "
+        print(f"{modo}: {self.llamadas:>10,} llamadas ({self.llamadas / atendidas:5.1f} por préstamo) | "
+              f"{atendidas:,} préstamos, {self.abandonos:,} abandonos | espera p50 {cortes[49]:.0f} h, "
+              f"p95 {cortes[94]:.0f} h | {duracion:.1f} s")
+        return self.llamadas
+
+
+if __name__ == "__main__":
+    sondeo = Simulacion(con_reservas=False).ejecutar()
+    reservas = Simulacion(con_reservas=True).ejecutar()
+    print(f"Las colas de reserva hacen {sondeo / reservas:,.1f} veces menos llamadas en "
+          f"{HORAS // 24} días con {PETICIONES_POR_HORA * HORAS:,} peticiones")
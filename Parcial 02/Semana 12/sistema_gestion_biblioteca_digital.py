@@ -9,6 +9,152 @@ Cumple con los requisitos de uso de colecciones específicas de Python:
 - Conjuntos: Para garantizar unicidad en IDs de usuarios.
 """
 
+import bisect
+import heapq
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping, Sequence
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+# Módulos compartidos entre semanas (carpeta "comun" de este parcial)
+_COMUN = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+if _COMUN not in sys.path:
+    sys.path.insert(0, _COMUN)
+
+from resultados import CONSOLA, Resultado, SumideroBuffer, SumideroConsola, SumideroNulo
+
+
+class Metricas:
+    """
+    Contadores, histogramas de latencia e indicadores (gauges) de una Biblioteca.
+
+    Los histogramas usan cubetas fijas acumulativas, como Prometheus: cada
+    medición solo incrementa un contador, sin guardar las muestras.
+    """
+
+    # Límites superiores de las cubetas de latencia, en segundos
+    CUBETAS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+               0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+    def __init__(self, prefijo="biblioteca"):
+        self.prefijo = prefijo
+        self._candado = threading.Lock()
+        self._contadores = {}   # (operación, código) -> veces
+        self._histogramas = {}  # operación -> [conteos por cubeta (+Inf al final), suma]
+        self._indicadores = {}  # nombre -> función sin argumentos que da el valor actual
+
+    def medir(self, operacion, funcion):
+        """Envuelve 'funcion' para contar sus llamadas y medir su latencia."""
+        reloj = time.perf_counter
+
+        def medida(*args, **kwargs):
+            inicio = reloj()
+            try:
+                resultado = funcion(*args, **kwargs)
+            except Exception:
+                self.observar(operacion, "excepcion", reloj() - inicio)
+                raise
+            # Los Resultado traen su código y los métodos internos (_prestar...)
+            # lo devuelven primero en su tupla; las búsquedas (listas) cuentan como "ok"
+            if isinstance(resultado, tuple):
+                codigo = resultado[0]
+            else:
+                codigo = getattr(resultado, "codigo", "ok")
+            self.observar(operacion, codigo, reloj() - inicio)
+            return resultado
+
+        medida.__wrapped__ = funcion
+        return medida
+
+    def observar(self, operacion, codigo, segundos):
+        """Registra una llamada a 'operacion' con su código de resultado y su duración."""
+        posicion = bisect.bisect_left(self.CUBETAS, segundos)
+        with self._candado:
+            clave = (operacion, codigo)
+            self._contadores[clave] = self._contadores.get(clave, 0) + 1
+            histograma = self._histogramas.get(operacion)
+            if histograma is None:
+                histograma = self._histogramas[operacion] = [[0] * (len(self.CUBETAS) + 1), 0.0]
+            histograma[0][posicion] += 1
+            histograma[1] += segundos
+
+    def registrar_indicador(self, nombre, funcion):
+        """Añade un indicador cuyo valor se calcula al pedir la instantánea."""
+        self._indicadores[nombre] = funcion
+
+    def instantanea(self):
+        """
+        Devuelve una copia de las métricas:
+        {"contadores": {operación: {código: veces}},
+         "latencias": {operación: {"cuenta", "suma", "cubetas": {límite: acumulado}}},
+         "indicadores": {nombre: valor}}
+        """
+        with self._candado:
+            contadores = dict(self._contadores)
+            histogramas = {op: (list(conteos), suma) for op, (conteos, suma) in self._histogramas.items()}
+
+        por_operacion = {}
+        for (operacion, codigo), veces in contadores.items():
+            por_operacion.setdefault(operacion, {})[codigo] = veces
+
+        latencias = {}
+        for operacion, (conteos, suma) in histogramas.items():
+            acumulado = 0
+            cubetas = {}
+            for limite, conteo in zip(self.CUBETAS + ("+Inf",), conteos):
+                acumulado += conteo
+                cubetas[limite] = acumulado
+            latencias[operacion] = {"cuenta": acumulado, "suma": suma, "cubetas": cubetas}
+
+        indicadores = {nombre: funcion() for nombre, funcion in self._indicadores.items()}
+        return {"contadores": por_operacion, "latencias": latencias, "indicadores": indicadores}
+
+    def texto_prometheus(self):
+        """Las métricas en el formato de texto de Prometheus."""
+        datos = self.instantanea()
+        p = self.prefijo
+        lineas = [
+            f"# HELP {p}_operaciones_total Operaciones realizadas por tipo y resultado.",
+            f"# TYPE {p}_operaciones_total counter",
+        ]
+        for operacion, codigos in sorted(datos["contadores"].items()):
+            for codigo, veces in sorted(codigos.items()):
+                lineas.append(f'{p}_operaciones_total{{operacion="{operacion}",codigo="{codigo}"}} {veces}')
+
+        lineas += [
+            f"# HELP {p}_latencia_segundos Latencia de las operaciones.",
+            f"# TYPE {p}_latencia_segundos histogram",
+        ]
+        for operacion, histograma in sorted(datos["latencias"].items()):
+            for limite, acumulado in histograma["cubetas"].items():
+                lineas.append(f'{p}_latencia_segundos_bucket{{operacion="{operacion}",le="{limite}"}} {acumulado}')
+            lineas.append(f'{p}_latencia_segundos_sum{{operacion="{operacion}"}} {histograma["suma"]}')
+            lineas.append(f'{p}_latencia_segundos_count{{operacion="{operacion}"}} {histograma["cuenta"]}')
+
+        for nombre, valor in sorted(datos["indicadores"].items()):
+            lineas.append(f"# TYPE {p}_{nombre} gauge")
+            lineas.append(f"{p}_{nombre} {valor}")
+        return "\n".join(lineas) + "\n"
+
+    def volcar_prometheus(self, ruta):
+        """
+        Escribe las métricas en 'ruta' (p. ej. para el textfile collector de
+        node_exporter). Se escribe en un temporal y se reemplaza de golpe
+        para que nunca se lea un archivo a medias.
+        """
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(self.texto_prometheus())
+        os.replace(temporal, ruta)
+
 
 class Libro:
     """
@@ -50,6 +196,50 @@ class Libro:
         return f"Libro({self.titulo}, {self.autor}, {self.isbn})"
 
 
+class Prestamo:
+    """
+    Registro de un préstamo: qué libro, a quién, cuándo se prestó, cuándo
+    vence y, cuando se cierra, cuándo se devolvió.
+    """
+
+    __slots__ = ("libro", "id_usuario", "fecha_prestamo", "fecha_vencimiento", "fecha_devolucion", "id_registro")
+
+    def __init__(self, libro, id_usuario, fecha_prestamo, fecha_vencimiento):
+        self.libro = libro
+        self.id_usuario = id_usuario
+        self.fecha_prestamo = fecha_prestamo
+        self.fecha_vencimiento = fecha_vencimiento
+        self.fecha_devolucion = None
+        self.id_registro = None  # Fila del historial en la base de datos, si la hay
+
+    @property
+    def activo(self):
+        return self.fecha_devolucion is None
+
+    def __repr__(self):
+        return (f"Prestamo({self.libro.isbn}, usuario={self.id_usuario}, "
+                f"vence={self.fecha_vencimiento:%Y-%m-%d})")
+
+
+class Reserva:
+    """
+    Turno de un usuario en la cola de espera de un libro prestado.
+    Si no le llega el libro antes de 'fecha_vencimiento', la reserva caduca.
+    """
+
+    __slots__ = ("isbn", "id_usuario", "fecha_reserva", "fecha_vencimiento")
+
+    def __init__(self, isbn, id_usuario, fecha_reserva, fecha_vencimiento):
+        self.isbn = isbn
+        self.id_usuario = id_usuario
+        self.fecha_reserva = fecha_reserva
+        self.fecha_vencimiento = fecha_vencimiento
+
+    def __repr__(self):
+        return (f"Reserva({self.isbn}, usuario={self.id_usuario}, "
+                f"vence={self.fecha_vencimiento:%Y-%m-%d})")
+
+
 class Usuario:
     """
     Clase que representa a un usuario registrado en la biblioteca.
@@ -65,52 +255,726 @@ class Usuario:
         """
         self.nombre = nombre
         self.id_usuario = id_usuario
-        # REQUISITO: Utilizar una lista para gestionar los libros prestados.
-        # La lista permite mantener un orden y permitir duplicados si la lógica lo permitiera (aquí no).
-        self.libros_prestados = []
+        # Préstamos indexados por ISBN. El diccionario conserva el orden de
+        # inserción, así que se puede exponer como lista en el mismo orden,
+        # y devolver o comprobar un libro cuesta O(1) en lugar de recorrerla.
+        self._prestamos = {}
+
+    @property
+    def libros_prestados(self):
+        """
+        REQUISITO: Lista de libros prestados, en el orden en que se prestaron.
+        Se genera a partir del diccionario interno.
+        """
+        return list(self._prestamos.values())
 
     def prestar_libro(self, libro):
-        """Añade un libro a la lista de préstamos del usuario."""
-        self.libros_prestados.append(libro)
+        """
+        Añade un libro a los préstamos del usuario.
+
+        Returns:
+            bool: True si se añadió, False si ya lo tenía prestado.
+        """
+        if libro.isbn in self._prestamos:
+            return False
+        self._prestamos[libro.isbn] = libro
+        return True
 
     def devolver_libro(self, isbn):
         """
-        Elimina un libro de la lista de préstamos basándose en su ISBN.
+        Elimina un libro de los préstamos basándose en su ISBN.
 
         Returns:
             bool: True si se encontró y eliminó, False en caso contrario.
         """
-        for i, libro in enumerate(self.libros_prestados):
-            if libro.isbn == isbn:
-                del self.libros_prestados[i]
-                return True
-        return False
+        return self._prestamos.pop(isbn, None) is not None
+
+    def tiene_libro(self, isbn):
+        """Indica si el usuario tiene prestado el libro con ese ISBN."""
+        return isbn in self._prestamos
+
+    def cantidad_prestamos(self):
+        """Número de libros que tiene prestados el usuario."""
+        return len(self._prestamos)
 
     def listar_prestamos(self):
         """Devuelve una copia de la lista de libros prestados."""
-        return self.libros_prestados.copy()
+        return self.libros_prestados
 
     def __str__(self):
         return f"Usuario: {self.nombre} (ID: {self.id_usuario})"
 
 
-class Biblioteca:
+class IndiceCampo:
     """
-    Clase principal que gestiona todo el sistema: catálogo, usuarios y préstamos.
+    Índices invertidos sobre un campo de texto de los libros (título, autor o categoría).
+
+    - Valor exacto (en minúsculas) -> ISBNs: búsquedas exactas en O(1).
+    - Palabra -> ISBNs: búsquedas por palabra completa.
+    - N-gramas de 1 a 3 caracteres -> ISBNs: búsquedas por subcadena sin
+      recorrer todo el catálogo (los candidatos se confirman al final).
+    """
+
+    LONGITUD_GRAMA = 3
+
+    def __init__(self):
+        self._exacto = {}
+        self._palabras = {}
+        self._gramas = {}
+        self._textos = {}  # ISBN -> texto en minúsculas
+
+    @staticmethod
+    def _palabras_de(texto):
+        return set(re.findall(r"\w+", texto))
+
+    @classmethod
+    def _gramas_de(cls, texto, longitudes=None):
+        longitudes = longitudes or range(1, cls.LONGITUD_GRAMA + 1)
+        return {texto[i:i + n] for n in longitudes for i in range(len(texto) - n + 1)}
+
+    @staticmethod
+    def _añadir(indice, clave, isbn):
+        indice.setdefault(clave, set()).add(isbn)
+
+    @staticmethod
+    def _retirar(indice, clave, isbn):
+        isbns = indice[clave]
+        isbns.discard(isbn)
+        if not isbns:
+            del indice[clave]
+
+    def agregar(self, isbn, texto):
+        texto = texto.lower()
+        self._textos[isbn] = texto
+        self._añadir(self._exacto, texto, isbn)
+        for palabra in self._palabras_de(texto):
+            self._añadir(self._palabras, palabra, isbn)
+        for grama in self._gramas_de(texto):
+            self._añadir(self._gramas, grama, isbn)
+
+    def quitar(self, isbn):
+        texto = self._textos.pop(isbn)
+        self._retirar(self._exacto, texto, isbn)
+        for palabra in self._palabras_de(texto):
+            self._retirar(self._palabras, palabra, isbn)
+        for grama in self._gramas_de(texto):
+            self._retirar(self._gramas, grama, isbn)
+
+    def exacto(self, valor):
+        """ISBNs cuyo campo es exactamente 'valor' (sin distinguir mayúsculas)."""
+        return self._exacto.get(valor.lower(), set())
+
+    def palabra(self, palabra):
+        """ISBNs cuyo campo contiene la palabra completa."""
+        return self._palabras.get(palabra.lower(), set())
+
+    def subcadena(self, criterio):
+        """ISBNs cuyo campo contiene 'criterio' (ya en minúsculas)."""
+        if not criterio:
+            return set(self._textos)
+        if len(criterio) <= self.LONGITUD_GRAMA:
+            return self._gramas.get(criterio, set())
+
+        conjuntos = sorted(
+            (self._gramas.get(grama, set())
+             for grama in self._gramas_de(criterio, (self.LONGITUD_GRAMA,))),
+            key=len
+        )
+        candidatos = conjuntos[0].intersection(*conjuntos[1:])
+        return {isbn for isbn in candidatos if criterio in self._textos[isbn]}
+
+
+class MotorBusqueda:
+    """
+    Búsqueda de texto completo con ranking BM25 sobre título, autor y categoría.
+
+    Los textos se tokenizan en minúsculas y sin tildes ("Pérez" == "perez").
+    Cada consulta devuelve solo los k mejores resultados y un cursor para
+    pedir la página siguiente, así que nunca se materializa la lista completa.
     """
 
+    K1 = 1.2
+    B = 0.75
+
     def __init__(self):
-        """Inicializa la biblioteca con colecciones vacías."""
-        # REQUISITO: Diccionario para almacenar libros con ISBN como clave.
-        # Permite búsqueda O(1) por ISBN.
-        self.catalogo_libros = {}
+        self._postings = {}   # término -> {isbn: frecuencia}
+        self._longitudes = {}  # isbn -> número de términos del documento
+        self._longitud_total = 0
+
+    @staticmethod
+    def tokenizar(texto):
+        """Separa en palabras en minúsculas, eliminando tildes y diéresis."""
+        descompuesto = unicodedata.normalize("NFKD", texto.lower())
+        sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+        return re.findall(r"\w+", sin_tildes)
+
+    def agregar(self, isbn, libro):
+        terminos = self.tokenizar(f"{libro.titulo} {libro.autor} {libro.categoria}")
+        frecuencias = {}
+        for termino in terminos:
+            frecuencias[termino] = frecuencias.get(termino, 0) + 1
+        for termino, frecuencia in frecuencias.items():
+            self._postings.setdefault(termino, {})[isbn] = frecuencia
+        self._longitudes[isbn] = len(terminos)
+        self._longitud_total += len(terminos)
+
+    def quitar(self, isbn, libro):
+        for termino in set(self.tokenizar(f"{libro.titulo} {libro.autor} {libro.categoria}")):
+            documentos = self._postings[termino]
+            del documentos[isbn]
+            if not documentos:
+                del self._postings[termino]
+        self._longitud_total -= self._longitudes.pop(isbn)
+
+    def _terminos(self, consulta):
+        """
+        Términos de la consulta presentes en el índice como (idf, término,
+        postings), de mayor a menor idf.
+        """
+        total_docs = len(self._longitudes)
+        terminos = []
+        for termino in set(self.tokenizar(consulta)):
+            documentos = self._postings.get(termino)
+            if documentos:
+                idf = math.log(1 + (total_docs - len(documentos) + 0.5) / (len(documentos) + 0.5))
+                terminos.append((idf, termino, documentos))
+        terminos.sort(key=lambda t: (-t[0], t[1]))
+        return terminos
+
+    def _puntuacion(self, isbn, terminos, longitud_media):
+        """Puntuación BM25 del documento para los términos dados."""
+        norma = self.K1 * (1 - self.B + self.B * self._longitudes[isbn] / longitud_media)
+        puntuacion = 0.0
+        for idf, _, documentos in terminos:
+            frecuencia = documentos.get(isbn)
+            if frecuencia:
+                puntuacion += idf * frecuencia * (self.K1 + 1) / (frecuencia + norma)
+        return puntuacion
+
+    def buscar(self, consulta, k=10, cursor=None):
+        """
+        Devuelve (resultados, cursor_siguiente).
+
+        resultados es una lista de hasta k tuplas (isbn, puntuación) ordenadas
+        de mayor a menor puntuación (desempate por ISBN). cursor_siguiente se
+        pasa en la próxima llamada para obtener la página siguiente; es None
+        cuando no hay más resultados.
+
+        Los postings se recorren término a término y cada documento se puntúa
+        completo la primera vez que aparece, así que solo se guardan k + 1
+        candidatos. Como un término aporta menos de idf * (K1 + 1), en cuanto
+        lo que pueden sumar los términos que quedan no alcanza al peor
+        candidato se deja de recorrer (los documentos nuevos solo contienen
+        esos términos).
+        """
+        terminos = self._terminos(consulta)
+        if not terminos:
+            return [], None
+        longitud_media = self._longitud_total / len(self._longitudes)
+        # cotas[i]: máximo que suman los términos i, i+1, ...
+        cotas = [0.0] * (len(terminos) + 1)
+        for i in range(len(terminos) - 1, -1, -1):
+            cotas[i] = cotas[i + 1] + terminos[i][0] * (self.K1 + 1)
+
+        mejores = []  # Hasta k + 1 claves (-puntuación, isbn), ordenadas
+        for i, (_, _, documentos) in enumerate(terminos):
+            if len(mejores) > k and cotas[i] < -mejores[-1][0]:
+                break
+            anteriores = [postings for _, _, postings in terminos[:i]]
+            restantes = terminos[i:]
+            for isbn in documentos:
+                if any(isbn in postings for postings in anteriores):
+                    continue  # Ya se puntuó con un término anterior
+                clave = (-self._puntuacion(isbn, restantes, longitud_media), isbn)
+                if cursor is not None and clave <= cursor:
+                    continue
+                if len(mejores) <= k or clave < mejores[-1]:
+                    bisect.insort(mejores, clave)
+                    if len(mejores) > k + 1:
+                        mejores.pop()
+        pagina = mejores[:k]
+        siguiente = pagina[-1] if len(mejores) > k else None
+        return [(isbn, -puntuacion) for puntuacion, isbn in pagina], siguiente
+
+
+class TransaccionBD:
+    """
+    Candado reentrante de una conexión SQLite que agrupa en una sola
+    transacción todo lo que se escribe mientras está tomado: al soltar el
+    bloque más externo se confirma (o se deshace, si salió una excepción).
+    Lo comparten todas las tablas de la conexión, así que varias escrituras
+    hechas dentro de un mismo bloque se guardan juntas o no se guarda ninguna.
+    """
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+        self._candado = threading.RLock()
+        self._nivel = 0  # Bloques anidados abiertos por el hilo que tiene el candado
+
+    def __enter__(self):
+        self._candado.acquire()
+        self._nivel += 1
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self._nivel -= 1
+        try:
+            if self._nivel == 0 and self._conexion.in_transaction:
+                if tipo is None:
+                    self._conexion.commit()
+                else:
+                    self._conexion.rollback()
+        finally:
+            self._candado.release()
+
+
+class TablaPersistente(MutableMapping):
+    """
+    Diccionario respaldado por una tabla SQLite.
+
+    Los objetos se construyen solo cuando se accede a ellos (carga perezosa) y
+    se guardan en caché; cada asignación o borrado se escribe en la base de
+    datos en el momento, sin reescribir nada más. Con limite_cache la caché
+    conserva solo los objetos usados más recientemente (LRU).
+    """
 
-        # REQUISITO: Conjunto para manejar los IDs de usuarios únicos.
-        # Los sets no permiten duplicados, asegurando integridad de IDs.
-        self.ids_registrados = set()
+    LOTE_LECTURA = 1000
+
+    def __init__(self, conexion, tabla, columnas, a_fila, desde_fila, candado=None, limite_cache=None):
+        """
+        Args:
+            conexion (sqlite3.Connection): Conexión abierta.
+            tabla (str): Nombre de la tabla.
+            columnas (tuple): Columnas; la primera es la clave.
+            a_fila (callable): (clave, valor) -> tupla de valores de las columnas.
+            desde_fila (callable): fila -> valor.
+            candado (TransaccionBD): Candado compartido por las tablas de la misma conexión.
+            limite_cache (int): Máximo de objetos en caché (None = sin límite).
+        """
+        self._conexion = conexion
+        self._candado = candado or TransaccionBD(conexion)
+        self._tabla = tabla
+        self._columnas = columnas
+        self._a_fila = a_fila
+        self._desde_fila = desde_fila
+        self._cache = OrderedDict()
+        self._limite_cache = limite_cache
+
+    def _recordar(self, clave, valor):
+        """Guarda el valor en caché y descarta el menos usado si se pasa del límite."""
+        self._cache[clave] = valor
+        self._cache.move_to_end(clave)
+        if self._limite_cache is not None and len(self._cache) > self._limite_cache:
+            self._cache.popitem(last=False)
+
+    def __getitem__(self, clave):
+        with self._candado:
+            if clave in self._cache:
+                self._cache.move_to_end(clave)
+                return self._cache[clave]
+            fila = self._conexion.execute(
+                f"SELECT {', '.join(self._columnas)} FROM {self._tabla} WHERE {self._columnas[0]} = ?", (clave,)
+            ).fetchone()
+            if fila is None:
+                raise KeyError(clave)
+            valor = self._desde_fila(fila)
+            self._recordar(clave, valor)
+        return valor
+
+    def __setitem__(self, clave, valor):
+        marcadores = ", ".join("?" for _ in self._columnas)
+        with self._candado:
+            self._conexion.execute(
+                f"INSERT OR REPLACE INTO {self._tabla} ({', '.join(self._columnas)}) VALUES ({marcadores})",
+                self._a_fila(clave, valor)
+            )
+            self._recordar(clave, valor)
+
+    def __delitem__(self, clave):
+        with self._candado:
+            cursor = self._conexion.execute(f"DELETE FROM {self._tabla} WHERE {self._columnas[0]} = ?", (clave,))
+            self._cache.pop(clave, None)
+        if cursor.rowcount == 0:
+            raise KeyError(clave)
+
+    def __contains__(self, clave):
+        if clave in self._cache:
+            return True
+        with self._candado:
+            return self._conexion.execute(
+                f"SELECT 1 FROM {self._tabla} WHERE {self._columnas[0]} = ?", (clave,)
+            ).fetchone() is not None
+
+    def __iter__(self):
+        # En orden de inserción (rowid), igual que un diccionario
+        with self._candado:
+            claves = self._conexion.execute(
+                f"SELECT {self._columnas[0]} FROM {self._tabla} ORDER BY rowid"
+            ).fetchall()
+        for (clave,) in claves:
+            yield clave
+
+    def __len__(self):
+        with self._candado:
+            return self._conexion.execute(f"SELECT COUNT(*) FROM {self._tabla}").fetchone()[0]
+
+    def recorrer_valores(self):
+        """
+        Recorre los valores en orden de inserción construyéndolos desde las
+        filas, sin pasar por la caché. Se lee por lotes de LOTE_LECTURA filas
+        para no tener la tabla entera en memoria ni el candado todo el recorrido.
+        """
+        consulta = (f"SELECT rowid, {', '.join(self._columnas)} FROM {self._tabla} "
+                    f"WHERE rowid > ? ORDER BY rowid LIMIT {self.LOTE_LECTURA}")
+        ultimo = -1
+        while True:
+            with self._candado:
+                filas = self._conexion.execute(consulta, (ultimo,)).fetchall()
+            for fila in filas:
+                yield self._desde_fila(fila[1:])
+            if len(filas) < self.LOTE_LECTURA:
+                return
+            ultimo = filas[-1][0]
+
+
+class HistorialPersistente(Sequence):
+    """
+    Historial de préstamos respaldado por la tabla 'historial' de SQLite.
 
-        # Diccionario auxiliar para acceder al objeto Usuario por su ID rápidamente
-        self.usuarios_registrados = {}
+    Solo se añaden filas; al devolverse el libro se anota la fecha en la
+    suya. Guarda también título, autor y categoría, para que el historial
+    siga completo aunque el libro se quite del catálogo. No se guarda nada
+    en memoria: se lee de la base de datos al recorrerlo.
+    """
+
+    LOTE_LECTURA = 1000
+    _COLUMNAS = ("id, isbn, titulo, autor, categoria, id_usuario, "
+                 "fecha_prestamo, fecha_vencimiento, fecha_devolucion")
+
+    def __init__(self, conexion, candado):
+        self._conexion = conexion
+        self._candado = candado
+
+    @staticmethod
+    def _desde_fila(fila):
+        id_registro, isbn, titulo, autor, categoria, id_usuario, prestado, vence, devuelto = fila
+        prestamo = Prestamo(Libro(titulo, autor, categoria, isbn), id_usuario,
+                            datetime.fromisoformat(prestado), datetime.fromisoformat(vence))
+        prestamo.fecha_devolucion = None if devuelto is None else datetime.fromisoformat(devuelto)
+        prestamo.id_registro = id_registro
+        return prestamo
+
+    def append(self, prestamo):
+        """Añade el préstamo al historial y anota en él su número de fila."""
+        libro = prestamo.libro
+        with self._candado:
+            cursor = self._conexion.execute(
+                "INSERT INTO historial (isbn, titulo, autor, categoria, id_usuario, fecha_prestamo, "
+                "fecha_vencimiento) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (libro.isbn, libro.titulo, libro.autor, libro.categoria, prestamo.id_usuario,
+                 prestamo.fecha_prestamo.isoformat(), prestamo.fecha_vencimiento.isoformat())
+            )
+        prestamo.id_registro = cursor.lastrowid
+
+    def registrar_devolucion(self, isbn, fecha):
+        """Anota la fecha de devolución en la fila del préstamo sin devolver del libro."""
+        with self._candado:
+            self._conexion.execute(
+                "UPDATE historial SET fecha_devolucion = ? WHERE isbn = ? AND fecha_devolucion IS NULL",
+                (fecha.isoformat(), isbn)
+            )
+
+    def vencidos(self, ahora):
+        """
+        Préstamos sin devolver cuyo vencimiento ya pasó, del más antiguo al
+        más reciente. El índice parcial historial_vencimientos solo contiene
+        los préstamos abiertos ordenados por vencimiento, así que se leen
+        únicamente las filas vencidas.
+        """
+        with self._candado:
+            filas = self._conexion.execute(
+                f"SELECT {self._COLUMNAS} FROM historial "
+                "WHERE fecha_devolucion IS NULL AND fecha_vencimiento <= ? ORDER BY fecha_vencimiento, id",
+                (ahora.isoformat(),)
+            ).fetchall()
+        return [self._desde_fila(fila) for fila in filas]
+
+    def _recorrer(self, condicion=""):
+        consulta = (f"SELECT {self._COLUMNAS} FROM historial WHERE id > ? {condicion} "
+                    f"ORDER BY id LIMIT {self.LOTE_LECTURA}")
+        ultimo = 0
+        while True:
+            with self._candado:
+                filas = self._conexion.execute(consulta, (ultimo,)).fetchall()
+            for fila in filas:
+                yield self._desde_fila(fila)
+            if len(filas) < self.LOTE_LECTURA:
+                return
+            ultimo = filas[-1][0]
+
+    def abiertos(self):
+        """Préstamos todavía sin devolver, en el orden en que se hicieron."""
+        return self._recorrer("AND fecha_devolucion IS NULL")
+
+    def __iter__(self):
+        return self._recorrer()
+
+    def __len__(self):
+        with self._candado:
+            return self._conexion.execute("SELECT COUNT(*) FROM historial").fetchone()[0]
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        fila = None
+        if indice >= 0:
+            with self._candado:
+                fila = self._conexion.execute(
+                    f"SELECT {self._COLUMNAS} FROM historial ORDER BY id LIMIT 1 OFFSET ?", (indice,)
+                ).fetchone()
+        if fila is None:
+            raise IndexError("índice del historial fuera de rango")
+        return self._desde_fila(fila)
+
+
+class Biblioteca:
+    """
+    Clase principal que gestiona todo el sistema: catálogo, usuarios y préstamos.
+
+    Si se indica ruta_bd, los datos se guardan en una base de datos SQLite:
+    el catálogo, los usuarios y sus préstamos se cargan solo al necesitarlos
+    y cada préstamo o devolución se escribe en el momento. Al abrirla no se
+    carga ningún préstamo ni reserva: los vencidos se consultan en la tabla
+    del historial (con un índice por fecha de vencimiento) y la cola de
+    reservas de un libro se lee la primera vez que se usa. Los índices de
+    búsqueda se construyen la primera vez que se busca.
+
+    Con concurrente=True se puede usar desde varios hilos (varios mostradores
+    de préstamo). Cada ISBN se protege con uno de 'franjas' candados (lock
+    striping), así que préstamos de libros distintos avanzan en paralelo y
+    dos hilos nunca pueden prestar el mismo libro a la vez. Las búsquedas
+    leen los índices con el candado del catálogo, el mismo que toman las
+    altas y bajas de libros.
+
+    Las altas, préstamos y devoluciones devuelven un Resultado y emiten su
+    mensaje a 'sumidero' (consola por defecto; SumideroNulo para lotes).
+
+    Con metricas=Metricas() se cuentan y cronometran las operaciones de
+    OPERACIONES_MEDIDAS. Sin métricas los métodos no se tocan: coste cero.
+
+    Un libro prestado se puede reservar: las reservas forman una cola FIFO
+    por ISBN y, al devolverse el libro, pasa directamente al primero de la
+    cola cuya reserva siga vigente (las caducadas se descartan al llegar).
+    """
+
+    # Operación -> método que se mide. Préstamos, devoluciones y reservas se
+    # miden en el método interno, por el que pasan tanto los métodos públicos
+    # como BibliotecaAsincrona.
+    OPERACIONES_MEDIDAS = {
+        "prestar_libro": "_prestar",
+        "devolver_libro": "_devolver",
+        "reservar_libro": "_reservar",
+        "buscar_libros": "buscar_libros",
+        "registrar_usuario": "registrar_usuario",
+    }
+
+    def __init__(self, ruta_bd=None, concurrente=False, franjas=64, dias_prestamo=14, reloj=None,
+                 sumidero=None, metricas=None, dias_reserva=7, limite_cache=10_000):
+        """
+        Inicializa la biblioteca con colecciones vacías o enlazadas a la base de datos.
+
+        Args:
+            ruta_bd (str): Archivo SQLite para la persistencia (None = solo en memoria).
+            concurrente (bool): Activa los candados para uso desde varios hilos.
+            franjas (int): Número de candados entre los que se reparten los ISBN.
+            dias_prestamo (int): Plazo de devolución por defecto.
+            reloj (callable): Devuelve la fecha y hora actual (por defecto datetime.now).
+            sumidero: Destino de los eventos (por defecto, la consola).
+            metricas (Metricas): Instrumentación de las operaciones (None = desactivada).
+            dias_reserva (int): Tiempo que una reserva espera en la cola antes de caducar.
+            limite_cache (int): Libros y préstamos que se guardan en memoria con base de datos.
+        """
+        self._conexion = None
+        # Con base de datos, agrupa en una transacción las escrituras de cada operación
+        self._candado_bd = nullcontext()
+        self.sumidero = sumidero or CONSOLA
+        self._reloj = reloj or datetime.now
+        self.dias_prestamo = dias_prestamo
+        self._candados_isbn = [threading.Lock() for _ in range(franjas)] if concurrente else None
+        self._candado_usuarios = threading.Lock() if concurrente else nullcontext()
+        self._candado_catalogo = threading.RLock() if concurrente else nullcontext()
+        if ruta_bd is None:
+            # REQUISITO: Diccionario para almacenar libros con ISBN como clave.
+            # Permite búsqueda O(1) por ISBN.
+            self.catalogo_libros = {}
+
+            # REQUISITO: Conjunto para manejar los IDs de usuarios únicos.
+            # Los sets no permiten duplicados, asegurando integridad de IDs.
+            self.ids_registrados = set()
+
+            # Diccionario auxiliar para acceder al objeto Usuario por su ID rápidamente
+            self.usuarios_registrados = {}
+
+            # Índice inverso de préstamos: ISBN -> ID del usuario que lo tiene.
+            # Permite saber en O(1) si un libro está disponible y quién lo tiene.
+            self.prestamos_activos = {}
+
+            # Historial de todos los préstamos, que solo crece (nunca se borra nada)
+            self.historial_prestamos = []
+        else:
+            self._abrir_base_datos(ruta_bd, limite_cache)
+
+        # Índices invertidos por campo para las búsquedas en el catálogo
+        self.indices = {campo: IndiceCampo() for campo in ("titulo", "autor", "categoria")}
+        # Posición de cada ISBN en el catálogo, para devolver resultados en ese orden
+        self._orden_catalogo = {}
+        self._contador_catalogo = 0
+        # Motor de texto completo con ranking para buscar_texto()
+        self.motor_busqueda = MotorBusqueda()
+        # Con base de datos los índices se construyen en la primera búsqueda
+        self._indices_cargados = ruta_bd is None
+
+        # Solo en memoria: registro de cada préstamo activo (ISBN -> Prestamo).
+        # Con base de datos los préstamos abiertos están en la tabla del historial.
+        self.registros_prestamo = {}
+        # Montículo (vencimiento, secuencia, Prestamo): los préstamos vencidos
+        # están arriba, así que buscarlos no obliga a revisar a todos los usuarios.
+        self._vencimientos = []
+        self._secuencia_vencimientos = 0
+        self._candado_vencimientos = threading.Lock() if concurrente else nullcontext()
+
+        # Colas de reserva: ISBN -> deque de Reserva en orden de llegada.
+        # (ISBN, ID de usuario) -> Reserva vigente; cancelar solo la quita de
+        # aquí y la entrada de la cola se descarta cuando llega su turno.
+        # Con base de datos solo están las colas que ya se han leído (_cargar_cola).
+        self.dias_reserva = dias_reserva
+        self.colas_reserva = {}
+        self._reservas = {}
+
+        # Las métricas envuelven los métodos medidos solo en esta instancia;
+        # sin ellas se usan los de la clase tal cual.
+        self.metricas = metricas
+        if metricas is not None:
+            for operacion, metodo in self.OPERACIONES_MEDIDAS.items():
+                setattr(self, metodo, metricas.medir(operacion, getattr(self, metodo)))
+            metricas.registrar_indicador("libros_catalogo", lambda: len(self.catalogo_libros))
+            metricas.registrar_indicador("prestamos_activos", lambda: len(self.prestamos_activos))
+
+    def _abrir_base_datos(self, ruta_bd, limite_cache):
+        """Crea (si hace falta) las tablas y enlaza las colecciones con ellas."""
+        self._conexion = sqlite3.connect(ruta_bd, check_same_thread=False)
+        candado_bd = self._candado_bd = TransaccionBD(self._conexion)
+        with self._conexion:
+            # Columnas sin tipo declarado: se conservan los IDs tal cual (int o str)
+            self._conexion.executescript("""
+                CREATE TABLE IF NOT EXISTS libros (isbn PRIMARY KEY, titulo, autor, categoria);
+                CREATE TABLE IF NOT EXISTS usuarios (id_usuario PRIMARY KEY, nombre);
+                CREATE TABLE IF NOT EXISTS prestamos (isbn PRIMARY KEY, id_usuario);
+                CREATE INDEX IF NOT EXISTS prestamos_por_usuario ON prestamos (id_usuario);
+                CREATE TABLE IF NOT EXISTS historial (
+                    id INTEGER PRIMARY KEY, isbn, titulo, autor, categoria, id_usuario,
+                    fecha_prestamo, fecha_vencimiento, fecha_devolucion
+                );
+                CREATE INDEX IF NOT EXISTS historial_abiertos ON historial (id) WHERE fecha_devolucion IS NULL;
+                CREATE INDEX IF NOT EXISTS historial_abiertos_por_isbn ON historial (isbn)
+                    WHERE fecha_devolucion IS NULL;
+                CREATE INDEX IF NOT EXISTS historial_vencimientos ON historial (fecha_vencimiento)
+                    WHERE fecha_devolucion IS NULL;
+                CREATE TABLE IF NOT EXISTS reservas (
+                    id INTEGER PRIMARY KEY, isbn, id_usuario, fecha_reserva, fecha_vencimiento
+                );
+                CREATE INDEX IF NOT EXISTS reservas_por_clave ON reservas (isbn, id_usuario);
+                CREATE INDEX IF NOT EXISTS reservas_por_usuario ON reservas (id_usuario);
+            """)
+
+        self.catalogo_libros = TablaPersistente(
+            self._conexion, "libros", ("isbn", "titulo", "autor", "categoria"),
+            lambda isbn, libro: (isbn, libro.titulo, libro.autor, libro.categoria),
+            lambda fila: Libro(fila[1], fila[2], fila[3], fila[0]),
+            candado_bd, limite_cache
+        )
+        # Sin límite: cada Usuario lleva su lista de préstamos y todos los que
+        # lo consultan deben compartir el mismo objeto
+        self.usuarios_registrados = TablaPersistente(
+            self._conexion, "usuarios", ("id_usuario", "nombre"),
+            lambda id_usuario, usuario: (id_usuario, usuario.nombre),
+            self._cargar_usuario,
+            candado_bd
+        )
+        self.prestamos_activos = TablaPersistente(
+            self._conexion, "prestamos", ("isbn", "id_usuario"),
+            lambda isbn, id_usuario: (isbn, id_usuario),
+            lambda fila: fila[1],
+            candado_bd, limite_cache
+        )
+        # Historial de préstamos con fechas: tras reiniciar se recuperan los vencimientos
+        self.historial_prestamos = HistorialPersistente(self._conexion, candado_bd)
+        # Solo los IDs (no los objetos Usuario) se leen al arrancar
+        self.ids_registrados = {fila[0] for fila in self._conexion.execute("SELECT id_usuario FROM usuarios")}
+
+    def _cargar_usuario(self, fila):
+        """Construye un Usuario desde la base de datos junto con sus préstamos."""
+        id_usuario, nombre = fila
+        usuario = Usuario(nombre, id_usuario)
+        consulta = "SELECT isbn FROM prestamos WHERE id_usuario = ? ORDER BY rowid"
+        for (isbn,) in self._conexion.execute(consulta, (id_usuario,)).fetchall():
+            if isbn in self.catalogo_libros:
+                usuario.prestar_libro(self.catalogo_libros[isbn])
+        return usuario
+
+    def _emitir(self, ok, codigo, mensaje, libro=None):
+        resultado = Resultado(ok, codigo, mensaje, libro)
+        self.sumidero.emitir(resultado)
+        return resultado
+
+    def _candado_isbn(self, isbn):
+        """Candado de la franja a la que pertenece el ISBN (o uno vacío sin concurrencia)."""
+        if self._candados_isbn is None:
+            return nullcontext()
+        return self._candados_isbn[hash(isbn) % len(self._candados_isbn)]
+
+    def _esperar_candados_isbn(self):
+        """
+        Toma y suelta cada candado de ISBN: al terminar, ninguna operación que
+        los tuviera tomados antes de la llamada sigue a medias.
+        """
+        for candado in self._candados_isbn or ():
+            with candado:
+                pass
+
+    def cerrar(self):
+        """Cierra la base de datos, si se está usando."""
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def _asegurar_indices(self):
+        """Construye los índices de búsqueda a partir del catálogo si aún no existen."""
+        if self._indices_cargados:
+            return
+        with self._candado_catalogo:
+            if self._indices_cargados:
+                return  # Otro hilo los construyó mientras se esperaba
+            # Solo se llega aquí con base de datos: los libros se leen por lotes
+            # y no se quedan en la caché, los índices guardan solo texto e ISBN
+            for libro in self.catalogo_libros.recorrer_valores():
+                self._indexar_libro(libro)
+            self._indices_cargados = True
+
+    def _indexar_libro(self, libro):
+        for campo, indice in self.indices.items():
+            indice.agregar(libro.isbn, getattr(libro, campo))
+        self._orden_catalogo[libro.isbn] = self._contador_catalogo
+        self._contador_catalogo += 1
+        self.motor_busqueda.agregar(libro.isbn, libro)
+
+    def _desindexar_libro(self, libro):
+        for indice in self.indices.values():
+            indice.quitar(libro.isbn)
+        del self._orden_catalogo[libro.isbn]
+        self.motor_busqueda.quitar(libro.isbn, libro)
 
     # --- Gestión de Libros ---
 
@@ -122,14 +986,19 @@ class Biblioteca:
             libro (Libro): Objeto Libro a añadir.
 
         Returns:
-            bool: True si se añadió, False si el ISBN ya existe.
+            Resultado: verdadero si se añadió; código "isbn_duplicado" si ya existía.
         """
-        if libro.isbn in self.catalogo_libros:
-            print(f"Error: El libro con ISBN {libro.isbn} ya existe en la biblioteca.")
-            return False
-        self.catalogo_libros[libro.isbn] = libro
-        print(f"Libro añadido: {libro.titulo}")
-        return True
+        with self._candado_catalogo:
+            existe = libro.isbn in self.catalogo_libros
+            if not existe:
+                self.catalogo_libros[libro.isbn] = libro
+                if self._indices_cargados:
+                    self._indexar_libro(libro)
+        if existe:
+            return self._emitir(
+                False, "isbn_duplicado", f"Error: El libro con ISBN {libro.isbn} ya existe en la biblioteca."
+            )
+        return self._emitir(True, "ok", f"Libro añadido: {libro.titulo}", libro)
 
     def quitar_libro(self, isbn):
         """
@@ -139,14 +1008,21 @@ class Biblioteca:
             isbn (str): ISBN del libro a eliminar.
 
         Returns:
-            bool: True si se eliminó, False si no existía.
+            Resultado: verdadero si se eliminó; código "libro_no_encontrado" si no existía.
         """
-        if isbn in self.catalogo_libros:
-            del self.catalogo_libros[isbn]
-            print(f"Libro con ISBN {isbn} eliminado del catálogo.")
-            return True
-        print(f"Error: No se encontró el libro con ISBN {isbn}.")
-        return False
+        with self._candado_catalogo:
+            existe = isbn in self.catalogo_libros
+            if existe:
+                if self._indices_cargados:
+                    self._desindexar_libro(self.catalogo_libros[isbn])
+                with self._candado_isbn(isbn):
+                    del self.catalogo_libros[isbn]
+                    self._cargar_cola(isbn)
+                    for reserva in self.colas_reserva.pop(isbn, ()):
+                        self._anular_reserva(isbn, reserva.id_usuario)
+        if existe:
+            return self._emitir(True, "ok", f"Libro con ISBN {isbn} eliminado del catálogo.")
+        return self._emitir(False, "libro_no_encontrado", f"Error: No se encontró el libro con ISBN {isbn}.")
 
     # --- Gestión de Usuarios ---
 
@@ -159,18 +1035,18 @@ class Biblioteca:
             id_usuario (str/int): ID único.
 
         Returns:
-            bool: True si se registró, False si el ID ya existe.
+            Resultado: verdadero si se registró; código "id_duplicado" si el ID ya existe.
         """
-        # Usamos el set para verificar unicidad rápidamente
-        if id_usuario in self.ids_registrados:
-            print(f"Error: El ID de usuario {id_usuario} ya está registrado.")
-            return False
-
-        nuevo_usuario = Usuario(nombre, id_usuario)
-        self.usuarios_registrados[id_usuario] = nuevo_usuario
-        self.ids_registrados.add(id_usuario)  # Añadimos al conjunto de control
-        print(f"Usuario registrado: {nombre}")
-        return True
+        with self._candado_usuarios:
+            # Usamos el set para verificar unicidad rápidamente
+            existe = id_usuario in self.ids_registrados
+            if not existe:
+                nuevo_usuario = Usuario(nombre, id_usuario)
+                self.usuarios_registrados[id_usuario] = nuevo_usuario
+                self.ids_registrados.add(id_usuario)  # Añadimos al conjunto de control
+        if existe:
+            return self._emitir(False, "id_duplicado", f"Error: El ID de usuario {id_usuario} ya está registrado.")
+        return self._emitir(True, "ok", f"Usuario registrado: {nombre}")
 
     def dar_baja_usuario(self, id_usuario):
         """
@@ -180,62 +1056,120 @@ class Biblioteca:
             id_usuario: ID del usuario a eliminar.
 
         Returns:
-            bool: True si se eliminó, False si no existía.
+            Resultado: verdadero si se dio de baja; código "usuario_no_registrado" si no existía.
         """
-        if id_usuario in self.ids_registrados:
-            # Verificar si tiene libros prestados antes de borrar (opcional pero recomendado)
+        with self._candado_usuarios:
+            if id_usuario not in self.ids_registrados:
+                return self._emitir(False, "usuario_no_registrado", f"Error: Usuario {id_usuario} no encontrado.")
+
             usuario = self.usuarios_registrados[id_usuario]
-            if usuario.libros_prestados:
-                print(f"Advertencia: El usuario {usuario.nombre} tiene libros pendientes. Se dará de baja igualmente.")
+            # Primero deja de figurar como registrado: los préstamos y
+            # devoluciones lo comprueban con el candado del ISBN tomado, así
+            # que tras esperar a los que ya lo tenían nadie puede tocar sus libros.
+            self.ids_registrados.remove(id_usuario)  # Eliminamos del conjunto
+            self._esperar_candados_isbn()
+
+            # Sus reservas se anulan: si el ID se vuelve a registrar no hereda
+            # su puesto en las colas. list() copia las claves de una vez.
+            if self._conexion is None:
+                reservados = [isbn for isbn, id_reserva in list(self._reservas) if id_reserva == id_usuario]
+            else:
+                with self._candado_bd:
+                    reservados = [isbn for (isbn,) in self._conexion.execute(
+                        "SELECT isbn FROM reservas WHERE id_usuario = ?", (id_usuario,)
+                    ).fetchall()]
+            for isbn in reservados:
+                with self._candado_isbn(isbn):
+                    self._cargar_cola(isbn)
+                    self._anular_reserva(isbn, id_usuario)
+
+            # Verificar si tiene libros prestados antes de borrar (opcional pero recomendado)
+            entregas = []
+            pendientes = usuario.cantidad_prestamos()
+            if pendientes:
+                # Sus libros vuelven a quedar disponibles (o pasan a quien los reservó)
+                for libro in usuario.libros_prestados:
+                    with self._candado_isbn(libro.isbn), self._candado_bd:
+                        usuario.devolver_libro(libro.isbn)
+                        self.prestamos_activos.pop(libro.isbn, None)
+                        self._cerrar_registro(libro.isbn)
+                        siguiente = self._entregar_reserva(libro.isbn, excluir=id_usuario)
+                    if siguiente is not None:
+                        entregas.append((libro.isbn, siguiente))
 
             del self.usuarios_registrados[id_usuario]
-            self.ids_registrados.remove(id_usuario)  # Eliminamos del conjunto
-            print(f"Usuario {id_usuario} dado de baja.")
-            return True
-        print(f"Error: Usuario {id_usuario} no encontrado.")
-        return False
+        # Los mensajes se emiten ya sin el candado de usuarios
+        if pendientes:
+            self._emitir(True, "prestamos_pendientes",
+                         f"Advertencia: El usuario {usuario.nombre} tiene libros pendientes. "
+                         "Se dará de baja igualmente.")
+        resultado = self._emitir(True, "ok", f"Usuario {id_usuario} dado de baja.")
+        for isbn, siguiente in entregas:
+            self._emitir_entrega(isbn, siguiente)
+        return resultado
 
     # --- Gestión de Préstamos ---
 
-    def prestar_libro(self, isbn, id_usuario):
+    def prestar_libro(self, isbn, id_usuario, dias=None):
         """
         Gestiona el préstamo de un libro a un usuario.
 
         Args:
             isbn (str): ISBN del libro.
             id_usuario: ID del usuario.
+            dias (int): Plazo de devolución (por defecto, dias_prestamo).
+
+        Returns:
+            Resultado: verdadero si se realizó el préstamo; el código indica el motivo si no.
+        """
+        codigo, libro, usuario, _ = self._prestar(isbn, id_usuario, dias)
+        if codigo == "libro_no_encontrado":
+            mensaje = "Error: Libro no encontrado en el catálogo."
+        elif codigo == "usuario_no_registrado":
+            mensaje = "Error: Usuario no registrado."
+        elif codigo == "no_disponible":
+            mensaje = f"Error: El libro '{libro.titulo}' no está disponible (ya prestado)."
+        else:
+            mensaje = f"Préstamo exitoso: {libro.titulo} -> {usuario.nombre}"
+        return self._emitir(codigo == "ok", codigo, mensaje, libro)
+
+    def _prestar(self, isbn, id_usuario, dias=None):
+        """
+        Realiza el préstamo sin mostrar mensajes.
+
+        Returns:
+            tuple: (código, libro, usuario, vencimiento). El código es "ok", "libro_no_encontrado",
+            "usuario_no_registrado" o "no_disponible"; el vencimiento (datetime) solo con "ok".
         """
         # 1. Validar existencia del libro
         if isbn not in self.catalogo_libros:
-            print("Error: Libro no encontrado en el catálogo.")
-            return
+            return "libro_no_encontrado", None, None, None
 
         # 2. Validar existencia del usuario
         if id_usuario not in self.ids_registrados:
-            print("Error: Usuario no registrado.")
-            return
-
-        libro = self.catalogo_libros[isbn]
-        usuario = self.usuarios_registrados[id_usuario]
-
-        # 3. Verificar disponibilidad (si el libro está ya en la lista de algún usuario)
-        # En un sistema real, esto podría requerir buscar en todos los usuarios,
-        # pero aquí asumimos que si está en la lista del usuario actual o no está 'disponible'.
-        # Para simplificar y cumplir el requisito, verificaremos si el libro está prestado a CUALQUIER usuario.
-        esta_prestado = False
-        for user in self.usuarios_registrados.values():
-            for l_prestado in user.libros_prestados:
-                if l_prestado.isbn == isbn:
-                    esta_prestado = True
-                    break
-
-        if esta_prestado:
-            print(f"Error: El libro '{libro.titulo}' no está disponible (ya prestado).")
-            return
+            return "usuario_no_registrado", None, None, None
+
+        # 3 y 4. Verificar disponibilidad y prestar bajo el candado del ISBN,
+        # para que nadie pueda prestarlo entre la comprobación y el préstamo.
+        # El índice inverso dice si está prestado a CUALQUIER usuario.
+        with self._candado_isbn(isbn):
+            # quitar_libro y dar_baja_usuario pueden haberse ejecutado desde
+            # las validaciones; con el candado tomado ya no pueden colarse
+            if isbn not in self.catalogo_libros:
+                return "libro_no_encontrado", None, None, None
+            if id_usuario not in self.ids_registrados:
+                return "usuario_no_registrado", None, None, None
+            libro = self.catalogo_libros[isbn]
+            usuario = self.usuarios_registrados[id_usuario]
+            if isbn in self.prestamos_activos:
+                return "no_disponible", libro, usuario, None
+            usuario.prestar_libro(libro)
+            # El préstamo y su fila del historial se guardan en la misma transacción
+            with self._candado_bd:
+                self.prestamos_activos[isbn] = id_usuario
+                prestamo = self._abrir_registro(libro, id_usuario, dias)
 
-        # 4. Realizar el préstamo
-        usuario.prestar_libro(libro)
-        print(f"Préstamo exitoso: {libro.titulo} -> {usuario.nombre}")
+        return "ok", libro, usuario, prestamo.fecha_vencimiento
 
     def devolver_libro(self, isbn, id_usuario):
         """
@@ -244,17 +1178,321 @@ class Biblioteca:
         Args:
             isbn (str): ISBN del libro.
             id_usuario: ID del usuario.
+
+        Returns:
+            Resultado: verdadero si se registró la devolución; el código indica el motivo si no.
+        """
+        codigo, usuario, siguiente = self._devolver(isbn, id_usuario)
+        if codigo == "usuario_no_registrado":
+            mensaje = "Error: Usuario no registrado."
+        elif codigo == "no_prestado":
+            mensaje = f"Error: El usuario {usuario.nombre} no tiene el libro con ISBN {isbn}."
+        else:
+            mensaje = f"Devolución exitosa: ISBN {isbn} por {usuario.nombre}"
+        resultado = self._emitir(codigo == "ok", codigo, mensaje)
+        if siguiente is not None:
+            self._emitir_entrega(isbn, siguiente)
+        return resultado
+
+    def _devolver(self, isbn, id_usuario):
+        """
+        Registra la devolución sin mostrar mensajes. Si el libro tiene
+        reservas, se presta en el acto al primer usuario de la cola.
+
+        Returns:
+            tuple: (código, usuario, siguiente). El código es "ok", "usuario_no_registrado"
+            o "no_prestado"; 'siguiente' es el Usuario que recibió el libro por su reserva.
         """
         if id_usuario not in self.ids_registrados:
-            print("Error: Usuario no registrado.")
+            return "usuario_no_registrado", None, None
+
+        siguiente = None
+        with self._candado_isbn(isbn):
+            if id_usuario not in self.ids_registrados:
+                return "usuario_no_registrado", None, None  # Dado de baja mientras tanto
+            usuario = self.usuarios_registrados[id_usuario]
+            devuelto = usuario.devolver_libro(isbn)
+            if devuelto:
+                # La devolución, su fila del historial y la entrega a la
+                # primera reserva se guardan en la misma transacción
+                with self._candado_bd:
+                    self.prestamos_activos.pop(isbn, None)
+                    self._cerrar_registro(isbn)
+                    siguiente = self._entregar_reserva(isbn)
+
+        return ("ok" if devuelto else "no_prestado"), usuario, siguiente
+
+    def _abrir_registro(self, libro, id_usuario, dias):
+        """
+        Crea el registro del préstamo, lo añade al historial y lo devuelve. En
+        memoria se apila además en el montículo de vencimientos; con base de
+        datos el vencimiento se consulta en la tabla.
+        """
+        ahora = self._reloj()
+        plazo = timedelta(days=self.dias_prestamo if dias is None else dias)
+        prestamo = Prestamo(libro, id_usuario, ahora, ahora + plazo)
+        if self._conexion is not None:
+            self.historial_prestamos.append(prestamo)
+            return prestamo
+        self.registros_prestamo[libro.isbn] = prestamo
+        with self._candado_vencimientos:
+            self.historial_prestamos.append(prestamo)
+            self._apilar_vencimiento(prestamo)
+        return prestamo
+
+    def _apilar_vencimiento(self, prestamo):
+        heapq.heappush(self._vencimientos, (prestamo.fecha_vencimiento, self._secuencia_vencimientos, prestamo))
+        self._secuencia_vencimientos += 1
+
+    def _cerrar_registro(self, isbn):
+        """Marca el préstamo como devuelto; su entrada del montículo se descarta más tarde."""
+        if self._conexion is not None:
+            self.historial_prestamos.registrar_devolucion(isbn, self._reloj())
             return
+        prestamo = self.registros_prestamo.pop(isbn, None)
+        if prestamo is not None:
+            prestamo.fecha_devolucion = self._reloj()
 
-        usuario = self.usuarios_registrados[id_usuario]
+    def prestamos_vencidos(self, ahora=None):
+        """
+        Devuelve los préstamos activos cuya fecha de vencimiento ya pasó,
+        del más antiguo al más reciente.
+
+        Primero se retiran de la cima del montículo los préstamos ya cerrados;
+        después solo se recorren los nodos vencidos, así que el coste depende
+        de cuántos préstamos han vencido y no del total de préstamos. Con base
+        de datos se leen de la tabla del historial por su índice de vencimientos.
+        """
+        ahora = ahora or self._reloj()
+        if self._conexion is not None:
+            return self.historial_prestamos.vencidos(ahora)
+        with self._candado_vencimientos:
+            monticulo = self._vencimientos
+            while monticulo and not monticulo[0][2].activo:
+                heapq.heappop(monticulo)
+            if len(monticulo) > 2 * len(self.registros_prestamo) + 64:
+                # Demasiadas entradas cerradas: se reconstruye solo con las activas
+                monticulo[:] = [entrada for entrada in monticulo if entrada[2].activo]
+                heapq.heapify(monticulo)
+
+            vencidos = []
+            pendientes = [0] if monticulo else []
+            while pendientes:
+                i = pendientes.pop()
+                vencimiento, secuencia, prestamo = monticulo[i]
+                if vencimiento > ahora:
+                    continue  # Sus descendientes vencen todavía más tarde
+                if prestamo.activo:
+                    vencidos.append((vencimiento, secuencia, prestamo))
+                pendientes.extend(h for h in (2 * i + 1, 2 * i + 2) if h < len(monticulo))
+        return [prestamo for _, _, prestamo in sorted(vencidos)]
+
+    def quien_tiene(self, isbn):
+        """
+        Indica qué usuario tiene prestado un libro.
+
+        Args:
+            isbn (str): ISBN del libro.
+
+        Returns:
+            Usuario: Usuario que lo tiene, o None si está disponible.
+        """
+        id_usuario = self.prestamos_activos.get(isbn)
+        if id_usuario is None:
+            return None
+        # get(): puede haberse dado de baja justo después de leer el préstamo
+        return self.usuarios_registrados.get(id_usuario)
 
-        if usuario.devolver_libro(isbn):
-            print(f"Devolución exitosa: ISBN {isbn} por {usuario.nombre}")
+    # --- Reservas ---
+
+    def reservar_libro(self, isbn, id_usuario):
+        """
+        Pone a un usuario en la cola de espera de un libro prestado.
+
+        Args:
+            isbn (str): ISBN del libro.
+            id_usuario: ID del usuario.
+
+        Returns:
+            Resultado: verdadero si se registró la reserva; el código indica el motivo si no.
+        """
+        codigo, libro, usuario, posicion = self._reservar(isbn, id_usuario)
+        if codigo == "libro_no_encontrado":
+            mensaje = "Error: Libro no encontrado en el catálogo."
+        elif codigo == "usuario_no_registrado":
+            mensaje = "Error: Usuario no registrado."
+        elif codigo == "disponible":
+            mensaje = f"Error: El libro '{libro.titulo}' está disponible; puede pedirlo prestado."
+        elif codigo == "ya_lo_tiene":
+            mensaje = f"Error: {usuario.nombre} ya tiene el libro '{libro.titulo}'."
+        elif codigo == "ya_reservado":
+            mensaje = f"Error: {usuario.nombre} ya está en la cola de '{libro.titulo}'."
         else:
-            print(f"Error: El usuario {usuario.nombre} no tiene el libro con ISBN {isbn}.")
+            mensaje = f"Reserva registrada: {libro.titulo} -> {usuario.nombre} (posición {posicion})"
+        return self._emitir(codigo == "ok", codigo, mensaje, libro)
+
+    def _reservar(self, isbn, id_usuario):
+        """
+        Registra la reserva sin mostrar mensajes.
+
+        Returns:
+            tuple: (código, libro, usuario, posición en la cola). El código es "ok",
+            "libro_no_encontrado", "usuario_no_registrado", "disponible", "ya_lo_tiene"
+            o "ya_reservado".
+        """
+        if isbn not in self.catalogo_libros:
+            return "libro_no_encontrado", None, None, None
+        if id_usuario not in self.ids_registrados:
+            return "usuario_no_registrado", None, None, None
+
+        # Bajo el candado del ISBN: el libro no puede devolverse (y entregarse
+        # a la cola) entre la comprobación y el alta de la reserva.
+        with self._candado_isbn(isbn):
+            # Mismas comprobaciones que en _prestar, ahora con el candado tomado
+            if isbn not in self.catalogo_libros:
+                return "libro_no_encontrado", None, None, None
+            if id_usuario not in self.ids_registrados:
+                return "usuario_no_registrado", None, None, None
+            libro = self.catalogo_libros[isbn]
+            usuario = self.usuarios_registrados[id_usuario]
+            poseedor = self.prestamos_activos.get(isbn)
+            if poseedor is None:
+                return "disponible", libro, usuario, None
+            if poseedor == id_usuario:
+                return "ya_lo_tiene", libro, usuario, None
+            self._cargar_cola(isbn)
+            if (isbn, id_usuario) in self._reservas:
+                return "ya_reservado", libro, usuario, None
+
+            ahora = self._reloj()
+            cola = self.colas_reserva.setdefault(isbn, deque())
+            self._purgar_cola(cola, ahora)
+            reserva = Reserva(isbn, id_usuario, ahora, ahora + timedelta(days=self.dias_reserva))
+            cola.append(reserva)
+            self._guardar_reserva(reserva)
+            posicion = len(cola)
+
+        return "ok", libro, usuario, posicion
+
+    def cancelar_reserva(self, isbn, id_usuario):
+        """
+        Retira a un usuario de la cola de un libro.
+
+        Returns:
+            bool: True si tenía una reserva vigente.
+        """
+        with self._candado_isbn(isbn):
+            self._cargar_cola(isbn)
+            return self._anular_reserva(isbn, id_usuario) is not None
+
+    def _cargar_cola(self, isbn):
+        """
+        Devuelve la cola de reservas del libro, o None si no tiene. Con base
+        de datos se lee de la tabla la primera vez que se necesita y se queda
+        en memoria hasta vaciarse. Debe llamarse con el candado del ISBN tomado.
+        """
+        cola = self.colas_reserva.get(isbn)
+        if cola is not None or self._conexion is None:
+            return cola
+        with self._candado_bd:
+            filas = self._conexion.execute(
+                "SELECT id_usuario, fecha_reserva, fecha_vencimiento FROM reservas WHERE isbn = ? ORDER BY id",
+                (isbn,)
+            ).fetchall()
+        if not filas:
+            return None
+        cola = self.colas_reserva[isbn] = deque()
+        for id_usuario, fecha_reserva, fecha_vencimiento in filas:
+            reserva = Reserva(isbn, id_usuario, datetime.fromisoformat(fecha_reserva),
+                              datetime.fromisoformat(fecha_vencimiento))
+            cola.append(reserva)
+            self._reservas[(isbn, id_usuario)] = reserva
+        return cola
+
+    def _guardar_reserva(self, reserva):
+        """Registra la reserva vigente (y la escribe en la base de datos, si se usa)."""
+        self._reservas[(reserva.isbn, reserva.id_usuario)] = reserva
+        if self._conexion is not None:
+            with self._candado_bd:
+                self._conexion.execute(
+                    "INSERT INTO reservas (isbn, id_usuario, fecha_reserva, fecha_vencimiento) VALUES (?, ?, ?, ?)",
+                    (reserva.isbn, reserva.id_usuario, reserva.fecha_reserva.isoformat(),
+                     reserva.fecha_vencimiento.isoformat())
+                )
+
+    def _anular_reserva(self, isbn, id_usuario):
+        """
+        Quita la reserva vigente, si la hay, y la devuelve. Su entrada de la
+        cola se descarta cuando llega al frente.
+        """
+        reserva = self._reservas.pop((isbn, id_usuario), None)
+        if reserva is not None and self._conexion is not None:
+            with self._candado_bd:
+                self._conexion.execute("DELETE FROM reservas WHERE isbn = ? AND id_usuario = ?", (isbn, id_usuario))
+        return reserva
+
+    def cola_reserva(self, isbn):
+        """Devuelve los IDs de usuario con reserva vigente para un libro, en orden de llegada."""
+        ahora = self._reloj()
+        with self._candado_isbn(isbn):
+            cola = self._cargar_cola(isbn) or ()
+            return [
+                reserva.id_usuario for reserva in cola
+                if self._reservas.get((isbn, reserva.id_usuario)) is reserva
+                and reserva.fecha_vencimiento >= ahora
+            ]
+
+    def _purgar_cola(self, cola, ahora):
+        """
+        Descarta del frente de la cola las reservas canceladas o caducadas.
+        Todas duran lo mismo, así que las caducadas siempre están al frente.
+        """
+        while cola:
+            reserva = cola[0]
+            clave = (reserva.isbn, reserva.id_usuario)
+            if self._reservas.get(clave) is not reserva:
+                cola.popleft()  # Cancelada (o sustituida por una reserva posterior)
+            elif reserva.fecha_vencimiento < ahora or reserva.id_usuario not in self.ids_registrados:
+                cola.popleft()
+                self._anular_reserva(*clave)
+            else:
+                break
+
+    def _entregar_reserva(self, isbn, excluir=None):
+        """
+        Presta el libro recién liberado al primer usuario de la cola con la
+        reserva vigente. Debe llamarse con el candado del ISBN tomado.
+
+        Returns:
+            Usuario: quien recibió el libro, o None si no quedaba nadie esperando.
+        """
+        cola = self._cargar_cola(isbn)
+        if not cola:
+            return None
+
+        ahora = self._reloj()
+        siguiente = None
+        while cola:
+            self._purgar_cola(cola, ahora)
+            if not cola:
+                break
+            reserva = cola.popleft()
+            self._anular_reserva(isbn, reserva.id_usuario)
+            if reserva.id_usuario == excluir:
+                continue
+            siguiente = self.usuarios_registrados[reserva.id_usuario]
+            libro = self.catalogo_libros[isbn]
+            siguiente.prestar_libro(libro)
+            self.prestamos_activos[isbn] = reserva.id_usuario
+            self._abrir_registro(libro, reserva.id_usuario, None)
+            break
+
+        if not cola:
+            del self.colas_reserva[isbn]
+        return siguiente
+
+    def _emitir_entrega(self, isbn, usuario):
+        self._emitir(True, "reserva_entregada", f"Reserva atendida: ISBN {isbn} -> {usuario.nombre}")
 
     # --- Búsquedas ---
 
@@ -266,45 +1504,104 @@ class Biblioteca:
             criterio (str): Texto a buscar.
             tipo (str): 'titulo', 'autor' o 'categoria'.
 
+        Returns:
+            list: Lista de libros encontrados (en orden de alta en el catálogo).
+        """
+        self._asegurar_indices()
+        if tipo not in self.indices:
+            return []
+        with self._candado_catalogo:
+            return self._libros_de(self.indices[tipo].subcadena(criterio.lower()))
+
+    def buscar_libros_combinado(self, titulo=None, autor=None, categoria=None):
+        """
+        Busca libros que cumplan TODOS los criterios indicados (subcadenas).
+        Se intersectan los resultados de cada índice, empezando por el menor.
+
         Returns:
             list: Lista de libros encontrados.
         """
-        resultados = []
-        criterio = criterio.lower()
+        self._asegurar_indices()
+        criterios = {"titulo": titulo, "autor": autor, "categoria": categoria}
+        with self._candado_catalogo:
+            conjuntos = sorted(
+                (self.indices[campo].subcadena(valor.lower())
+                 for campo, valor in criterios.items() if valor is not None),
+                key=len
+            )
+            if not conjuntos:
+                return self._libros_de(self.catalogo_libros)
+            return self._libros_de(conjuntos[0].intersection(*conjuntos[1:]))
+
+    def libros_por_categoria(self, categoria):
+        """Libros cuya categoría es exactamente la indicada (sin distinguir mayúsculas)."""
+        self._asegurar_indices()
+        with self._candado_catalogo:
+            return self._libros_de(self.indices["categoria"].exacto(categoria))
+
+    def libros_por_autor(self, autor):
+        """Libros cuyo autor es exactamente el indicado (sin distinguir mayúsculas)."""
+        self._asegurar_indices()
+        with self._candado_catalogo:
+            return self._libros_de(self.indices["autor"].exacto(autor))
+
+    def buscar_por_palabra(self, palabra, tipo="titulo"):
+        """Libros cuyo campo 'tipo' contiene la palabra completa."""
+        self._asegurar_indices()
+        if tipo not in self.indices:
+            return []
+        with self._candado_catalogo:
+            return self._libros_de(self.indices[tipo].palabra(palabra))
+
+    def buscar_texto(self, consulta, k=10, cursor=None):
+        """
+        Búsqueda de texto completo ordenada por relevancia (BM25) en título,
+        autor y categoría, sin distinguir tildes ni mayúsculas.
 
-        for libro in self.catalogo_libros.values():
-            coincide = False
-            if tipo == "titulo" and criterio in libro.titulo.lower():
-                coincide = True
-            elif tipo == "autor" and criterio in libro.autor.lower():
-                coincide = True
-            elif tipo == "categoria" and criterio in libro.categoria.lower():
-                coincide = True
+        Args:
+            consulta (str): Palabras a buscar.
+            k (int): Tamaño máximo de la página.
+            cursor: Valor devuelto por la llamada anterior para seguir paginando.
 
-            if coincide:
-                resultados.append(libro)
+        Returns:
+            tuple: (lista de (Libro, puntuación), cursor de la página siguiente o None).
+        """
+        self._asegurar_indices()
+        with self._candado_catalogo:
+            resultados, siguiente = self.motor_busqueda.buscar(consulta, k, cursor)
+            return [(self.catalogo_libros[isbn], puntuacion) for isbn, puntuacion in resultados], siguiente
 
-        return resultados
+    def _libros_de(self, isbns):
+        """
+        Convierte un conjunto de ISBNs en la lista de libros, en orden de
+        catálogo. Se llama con el candado del catálogo tomado, igual que la
+        consulta a los índices: añadir_libro y quitar_libro los modifican.
+        """
+        return [self.catalogo_libros[isbn] for isbn in sorted(isbns, key=self._orden_catalogo.__getitem__)]
 
     def listar_prestamos_usuario(self, id_usuario):
         """
-        Muestra los libros actualmente prestados a un usuario.
+        Emite el listado de los libros actualmente prestados a un usuario.
 
         Args:
             id_usuario: ID del usuario.
+
+        Returns:
+            Resultado: con la lista de libros como objeto; código "usuario_no_registrado"
+            si el usuario no existe.
         """
         if id_usuario not in self.ids_registrados:
-            print("Usuario no encontrado.")
-            return
+            return self._emitir(False, "usuario_no_registrado", "Usuario no encontrado.")
 
         usuario = self.usuarios_registrados[id_usuario]
-        print(f"\n--- Libros prestados a {usuario.nombre} ---")
-        if not usuario.libros_prestados:
-            print("No tiene libros prestados.")
+        prestados = usuario.listar_prestamos()
+        lineas = [f"\n--- Libros prestados a {usuario.nombre} ---"]
+        if not prestados:
+            lineas.append("No tiene libros prestados.")
         else:
-            for libro in usuario.libros_prestados:
-                print(f"- {libro}")
-        print("-----------------------------------------\n")
+            lineas.extend(f"- {libro}" for libro in prestados)
+        lineas.append("-----------------------------------------\n")
+        return self._emitir(True, "ok", "\n".join(lineas), prestados)
 
 
 # ==========================================
@@ -339,6 +1636,9 @@ if __name__ == "__main__":
     encontrados = mi_biblioteca.buscar_libros("novela", tipo="categoria")
     print(f"Búsqueda por categoría 'novela': {encontrados}")
 
+    encontrados, _ = mi_biblioteca.buscar_texto("garcia marquez")
+    print(f"Búsqueda de texto 'garcia marquez': {[libro for libro, _ in encontrados]}")
+
     print("\n=== 4. Realizando Préstamos ===")
     mi_biblioteca.prestar_libro("978-0001", 101)  # Ana presta Cien Años
     mi_biblioteca.prestar_libro("978-0002", 101)  # Ana presta Principito
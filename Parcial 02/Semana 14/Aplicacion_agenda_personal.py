@@ -1,13 +1,51 @@
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
+from datetime import date, datetime, timedelta
 from tkcalendar import DateEntry  # Necesario instalar: pip install tkcalendar
 
+# Módulos compartidos entre semanas (carpeta "comun" de este parcial)
+_COMUN = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+if _COMUN not in sys.path:
+    sys.path.insert(0, _COMUN)
+
+from agenda_eventos import AgendaEventos
+from trabajos_tk import TrabajosTk
+
+DIAS_VENTANA = 7      # La lista muestra una semana cada vez
+CANTIDAD_PROXIMOS = 20
+
+
+def inicio_semana(dia):
+    """Lunes a las 00:00 de la semana que contiene 'dia'."""
+    return datetime.combine(dia - timedelta(days=dia.weekday()), datetime.min.time())
+
+
 class AgendaApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Agenda Personal")
         self.root.geometry("600x400")
 
+        # Los eventos se guardan ordenados en la agenda; la tabla solo muestra
+        # la consulta actual (una semana o los próximos eventos)
+        self.agenda = AgendaEventos()
+        self.trabajos = TrabajosTk(root)
+        self.inicio_ventana = inicio_semana(date.today())
+        self.modo = "semana"  # "semana" o "proximos"
+
+        # --- Frame de navegación por la agenda ---
+        frame_ventana = ttk.Frame(self.root)
+        frame_ventana.pack(fill="x", padx=10, pady=(10, 0))
+
+        ttk.Button(frame_ventana, text="◀", width=3, command=lambda: self.mover_ventana(-DIAS_VENTANA)).pack(side="left")
+        ttk.Button(frame_ventana, text="Esta semana", command=self.ir_a_hoy).pack(side="left", padx=5)
+        ttk.Button(frame_ventana, text="▶", width=3, command=lambda: self.mover_ventana(DIAS_VENTANA)).pack(side="left")
+        ttk.Button(frame_ventana, text="Próximos", command=self.mostrar_proximos).pack(side="left", padx=5)
+        self.etiqueta_ventana = ttk.Label(frame_ventana)
+        self.etiqueta_ventana.pack(side="right")
+
         # --- Frame principal para la lista de eventos ---
         frame_lista = ttk.Frame(self.root)
         frame_lista.pack(fill="both", expand=True, padx=10, pady=10)
@@ -36,6 +74,11 @@ class AgendaApp:
         self.desc_entry = ttk.Entry(frame_inputs, width=40)
         self.desc_entry.grid(row=1, column=1, columnspan=3, padx=5, pady=5)
 
+        ttk.Label(frame_inputs, text="Duración (min):").grid(row=0, column=4, padx=5, pady=5)
+        self.duracion_entry = ttk.Entry(frame_inputs, width=6)
+        self.duracion_entry.insert(0, "60")
+        self.duracion_entry.grid(row=0, column=5, padx=5, pady=5)
+
         # --- Frame para botones ---
         frame_botones = ttk.Frame(self.root)
         frame_botones.pack(fill="x", padx=10, pady=10)
@@ -44,20 +87,94 @@ class AgendaApp:
         ttk.Button(frame_botones, text="Eliminar Evento Seleccionado", command=self.eliminar_evento).pack(side="left", padx=5)
         ttk.Button(frame_botones, text="Salir", command=self.root.quit).pack(side="right", padx=5)
 
+        self.refrescar()
+
+    # --- Ventana de eventos mostrada ---
+
+    def refrescar(self):
+        """
+        Repite la consulta actual en segundo plano. Con la misma clave, una
+        consulta nueva reemplaza a la anterior si aún no se había mostrado.
+        """
+        if self.modo == "semana":
+            fin = self.inicio_ventana + timedelta(days=DIAS_VENTANA)
+            ultimo_dia = fin - timedelta(days=1)
+            self.etiqueta_ventana.config(text=f"Del {self.inicio_ventana:%d/%m/%Y} al {ultimo_dia:%d/%m/%Y}")
+            self.trabajos.enviar(self.agenda.entre, self.inicio_ventana, fin,
+                                 clave="ventana", al_terminar=self._mostrar_eventos)
+        else:
+            self.etiqueta_ventana.config(text=f"Próximos {CANTIDAD_PROXIMOS} eventos")
+            self.trabajos.enviar(self.agenda.proximos, datetime.now(), CANTIDAD_PROXIMOS,
+                                 clave="ventana", al_terminar=self._mostrar_eventos)
+
+    def _mostrar_eventos(self, eventos):
+        self.tree.delete(*self.tree.get_children())
+        for evento in eventos:
+            horario = f"{evento.inicio:%H:%M}-{evento.fin:%H:%M}"
+            self.tree.insert("", "end", iid=str(evento.id),
+                             values=(f"{evento.inicio:%d/%m/%Y}", horario, evento.descripcion))
+
+    def mover_ventana(self, dias):
+        self.modo = "semana"
+        self.inicio_ventana += timedelta(days=dias)
+        self.refrescar()
+
+    def ir_a_hoy(self):
+        self.modo = "semana"
+        self.inicio_ventana = inicio_semana(date.today())
+        self.refrescar()
+
+    def mostrar_proximos(self):
+        self.modo = "proximos"
+        self.refrescar()
+
+    # --- Eventos ---
+
     def agregar_evento(self):
         """Agrega un nuevo evento a la lista"""
-        fecha = self.fecha_entry.get()
+        fecha = self.fecha_entry.get_date()
         hora = self.hora_entry.get()
         desc = self.desc_entry.get()
 
         if not hora or not desc:
             messagebox.showwarning("Campos incompletos", "Por favor ingresa la hora y la descripción.")
             return
+        try:
+            inicio = datetime.combine(fecha, datetime.strptime(hora.strip(), "%H:%M").time())
+        except ValueError:
+            messagebox.showwarning("Hora inválida", "Escribe la hora como HH:MM (por ejemplo, 09:30).")
+            return
+        try:
+            duracion = timedelta(minutes=int(self.duracion_entry.get()))
+            if duracion <= timedelta(0):
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("Duración inválida", "La duración debe ser un número de minutos mayor que 0.")
+            return
+
+        # Detección de conflictos en segundo plano (árbol de intervalos de la agenda);
+        # con la misma clave, pulsar otra vez reemplaza a la consulta anterior
+        self.trabajos.enviar(self.agenda.solapados, inicio, inicio + duracion, clave="conflictos",
+                             al_terminar=lambda conflictos: self._agregar_si_confirma(fecha, inicio, desc, duracion, conflictos))
 
-        self.tree.insert("", "end", values=(fecha, hora, desc))
+    def _agregar_si_confirma(self, fecha, inicio, desc, duracion, conflictos):
+        """Agrega el evento una vez conocidos sus conflictos (en el hilo de Tk)."""
+        if conflictos:
+            primero = conflictos[0]
+            pregunta = (f"El evento se solapa con {len(conflictos)} evento(s), por ejemplo "
+                        f"\"{primero.descripcion}\" ({primero.inicio:%d/%m/%Y %H:%M}). ¿Agregarlo de todos modos?")
+            if not messagebox.askyesno("Conflicto de horario", pregunta):
+                return
+
+        self.agenda.agregar(inicio, desc, duracion)
         self.hora_entry.delete(0, tk.END)
         self.desc_entry.delete(0, tk.END)
 
+        # Se muestra la semana del evento recién agregado
+        if self.modo == "semana":
+            self.inicio_ventana = inicio_semana(fecha)
+        self.refrescar()
+
     def eliminar_evento(self):
         """Elimina el evento seleccionado con confirmación"""
         seleccionado = self.tree.selection()
@@ -67,10 +184,14 @@ class AgendaApp:
 
         confirmacion = messagebox.askyesno("Confirmar eliminación", "¿Seguro que deseas eliminar el evento?")
         if confirmacion:
-            self.tree.delete(seleccionado)
+            for iid in seleccionado:
+                self.agenda.eliminar(int(iid))
+            self.tree.delete(*seleccionado)
+            self.refrescar()  # En "Próximos" entra el siguiente evento
 
 # --- Programa principal ---
 if __name__ == "__main__":
     root = tk.Tk()
     app = AgendaApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.trabajos.cerrar()
@@ -0,0 +1,254 @@
+"""
+Agenda de eventos ordenada por fecha y hora
+-------------------------------------------
+Guarda los eventos sin depender de Tkinter, ordenados por su hora de
+inicio (un datetime ya interpretado, no el texto del formulario), en un
+árbol de intervalos: un treap (árbol binario con prioridades aleatorias)
+ordenado por (inicio, ID) donde cada nodo guarda además el fin más tardío
+de su subárbol. Con n eventos y k resultados:
+
+- Eventos entre t1 y t2: O(log n + k).
+- Próximos N eventos desde un instante: O(log n + N).
+- Eventos que se solapan con un intervalo: O(log n + k·log n), sea cual
+  sea la duración de los eventos: los subárboles cuyo fin más tardío no
+  llega al intervalo se saltan enteros. El fin más tardío se recalcula al
+  agregar y al eliminar, así que un evento largo ya borrado no cuenta.
+- Agregar y eliminar: O(log n).
+
+Las operaciones usan un candado para poder consultar desde otro hilo
+mientras la interfaz agrega o elimina eventos.
+"""
+
+import itertools
+import random
+import threading
+from datetime import timedelta
+
+
+class Evento:
+    """
+    Un evento con inicio y fin (datetime) y su descripción. Es a la vez el
+    nodo del árbol; los atributos con guion bajo son del árbol y no deben
+    tocarse desde fuera.
+    """
+
+    __slots__ = ("id", "inicio", "fin", "descripcion", "_izq", "_der", "_prioridad", "_fin_max")
+
+    def __init__(self, id_evento, inicio, fin, descripcion):
+        self.id = id_evento
+        self.inicio = inicio
+        self.fin = fin
+        self.descripcion = descripcion
+        self._izq = None
+        self._der = None
+        self._prioridad = random.random()
+        self._fin_max = fin  # Fin más tardío del subárbol
+
+    def __repr__(self):
+        return f"Evento({self.id}, {self.inicio:%Y-%m-%d %H:%M}-{self.fin:%H:%M}, {self.descripcion!r})"
+
+
+# --- Operaciones del árbol (funciones auxiliares) ---
+
+def _recalcular(nodo):
+    fin_max = nodo.fin
+    if nodo._izq is not None and nodo._izq._fin_max > fin_max:
+        fin_max = nodo._izq._fin_max
+    if nodo._der is not None and nodo._der._fin_max > fin_max:
+        fin_max = nodo._der._fin_max
+    nodo._fin_max = fin_max
+
+
+def _unir(a, b):
+    """Une dos árboles: todos los eventos de 'a' van antes que los de 'b'."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a._prioridad > b._prioridad:
+        a._der = _unir(a._der, b)
+        _recalcular(a)
+        return a
+    b._izq = _unir(a, b._izq)
+    _recalcular(b)
+    return b
+
+
+def _partir(nodo, clave):
+    """Parte el árbol en (eventos con (inicio, id) < clave, resto)."""
+    if nodo is None:
+        return None, None
+    if (nodo.inicio, nodo.id) < clave:
+        izq, der = _partir(nodo._der, clave)
+        nodo._der = izq
+        _recalcular(nodo)
+        return nodo, der
+    izq, der = _partir(nodo._izq, clave)
+    nodo._izq = der
+    _recalcular(nodo)
+    return izq, nodo
+
+
+def _desde(nodo, inicio):
+    """Recorre en orden los eventos que empiezan en 'inicio' o después."""
+    pila = []
+    while nodo is not None or pila:
+        if nodo is not None:
+            if nodo.inicio >= inicio:
+                pila.append(nodo)
+                nodo = nodo._izq
+            else:
+                nodo = nodo._der  # Todo su subárbol izquierdo empieza antes
+        else:
+            nodo = pila.pop()
+            yield nodo
+            nodo = nodo._der
+
+
+def _construir(nodos):
+    """
+    Construye en O(n) el árbol con los nodos ya ordenados (árbol cartesiano
+    por prioridad con una pila) y calcula el fin más tardío de cada subárbol.
+    """
+    pila = []
+    for nodo in nodos:
+        ultimo = None
+        while pila and pila[-1]._prioridad < nodo._prioridad:
+            ultimo = pila.pop()
+        nodo._izq = ultimo
+        nodo._der = None
+        if pila:
+            pila[-1]._der = nodo
+        pila.append(nodo)
+    if not pila:
+        return None
+
+    raiz = pila[0]
+    # Recorrido en postorden sin recursión para fijar el fin más tardío
+    pendientes = [(raiz, False)]
+    while pendientes:
+        nodo, hijos_listos = pendientes.pop()
+        if hijos_listos:
+            _recalcular(nodo)
+            continue
+        pendientes.append((nodo, True))
+        for hijo in (nodo._izq, nodo._der):
+            if hijo is not None:
+                pendientes.append((hijo, False))
+    return raiz
+
+
+class AgendaEventos:
+    """Eventos ordenados por hora de inicio, con consultas por rango."""
+
+    DURACION_POR_DEFECTO = timedelta(hours=1)
+
+    def __init__(self):
+        self._raiz = None
+        self._por_id = {}   # ID -> Evento
+        self._siguiente_id = 1
+        self._candado = threading.Lock()
+
+    def __len__(self):
+        return len(self._por_id)
+
+    def obtener(self, id_evento):
+        """Devuelve el Evento con ese ID (KeyError si no existe)."""
+        return self._por_id[id_evento]
+
+    # --- Cambios ---
+
+    def _nuevo(self, inicio, descripcion, duracion):
+        if duracion <= timedelta(0):
+            raise ValueError("La duración del evento debe ser positiva")
+        evento = Evento(self._siguiente_id, inicio, inicio + duracion, descripcion)
+        self._siguiente_id += 1
+        self._por_id[evento.id] = evento
+        return evento
+
+    def agregar(self, inicio, descripcion, duracion=DURACION_POR_DEFECTO):
+        """Añade un evento en su sitio del orden y lo devuelve."""
+        with self._candado:
+            evento = self._nuevo(inicio, descripcion, duracion)
+            # A igual inicio, el más nuevo (ID mayor) va detrás
+            antes, despues = _partir(self._raiz, (evento.inicio, evento.id))
+            self._raiz = _unir(_unir(antes, evento), despues)
+            return evento
+
+    def agregar_muchos(self, eventos):
+        """
+        Añade muchos eventos, dados como (inicio, descripcion) o
+        (inicio, descripcion, duracion), reordenando una sola vez.
+
+        Returns:
+            list: Los IDs asignados, en el mismo orden.
+        """
+        with self._candado:
+            nuevos = [self._nuevo(*datos) if len(datos) == 3 else self._nuevo(*datos, self.DURACION_POR_DEFECTO)
+                      for datos in eventos]
+            # Los existentes ya están en orden; sort aprovecha ese tramo ordenado
+            todos = self._en_orden()
+            todos.extend(nuevos)
+            todos.sort(key=lambda evento: (evento.inicio, evento.id))
+            self._raiz = _construir(todos)
+            return [evento.id for evento in nuevos]
+
+    def eliminar(self, id_evento):
+        """Elimina el evento y lo devuelve (KeyError si no existe)."""
+        with self._candado:
+            evento = self._por_id.pop(id_evento)
+            antes, resto = _partir(self._raiz, (evento.inicio, evento.id))
+            _, despues = _partir(resto, (evento.inicio, evento.id + 1))
+            self._raiz = _unir(antes, despues)
+            evento._izq = evento._der = None
+            evento._fin_max = evento.fin
+            return evento
+
+    # --- Consultas ---
+
+    def _en_orden(self):
+        """Todos los eventos en orden (llamar con el candado tomado)."""
+        eventos = []
+        pila = []
+        nodo = self._raiz
+        while nodo is not None or pila:
+            if nodo is not None:
+                pila.append(nodo)
+                nodo = nodo._izq
+            else:
+                nodo = pila.pop()
+                eventos.append(nodo)
+                nodo = nodo._der
+        return eventos
+
+    def entre(self, desde, hasta):
+        """Eventos que empiezan en [desde, hasta), en orden."""
+        with self._candado:
+            return list(itertools.takewhile(lambda evento: evento.inicio < hasta, _desde(self._raiz, desde)))
+
+    def proximos(self, desde, cantidad):
+        """Los 'cantidad' primeros eventos que empiezan en 'desde' o después."""
+        with self._candado:
+            return list(itertools.islice(_desde(self._raiz, desde), cantidad))
+
+    def solapados(self, desde, hasta):
+        """Eventos que ocupan parte de [desde, hasta), en orden de inicio."""
+        with self._candado:
+            resultado = []
+            pila = []
+            nodo = self._raiz
+            while True:
+                # Un subárbol cuyo fin más tardío no pasa de 'desde' no tiene nada que solape
+                if nodo is not None and nodo._fin_max > desde:
+                    pila.append(nodo)
+                    nodo = nodo._izq
+                elif pila:
+                    nodo = pila.pop()
+                    if nodo.inicio >= hasta:
+                        break  # En orden: todos los que quedan empiezan después
+                    if nodo.fin > desde:
+                        resultado.append(nodo)
+                    nodo = nodo._der
+                else:
+                    break
+            return resultado
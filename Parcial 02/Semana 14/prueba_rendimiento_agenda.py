@@ -0,0 +1,128 @@
+import bisect
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from agenda_eventos import AgendaEventos
+
+# -------------------------------
+# Prueba de rendimiento: detección de conflictos (solapados) en una agenda
+# de 1 millón de eventos repartidos en 5 años. Casi todos duran de 15 min a
+# 3 h, pero hay algunos de varios días y unos pocos de todo un año. Como
+# referencia se mide la ventana de antes: listas ordenadas y búsqueda desde
+# "desde - duración máxima", que con un solo evento de un año revisa un año
+# entero de eventos y no mejora al borrarlo.
+# -------------------------------
+NUM_EVENTOS = 1_000_000
+EVENTOS_LARGOS = 1000  # De 1 a 30 días
+EVENTOS_DE_UN_AÑO = 5
+CONSULTAS = 500
+CAMBIOS = 20_000
+INICIO = datetime(2026, 1, 1)
+AÑOS = 5
+
+
+def crear_eventos(azar):
+    minutos_totales = AÑOS * 365 * 24 * 60
+    eventos = [(INICIO + timedelta(minutes=azar.randrange(minutos_totales)), f"Evento {i}",
+                timedelta(minutes=azar.choice((15, 30, 45, 60, 90, 120, 180))))
+               for i in range(NUM_EVENTOS - EVENTOS_LARGOS - EVENTOS_DE_UN_AÑO)]
+    eventos += [(INICIO + timedelta(minutes=azar.randrange(minutos_totales)), f"Congreso {i}",
+                 timedelta(days=azar.randint(1, 30))) for i in range(EVENTOS_LARGOS)]
+    eventos += [(INICIO + timedelta(days=365 * i), f"Curso {i}", timedelta(days=365))
+                for i in range(EVENTOS_DE_UN_AÑO)]
+    azar.shuffle(eventos)
+    return eventos
+
+
+class VentanaDuracionMaxima:
+    """Referencia (la versión anterior): listas ordenadas y la duración máxima que nunca baja."""
+
+    def __init__(self, eventos):
+        self.eventos = sorted(eventos, key=lambda evento: (evento.inicio, evento.id))
+        self.inicios = [evento.inicio for evento in self.eventos]
+        self.duracion_maxima = max(evento.fin - evento.inicio for evento in self.eventos)
+
+    def solapados(self, desde, hasta):
+        inicio = bisect.bisect_right(self.inicios, desde - self.duracion_maxima)
+        fin = bisect.bisect_left(self.inicios, hasta, lo=inicio)
+        return [evento for evento in self.eventos[inicio:fin] if evento.fin > desde]
+
+
+def percentiles(tiempos):
+    cortes = statistics.quantiles(tiempos, n=100)
+    return f"p50 {cortes[49] * 1e3:8.3f} ms | p99 {cortes[98] * 1e3:8.3f} ms"
+
+
+def consultas(azar):
+    minutos_totales = AÑOS * 365 * 24 * 60
+    intervalos = []
+    for _ in range(CONSULTAS):
+        desde = INICIO + timedelta(minutes=azar.randrange(minutos_totales))
+        intervalos.append((desde, desde + timedelta(minutes=azar.choice((30, 60, 120)))))
+    return intervalos
+
+
+def medir(nombre, solapados, intervalos):
+    tiempos, resultados = [], []
+    for desde, hasta in intervalos:
+        inicio = time.perf_counter()
+        resultados.append(solapados(desde, hasta))
+        tiempos.append(time.perf_counter() - inicio)
+    encontrados = sum(map(len, resultados)) / len(resultados)
+    print(f"{nombre:<34}: {percentiles(tiempos)} | {encontrados:.1f} conflictos por consulta")
+    return [[evento.id for evento in lista] for lista in resultados]
+
+
+def comprobar_con_recorrido(agenda, intervalos):
+    """Unas pocas consultas contra el recorrido de todos los eventos."""
+    todos = list(agenda._por_id.values())
+    for desde, hasta in intervalos[:20]:
+        esperado = sorted((evento for evento in todos if evento.inicio < hasta and evento.fin > desde),
+                          key=lambda evento: (evento.inicio, evento.id))
+        assert [evento.id for evento in agenda.solapados(desde, hasta)] == [evento.id for evento in esperado]
+
+
+def medir_cambios(agenda, azar):
+    minutos_totales = AÑOS * 365 * 24 * 60
+    inicio = time.perf_counter()
+    nuevos = [agenda.agregar(INICIO + timedelta(minutes=azar.randrange(minutos_totales)), "Nuevo").id
+              for _ in range(CAMBIOS)]
+    agregar = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for id_evento in nuevos:
+        agenda.eliminar(id_evento)
+    eliminar = time.perf_counter() - inicio
+    print(f"agregar {agregar / CAMBIOS * 1e6:.1f} µs | eliminar {eliminar / CAMBIOS * 1e6:.1f} µs "
+          f"(media de {CAMBIOS:,})")
+
+
+if __name__ == "__main__":
+    azar = random.Random(14)
+    agenda = AgendaEventos()
+    eventos = crear_eventos(azar)
+    inicio = time.perf_counter()
+    agenda.agregar_muchos(eventos)
+    print(f"{len(agenda):,} eventos cargados en {time.perf_counter() - inicio:.1f} s")
+    intervalos = consultas(azar)
+
+    referencia = VentanaDuracionMaxima(agenda._por_id.values())
+    arbol = medir("Árbol de intervalos", agenda.solapados, intervalos)
+    ventana = medir("Ventana por duración máxima", referencia.solapados, intervalos)
+    assert arbol == ventana
+    comprobar_con_recorrido(agenda, intervalos)
+
+    # Se borran los eventos de un año: el árbol deja de tenerlos en cuenta,
+    # la ventana de antes seguía usando su duración
+    for evento in [evento for evento in agenda._por_id.values() if evento.descripcion.startswith("Curso")]:
+        agenda.eliminar(evento.id)
+        referencia.eventos.remove(evento)
+        referencia.inicios = [evento.inicio for evento in referencia.eventos]
+    arbol = medir("Árbol, sin los eventos de un año", agenda.solapados, intervalos)
+    ventana = medir("Ventana, sin los eventos de un año", referencia.solapados, intervalos)
+    assert arbol == ventana
+    comprobar_con_recorrido(agenda, intervalos)
+
+    medir_cambios(agenda, azar)
+    assert len(agenda) == NUM_EVENTOS - EVENTOS_DE_UN_AÑO
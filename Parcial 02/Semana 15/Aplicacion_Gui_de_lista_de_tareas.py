@@ -1,6 +1,18 @@
+import os
+import sys
 import tkinter as tk
 from tkinter import messagebox
 
+# Módulos compartidos entre semanas (carpeta "comun" de este parcial)
+_COMUN = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+if _COMUN not in sys.path:
+    sys.path.insert(0, _COMUN)
+
+from almacen_tareas import AlmacenTareas
+from lista_virtual import ListaVirtual
+from modelo_tareas import ModeloTareas
+from trabajos_tk import TrabajosTk
+
 class TodoApp:
     def __init__(self, root):
         self.root = root
@@ -25,46 +37,98 @@ class TodoApp:
         self.btn_delete = tk.Button(frame_buttons, text="Eliminar Tarea", command=self.delete_task)
         self.btn_delete.grid(row=0, column=2, padx=5)
 
-        # Lista de tareas
-        self.listbox = tk.Listbox(root, width=50, height=15, selectmode=tk.SINGLE)
-        self.listbox.pack(pady=10)
-        self.listbox.bind("<Double-Button-1>", self.complete_task)  # Doble clic marca completada
+        # Modelo de tareas: IDs enteros estables, independientes del texto mostrado.
+        # Se carga de disco en segundo plano y cada cambio se anota en el diario desde otro hilo.
+        self.almacen = AlmacenTareas("tareas.json")
+        self.modelo = ModeloTareas()  # Vacío hasta que termine la carga
+        self.cargado = False
+        self.error_carga = None  # Excepción de la carga, si falló
+        self.trabajos = TrabajosTk(root)
+
+        # Lista de tareas (solo se dibujan las filas visibles)
+        self.lista = ListaVirtual(root, contar=lambda: len(self.modelo), textos=self._textos_filas, filas=15, ancho=50)
+        self.lista.pack(pady=10)
+        self.lista.listbox.bind("<Double-Button-1>", self.complete_task)  # Doble clic marca completada
+
+        # La ventana aparece enseguida; la lista se rellena cuando termina la carga
+        self.trabajos.enviar(self.almacen.cargar, al_terminar=self._al_cargar, al_fallar=self._al_fallar_carga)
+
+    def _al_cargar(self, modelo):
+        self.modelo = modelo
+        self.cargado = True
+        self.lista.refrescar()
 
-        # Diccionario para estados de tareas
-        self.tasks = {}
+    def _al_fallar_carga(self, error):
+        # Sin la carga el almacén no arrancó su hilo escritor: los cambios no
+        # se guardarían, así que se desactivan en lugar de dejarlos "cargando"
+        self.error_carga = error
+        for widget in (self.entry, self.btn_add, self.btn_complete, self.btn_delete):
+            widget.config(state=tk.DISABLED)
+        messagebox.showerror("Error", f"No se pudieron cargar las tareas: {error}")
+
+    def _esperar_carga(self):
+        """True (y avisa) si las tareas guardadas aún no se han cargado o no se pudieron cargar."""
+        if self.error_carga is not None:
+            messagebox.showerror("Error", f"No se pudieron cargar las tareas ({self.error_carga}); "
+                                          "no se pueden hacer cambios.")
+        elif not self.cargado:
+            messagebox.showinfo("Info", "Cargando tareas, espera un momento.")
+        return not self.cargado
+
+    def _textos_filas(self, inicio, fin):
+        return [f"[✔] {tarea.texto}" if tarea.completada else tarea.texto
+                for tarea in self.modelo.rango(inicio, fin)]
+
+    def _tarea_seleccionada(self):
+        index = self.lista.seleccion()
+        return None if index is None else self.modelo.en_posicion(index)
 
     def add_task(self, event=None):
+        if self._esperar_carga():
+            return
         task = self.entry.get().strip()
         if task:
-            self.listbox.insert(tk.END, task)
-            self.tasks[task] = False  # False = no completada
+            # Con el candado del almacén, el hilo escritor no copia el modelo a medio cambiar
+            with self.almacen.candado:
+                id_tarea = self.modelo.agregar(task)  # Se añade sin completar (no completada)
+                self.almacen.agregar(id_tarea, task)
+            self.lista.refrescar()
             self.entry.delete(0, tk.END)
         else:
             messagebox.showwarning("Aviso", "No puedes añadir una tarea vacía.")
 
     def complete_task(self, event=None):
-        try:
-            index = self.listbox.curselection()[0]
-            task = self.listbox.get(index)
-            if not self.tasks[task]:
-                self.tasks[task] = True
-                self.listbox.delete(index)
-                self.listbox.insert(index, f"[✔] {task}")
-            else:
-                messagebox.showinfo("Info", "La tarea ya está completada.")
-        except IndexError:
+        if self._esperar_carga():
+            return
+        tarea = self._tarea_seleccionada()
+        if tarea is None:
             messagebox.showwarning("Aviso", "Selecciona una tarea para marcarla.")
+            return
+        with self.almacen.candado:
+            completada = self.modelo.completar(tarea.id)
+            if completada:
+                self.almacen.completar(tarea.id)
+        if completada:
+            self.lista.refrescar()
+        else:
+            messagebox.showinfo("Info", "La tarea ya está completada.")
 
     def delete_task(self):
-        try:
-            index = self.listbox.curselection()[0]
-            task = self.listbox.get(index)
-            self.listbox.delete(index)
-            del self.tasks[task.replace("[✔] ", "")]
-        except IndexError:
+        if self._esperar_carga():
+            return
+        tarea = self._tarea_seleccionada()
+        if tarea is None:
             messagebox.showwarning("Aviso", "Selecciona una tarea para eliminarla.")
+            return
+        with self.almacen.candado:
+            self.modelo.eliminar(tarea.id)
+            self.almacen.eliminar(tarea.id)
+        self.lista.limpiar_seleccion()
+        self.lista.refrescar()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = TodoApp(root)
     root.mainloop()
+    app.trabajos.cerrar()  # Espera a la carga si aún seguía en marcha
+    app.almacen.cerrar()   # Espera a que se escriban los últimos cambios
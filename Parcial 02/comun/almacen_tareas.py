@@ -0,0 +1,317 @@
+"""
+Almacén persistente de tareas
+-----------------------------
+Guarda un ModeloTareas en disco sin bloquear la interfaz:
+
+- '<archivo>': instantánea compacta, un único documento JSON
+  {"siguiente_id": n, "tareas": [[id, texto, completada], ...]} que se lee
+  y se interpreta de una sola vez al arrancar.
+- '<archivo>.log': diario de cambios (añadir, completar, eliminar, mover),
+  una línea JSON por cambio.
+
+La interfaz cambia el modelo y encola el cambio (O(1)) con 'candado'
+tomado. Un hilo escritor añade los cambios al diario con un único fsync por
+tanda y, cuando el diario supera 'limite_diario' registros, compacta: con
+el mismo candado anota lo que quedaba en la cola, aparta el diario y copia
+el orden de las tareas (referencias y un byte por tarea, no un segundo
+modelo); después, ya sin el candado, escribe la instantánea nueva con esa
+copia, sin volver a leer ni interpretar la anterior. La instantánea se
+escribe por tandas para no retener el GIL (y congelar Tk) mucho tiempo
+seguido. Todo el acceso a disco ocurre en ese hilo.
+
+Si la instantánea existe pero no se puede leer (o tiene filas mal formadas
+o IDs repetidos), no se compacta nunca: los cambios siguen yendo al diario
+y el archivo dañado se conserva tal cual. En el diario, un registro
+completo pero dañado se salta y se avisa; solo una última línea sin
+terminar (escritura interrumpida) se recorta.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+
+from modelo_tareas import ModeloTareas
+
+_FIN = object()  # Marca en la cola para que el hilo escritor termine
+LOTE_ESCRITURA = 10_000  # Tareas por trozo al escribir la instantánea
+_codificar = json.JSONEncoder(ensure_ascii=False).encode
+# Operación -> campos (además de "id") que debe traer su registro, con su tipo
+_CAMPOS_REGISTRO = {"agregar": {"texto": str}, "completar": {}, "eliminar": {}, "mover": {"posicion": int}}
+
+
+class AlmacenTareas:
+    """Persistencia incremental de las tareas: instantánea + diario de cambios."""
+
+    def __init__(self, archivo="tareas.json", limite_diario=1000):
+        self.archivo = archivo
+        self.archivo_diario = archivo + ".log"
+        # Segmento de diario que se está compactando (aún no cubierto por la instantánea)
+        self.archivo_diario_compactando = archivo + ".log.compactando"
+        self.limite_diario = limite_diario
+        self._registros_diario = 0
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._modelo = None
+        # Lo toma la interfaz al cambiar el modelo y encolar el cambio, y el
+        # hilo escritor al copiar el modelo para compactar
+        self.candado = threading.Lock()
+        self._instantanea_ilegible = False  # Si es True no se compacta: se perdería la instantánea
+
+    # --- Carga (al arrancar, antes del bucle de la interfaz) ---
+
+    def cargar(self):
+        """
+        Lee la instantánea, le aplica el diario y devuelve el ModeloTareas.
+        Después arranca el hilo escritor, que compacta a partir de ese mismo
+        modelo (ver 'candado').
+        """
+        try:
+            filas, siguiente_id = self._leer_instantanea()
+            # restaurar() comprueba todas las filas antes de añadir ninguna
+            modelo = self._crear_modelo(filas, siguiente_id)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[ERROR] No se pudo leer '{self.archivo}': {e}. Se empieza con la lista vacía "
+                  f"y no se compactará el diario para no sobrescribirla.")
+            modelo = ModeloTareas()
+            self._instantanea_ilegible = True
+
+        self._registros_diario = self._reproducir_diario(modelo, self.archivo_diario_compactando)
+        self._registros_diario += self._reproducir_diario(modelo, self.archivo_diario)
+        self._modelo = modelo
+
+        self._hilo = threading.Thread(target=self._bucle_escritor, daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+        return modelo
+
+    def _leer_instantanea(self):
+        """
+        Devuelve (filas, siguiente_id) de la instantánea; si no existe, ([], 1).
+        Los errores de lectura o de formato se propagan.
+        """
+        try:
+            with open(self.archivo, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except FileNotFoundError:
+            return [], 1
+        filas, siguiente_id = datos["tareas"], datos.get("siguiente_id", 1)
+        if not isinstance(filas, list) or not isinstance(siguiente_id, int):
+            raise ValueError("la instantánea no tiene el formato esperado")
+        return filas, siguiente_id
+
+    @staticmethod
+    def _crear_modelo(filas, siguiente_id):
+        modelo = ModeloTareas()
+        modelo.restaurar(filas)
+        modelo._siguiente_id = max(modelo._siguiente_id, siguiente_id)
+        return modelo
+
+    def _reproducir_diario(self, modelo, archivo):
+        """
+        Aplica al modelo los registros de un archivo de diario y devuelve
+        cuántos aplicó.
+
+        Una línea sin terminar solo puede ser la última (escritura
+        interrumpida): se descarta y se recorta el archivo hasta el final de
+        la línea anterior, para que el siguiente registro no se pegue a ella.
+        Un registro completo pero ilegible o mal formado se comprueba antes
+        de tocar el modelo, se salta y se avisa, sin perder los que vienen detrás.
+        """
+        aplicados = 0
+        dañados = 0
+        validos = 0  # Bytes del archivo hasta el final de la última línea terminada
+        try:
+            with open(archivo, "rb") as f:
+                for numero, linea in enumerate(f, start=1):
+                    if not linea.endswith(b"\n"):
+                        print(f"[ADVERTENCIA] Se descartó la última línea de '{archivo}' (escritura interrumpida).")
+                        break
+                    validos += len(linea)
+                    if not linea.strip():
+                        continue
+                    try:
+                        registro = json.loads(linea)
+                        self._validar_registro(registro)
+                    except ValueError as e:
+                        dañados += 1
+                        print(f"[ADVERTENCIA] Se ignoró el registro dañado de la línea {numero} de '{archivo}': {e}")
+                        continue
+                    self._aplicar_registro(modelo, registro)
+                    aplicados += 1
+                recortar = f.seek(0, os.SEEK_END) > validos
+            if recortar:
+                with open(archivo, "r+b") as f:
+                    f.truncate(validos)
+            if dañados:
+                print(f"[ADVERTENCIA] {dañados} registro(s) dañado(s) en '{archivo}' no se aplicaron.")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[ERROR] No se pudo leer el diario '{archivo}': {e}")
+        return aplicados
+
+    @staticmethod
+    def _validar_registro(registro):
+        """Lanza ValueError si el registro no es un cambio con todos sus campos."""
+        if not isinstance(registro, dict) or registro.get("op") not in _CAMPOS_REGISTRO:
+            raise ValueError("operación desconocida")
+        if not isinstance(registro.get("id"), int):
+            raise ValueError("falta el ID de la tarea")
+        for campo, tipo in _CAMPOS_REGISTRO[registro["op"]].items():
+            if not isinstance(registro.get(campo), tipo):
+                raise ValueError(f"falta el campo '{campo}'")
+
+    @staticmethod
+    def _aplicar_registro(modelo, registro):
+        """Aplica en memoria un registro ya validado del diario (sin volver a persistirlo)."""
+        operacion = registro["op"]
+        id_tarea = registro["id"]
+        if operacion == "agregar":
+            if id_tarea not in modelo:
+                modelo.restaurar([(id_tarea, registro["texto"], False)])
+        elif id_tarea not in modelo:
+            return
+        elif operacion == "completar":
+            modelo.completar(id_tarea)
+        elif operacion == "eliminar":
+            modelo.eliminar(id_tarea)
+        elif operacion == "mover":
+            modelo.mover(id_tarea, registro["posicion"])
+
+    # --- Cambios (desde la interfaz, con 'candado' tomado: solo encolan) ---
+
+    def agregar(self, id_tarea, texto):
+        self._cola.put({"op": "agregar", "id": id_tarea, "texto": texto})
+
+    def completar(self, id_tarea):
+        self._cola.put({"op": "completar", "id": id_tarea})
+
+    def eliminar(self, id_tarea):
+        self._cola.put({"op": "eliminar", "id": id_tarea})
+
+    def mover(self, id_tarea, posicion):
+        self._cola.put({"op": "mover", "id": id_tarea, "posicion": posicion})
+
+    def cerrar(self):
+        """Escribe los cambios pendientes y detiene el hilo escritor."""
+        if self._hilo is not None and self._hilo.is_alive():
+            self._cola.put(_FIN)
+            self._hilo.join()
+
+    # --- Hilo escritor ---
+
+    def _bucle_escritor(self):
+        terminar = False
+        if os.path.exists(self.archivo_diario_compactando):
+            terminar = self._compactar()  # Una compactación anterior quedó a medias
+
+        while not terminar:
+            registros = [self._cola.get()]
+            # Se recoge todo lo que ya esté esperando: un solo fsync por tanda
+            terminar = self._recoger(registros)
+            if registros:
+                self._anexar_diario(registros)
+            if self._registros_diario >= self.limite_diario:
+                terminar = self._compactar() or terminar
+
+    def _recoger(self, registros):
+        """
+        Añade a 'registros' los cambios que ya esperan en la cola y quita la
+        marca de fin. Devuelve True si estaba (el hilo debe terminar).
+        """
+        while True:
+            try:
+                registros.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+        terminar = any(registro is _FIN for registro in registros)
+        registros[:] = [registro for registro in registros if registro is not _FIN]
+        return terminar
+
+    def _anexar_diario(self, registros):
+        """Añade los registros al diario y los fuerza a disco con un único fsync."""
+        try:
+            with open(self.archivo_diario, "a", encoding="utf-8") as f:
+                for registro in registros:
+                    f.write(json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._registros_diario += len(registros)
+        except OSError as e:
+            print(f"[ERROR] No se pudieron guardar {len(registros)} cambio(s): {e}")
+
+    def _compactar(self):
+        """
+        Escribe una instantánea nueva con el estado actual y descarta el diario.
+        Devuelve True si al vaciar la cola apareció la marca de fin.
+        """
+        if self._instantanea_ilegible:
+            return False  # Escribirla destruiría la instantánea que no se pudo leer
+        terminar = False
+        try:
+            with self.candado:
+                # La interfaz no puede cambiar el modelo: con lo que quedaba en
+                # la cola anotado, el diario apartado cubre justo lo que se copia
+                pendientes = []
+                terminar = self._recoger(pendientes)
+                if pendientes:
+                    self._anexar_diario(pendientes)
+                if os.path.exists(self.archivo_diario_compactando):
+                    # Un segmento anterior no llegó a cubrirse; se compacta todo de una vez
+                    if os.path.exists(self.archivo_diario):
+                        with open(self.archivo_diario_compactando, "a", encoding="utf-8") as destino, \
+                                open(self.archivo_diario, "r", encoding="utf-8") as origen:
+                            destino.write(origen.read())
+                        os.remove(self.archivo_diario)
+                elif os.path.exists(self.archivo_diario):
+                    os.replace(self.archivo_diario, self.archivo_diario_compactando)
+                self._registros_diario = 0
+
+                # El texto y el ID de una tarea no cambian: basta con la lista
+                # de tareas en orden y un byte por tarea con 'completada'
+                tareas = list(self._modelo)
+                completadas = bytes(tarea.completada for tarea in tareas)
+                siguiente_id = self._modelo._siguiente_id
+
+            self._escribir_instantanea(siguiente_id, tareas, completadas)
+            if os.path.exists(self.archivo_diario_compactando):
+                os.remove(self.archivo_diario_compactando)
+        except OSError as e:
+            print(f"[ADVERTENCIA] No se pudo compactar el diario: {e}")
+        return terminar
+
+    def _escribir_instantanea(self, siguiente_id, tareas, completadas):
+        """
+        Escritura atómica: temporal + fsync + renombrado sobre la instantánea.
+        Las tareas se codifican de LOTE_ESCRITURA en LOTE_ESCRITURA, así el
+        hilo de Tk puede tomar el GIL entre trozo y trozo.
+        """
+        temporal = self.archivo + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(f'{{"siguiente_id":{siguiente_id},"tareas":[')
+            separador = ""
+            for inicio in range(0, len(tareas), LOTE_ESCRITURA):
+                # Solo se crean cadenas (no listas por tarea), que el recolector
+                # de basura no sigue: así no salta una recolección completa a mitad
+                lote = ",".join(f"[{tarea.id},{_codificar(tarea.texto)},{'true' if completada else 'false'}]"
+                                for tarea, completada in zip(tareas[inicio:inicio + LOTE_ESCRITURA],
+                                                             completadas[inicio:inicio + LOTE_ESCRITURA]))
+                f.write(separador + lote)
+                separador = ","
+            f.write("]}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.archivo)
+        self._sincronizar_directorio()
+
+    def _sincronizar_directorio(self):
+        """Fuerza a disco el renombrado (solo donde el sistema lo permite)."""
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        descriptor = os.open(os.path.dirname(os.path.abspath(self.archivo)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
@@ -0,0 +1,113 @@
+"""
+Almacenamiento de inventarios en archivo
+----------------------------------------
+Formatos de la instantánea que comparten los inventarios de las semanas 10
+y 11: el arreglo JSON original y JSON Lines (un producto por línea). Las
+escrituras son atómicas (temporal + fsync + renombrado).
+"""
+
+import json
+import os
+import shutil
+
+
+class AlmacenamientoJSON:
+    """
+    Formato original: un arreglo JSON con sangría.
+    Obliga a tener todo el archivo en memoria para leerlo o escribirlo.
+
+    Las escrituras son atómicas: se escribe un archivo temporal, se fuerza a
+    disco (fsync) y se renombra sobre el original, de modo que un corte a
+    mitad de escritura nunca deja el archivo truncado. Con copias_respaldo=N
+    se conservan las N versiones anteriores como '<ruta>.bak1' ... '<ruta>.bakN'.
+    """
+
+    # Indica si tras la lectura conviene reescribir el archivo en otro formato
+    requiere_migracion = False
+
+    def __init__(self, ruta, copias_respaldo=0):
+        self.ruta = ruta
+        self.copias_respaldo = copias_respaldo
+
+    def existe(self):
+        return os.path.exists(self.ruta)
+
+    def leer(self):
+        """Generador de diccionarios, uno por producto."""
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        yield from datos
+
+    def escribir(self, registros):
+        """Escribe todos los diccionarios recibidos (cualquier iterable)."""
+        self._escribir_atomico(
+            lambda f: json.dump(list(registros), f, indent=4, ensure_ascii=False)
+        )
+
+    def _escribir_atomico(self, volcar):
+        """Llama a volcar(f) sobre un temporal y lo renombra sobre la ruta final."""
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            volcar(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._rotar_respaldos()
+        os.replace(temporal, self.ruta)
+        self._sincronizar_directorio()
+
+    def _rotar_respaldos(self):
+        """Desplaza las copias (.bak1 -> .bak2 ...) y copia el archivo actual a .bak1."""
+        if self.copias_respaldo <= 0 or not self.existe():
+            return
+        for n in range(self.copias_respaldo - 1, 0, -1):
+            origen = f'{self.ruta}.bak{n}'
+            if os.path.exists(origen):
+                os.replace(origen, f'{self.ruta}.bak{n + 1}')
+        shutil.copy2(self.ruta, f'{self.ruta}.bak1')
+
+    def _sincronizar_directorio(self):
+        """Fuerza a disco el renombrado (solo donde el sistema lo permite)."""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        descriptor = os.open(os.path.dirname(os.path.abspath(self.ruta)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+
+class AlmacenamientoJSONLines(AlmacenamientoJSON):
+    """
+    Formato JSON Lines: un producto por línea.
+    Se lee y se escribe línea a línea sin cargar el archivo completo.
+    Si encuentra el formato antiguo (arreglo JSON) lo lee igualmente y
+    marca requiere_migracion para que se reescriba como JSON Lines.
+    """
+
+    def formato_en_disco(self):
+        """Devuelve 'json' si el archivo empieza por '[' y 'jsonl' en otro caso."""
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            while True:
+                caracter = f.read(1)
+                if not caracter or not caracter.isspace():
+                    return 'json' if caracter == '[' else 'jsonl'
+
+    def leer(self):
+        if self.formato_en_disco() == 'json':
+            self.requiere_migracion = True
+            yield from super().leer()
+            return
+
+        self.requiere_migracion = False
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+
+    def escribir(self, registros):
+        def volcar(f):
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+        self._escribir_atomico(volcar)
+        self.requiere_migracion = False
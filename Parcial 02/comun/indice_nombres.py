@@ -0,0 +1,87 @@
+"""
+Índice de nombres
+-----------------
+Índice de n-gramas para buscar productos por subcadena o prefijo del
+nombre. Lo usan los inventarios de las semanas 9 y 11.
+"""
+
+
+class IndiceNombres:
+    """
+    Índice de n-gramas (de 1 a 3 caracteres) sobre los nombres en minúsculas.
+    Permite búsquedas por subcadena y por prefijo sin recorrer todo el inventario.
+    """
+
+    LONGITUD_GRAMA = 3
+    MARCA_INICIO = "\x02"  # Precede al nombre para poder indexar prefijos
+
+    def __init__(self):
+        self._gramas = {}   # grama -> conjunto de IDs
+        self._nombres = {}  # ID -> nombre en minúsculas (con marca de inicio)
+        self._orden = {}    # ID -> número de inserción
+        self._contador = 0
+
+    @classmethod
+    def _gramas_de(cls, texto):
+        return {
+            texto[i:i + n]
+            for n in range(1, cls.LONGITUD_GRAMA + 1)
+            for i in range(len(texto) - n + 1)
+        }
+
+    @classmethod
+    def _gramas_de_longitud_maxima(cls, texto):
+        n = cls.LONGITUD_GRAMA
+        return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+    def agregar(self, id_producto, nombre, orden=None):
+        texto = self.MARCA_INICIO + nombre.lower()
+        self._nombres[id_producto] = texto
+        if orden is None:
+            orden = self._contador
+            self._contador += 1
+        self._orden[id_producto] = orden
+        for grama in self._gramas_de(texto):
+            self._gramas.setdefault(grama, set()).add(id_producto)
+
+    def quitar(self, id_producto):
+        texto = self._nombres.pop(id_producto, None)
+        if texto is None:
+            return
+        del self._orden[id_producto]
+        for grama in self._gramas_de(texto):
+            ids = self._gramas[grama]
+            ids.discard(id_producto)
+            if not ids:
+                del self._gramas[grama]
+
+    def actualizar(self, id_producto, nombre):
+        """Reindexa el nombre manteniendo la posición de inserción."""
+        orden = self._orden[id_producto]
+        self.quitar(id_producto)
+        self.agregar(id_producto, nombre, orden)
+
+    def buscar(self, consulta, prefijo=False):
+        """
+        Devuelve los IDs cuyo nombre contiene (o empieza por) la consulta,
+        en orden de inserción. La consulta se compara en minúsculas.
+        """
+        consulta = consulta.lower()
+        if prefijo:
+            consulta = self.MARCA_INICIO + consulta
+        if not consulta:
+            return sorted(self._orden, key=self._orden.__getitem__)
+
+        if len(consulta) <= self.LONGITUD_GRAMA:
+            # El grama completo ya es la respuesta exacta
+            coincidencias = self._gramas.get(consulta, set())
+        else:
+            conjuntos = sorted(
+                (self._gramas.get(grama, set()) for grama in self._gramas_de_longitud_maxima(consulta)),
+                key=len
+            )
+            candidatos = set(conjuntos[0]).intersection(*conjuntos[1:])
+            # Los gramas solo filtran: se confirma la subcadena completa
+            coincidencias = [id_p for id_p in candidatos if consulta in self._nombres[id_p]]
+
+        return sorted(coincidencias, key=self._orden.__getitem__)
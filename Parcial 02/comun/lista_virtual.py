@@ -0,0 +1,110 @@
+"""
+Lista virtual para Tkinter
+--------------------------
+Listbox con barra de desplazamiento que solo contiene las filas visibles.
+La comparten las aplicaciones de tareas de las semanas 15 y 16.
+"""
+
+import tkinter as tk
+
+
+class ListaVirtual(tk.Frame):
+    """
+    Lista que solo crea las filas visibles. Los datos se piden a quien la usa:
+    contar() da el número de filas y textos(inicio, fin) los textos de las
+    filas [inicio, fin), así que desplazarse o refrescar cuesta lo mismo con
+    10 tareas que con 1 millón.
+    """
+
+    def __init__(self, master, contar, textos, filas=15, ancho=50):
+        super().__init__(master)
+        self.contar = contar
+        self.textos = textos
+        self.filas = filas
+        self.primera = 0        # Índice de la primera fila visible
+        self._seleccion = None  # Índice de la fila seleccionada (en los datos, no en pantalla)
+
+        self.listbox = tk.Listbox(self, width=ancho, height=filas, selectmode=tk.SINGLE, exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self._al_desplazar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind("<<ListboxSelect>>", self._al_seleccionar)
+        self.listbox.bind("<MouseWheel>", self._al_girar_rueda)  # Windows / macOS
+        self.listbox.bind("<Button-4>", self._al_girar_rueda)    # Linux: rueda arriba
+        self.listbox.bind("<Button-5>", self._al_girar_rueda)    # Linux: rueda abajo
+        self.listbox.bind("<Up>", lambda e: self._mover_seleccion(-1))
+        self.listbox.bind("<Down>", lambda e: self._mover_seleccion(1))
+        self.listbox.bind("<Prior>", lambda e: self._mover_seleccion(-self.filas))
+        self.listbox.bind("<Next>", lambda e: self._mover_seleccion(self.filas))
+        self.refrescar()
+
+    @staticmethod
+    def ventana(total, primera, filas):
+        """Ajusta 'primera' a los límites y devuelve el rango visible [inicio, fin)."""
+        primera = max(0, min(primera, total - filas))
+        return primera, min(total, primera + filas)
+
+    def refrescar(self):
+        """Vuelve a pintar solo las filas visibles (llamar tras cambiar los datos)."""
+        total = self.contar()
+        self.primera, fin = self.ventana(total, self.primera, self.filas)
+        if self._seleccion is not None and self._seleccion >= total:
+            self._seleccion = None
+
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *self.textos(self.primera, fin))
+        if self._seleccion is not None and self.primera <= self._seleccion < fin:
+            self.listbox.selection_set(self._seleccion - self.primera)
+            self.listbox.activate(self._seleccion - self.primera)
+
+        if total:
+            self.scrollbar.set(self.primera / total, fin / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def desplazar(self, filas):
+        self.primera += filas
+        self.refrescar()
+
+    def ver(self, indice):
+        """Desplaza lo justo para que la fila 'indice' quede a la vista."""
+        if indice < self.primera:
+            self.primera = indice
+        elif indice >= self.primera + self.filas:
+            self.primera = indice - self.filas + 1
+        self.refrescar()
+
+    def seleccion(self):
+        """Índice de la fila seleccionada, o None si no hay ninguna."""
+        return self._seleccion
+
+    def limpiar_seleccion(self):
+        self._seleccion = None
+        self.listbox.selection_clear(0, tk.END)
+
+    def _al_desplazar(self, accion, cantidad, unidad=None):
+        # Órdenes de la barra: ("moveto", fracción) o ("scroll", n, "units"/"pages")
+        if accion == tk.MOVETO:
+            self.primera = int(float(cantidad) * self.contar())
+        elif accion == tk.SCROLL:
+            self.primera += int(cantidad) * (self.filas if unidad == tk.PAGES else 1)
+        self.refrescar()
+
+    def _al_girar_rueda(self, evento):
+        hacia_arriba = evento.num == 4 or evento.delta > 0
+        self.desplazar(-3 if hacia_arriba else 3)
+        return "break"
+
+    def _al_seleccionar(self, evento=None):
+        visibles = self.listbox.curselection()
+        if visibles:
+            self._seleccion = self.primera + visibles[0]
+
+    def _mover_seleccion(self, paso):
+        total = self.contar()
+        if total:
+            actual = -1 if self._seleccion is None and paso > 0 else (self._seleccion or 0)
+            self._seleccion = max(0, min(total - 1, actual + paso))
+            self.ver(self._seleccion)
+        return "break"  # Evita que el Listbox mueva su propia selección
@@ -0,0 +1,296 @@
+"""
+Modelo de Tareas
+----------------
+Guarda las tareas de la aplicación sin depender de Tkinter, para poder
+usarlo (y medirlo) sin interfaz gráfica.
+
+Cada tarea tiene un ID entero estable que no depende de su texto, así que
+puede haber tareas repetidas. El orden se guarda en un treap implícito
+(árbol binario con prioridades aleatorias donde la posición de cada nodo la
+da el tamaño de su subárbol izquierdo):
+- Completar por ID: O(1) (diccionario ID -> Tarea).
+- Eliminar, mover y consultar la posición por ID: O(log n).
+- Obtener la tarea de una posición: O(log n); recorrer k filas seguidas: O(log n + k).
+"""
+
+import random
+
+
+class Tarea:
+    """
+    Una tarea de la lista. Es a la vez el nodo del árbol que guarda el orden;
+    los atributos con guion bajo son del árbol y no deben tocarse desde fuera.
+    """
+
+    __slots__ = ("id", "texto", "completada", "_izq", "_der", "_padre", "_prioridad", "_tamaño")
+
+    def __init__(self, id_tarea, texto, completada=False):
+        self.id = id_tarea
+        self.texto = texto
+        self.completada = completada
+        self._izq = None
+        self._der = None
+        self._padre = None
+        self._prioridad = random.random()
+        self._tamaño = 1
+
+    def __repr__(self):
+        estado = "completada" if self.completada else "pendiente"
+        return f"Tarea({self.id}, {self.texto!r}, {estado})"
+
+
+# --- Operaciones del treap (funciones auxiliares) ---
+
+def _tamaño(nodo):
+    return nodo._tamaño if nodo is not None else 0
+
+
+def _recalcular(nodo):
+    nodo._tamaño = 1 + _tamaño(nodo._izq) + _tamaño(nodo._der)
+
+
+def _unir(a, b):
+    """Une dos árboles: todos los nodos de 'a' quedan antes que los de 'b'."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a._prioridad > b._prioridad:
+        a._der = _unir(a._der, b)
+        a._der._padre = a
+        _recalcular(a)
+        return a
+    b._izq = _unir(a, b._izq)
+    b._izq._padre = b
+    _recalcular(b)
+    return b
+
+
+def _partir(nodo, k):
+    """Parte el árbol en (primeros k nodos, resto)."""
+    if nodo is None:
+        return None, None
+    if _tamaño(nodo._izq) >= k:
+        izq, der = _partir(nodo._izq, k)
+        nodo._izq = der
+        if der is not None:
+            der._padre = nodo
+        _recalcular(nodo)
+        return izq, nodo
+    izq, der = _partir(nodo._der, k - _tamaño(nodo._izq) - 1)
+    nodo._der = izq
+    if izq is not None:
+        izq._padre = nodo
+    _recalcular(nodo)
+    return nodo, der
+
+
+def _siguiente(nodo):
+    """Nodo que va justo después en el orden (None si es el último)."""
+    if nodo._der is not None:
+        nodo = nodo._der
+        while nodo._izq is not None:
+            nodo = nodo._izq
+        return nodo
+    while nodo._padre is not None and nodo._padre._der is nodo:
+        nodo = nodo._padre
+    return nodo._padre
+
+
+def _construir(nodos):
+    """
+    Construye en O(n) el treap con los nodos en el orden dado (árbol
+    cartesiano por prioridad con una pila) y calcula tamaños y padres.
+    """
+    pila = []
+    for nodo in nodos:
+        ultimo = None
+        while pila and pila[-1]._prioridad < nodo._prioridad:
+            ultimo = pila.pop()
+        nodo._izq = ultimo
+        if pila:
+            pila[-1]._der = nodo
+        pila.append(nodo)
+    if not pila:
+        return None
+
+    raiz = pila[0]
+    # Recorrido en postorden sin recursión para fijar padres y tamaños
+    pendientes = [(raiz, False)]
+    while pendientes:
+        nodo, hijos_listos = pendientes.pop()
+        if hijos_listos:
+            _recalcular(nodo)
+            continue
+        pendientes.append((nodo, True))
+        for hijo in (nodo._izq, nodo._der):
+            if hijo is not None:
+                hijo._padre = nodo
+                pendientes.append((hijo, False))
+    return raiz
+
+
+class ModeloTareas:
+    """Lista ordenada de tareas con IDs enteros estables."""
+
+    def __init__(self):
+        self._tareas = {}  # ID -> Tarea
+        self._raiz = None
+        self._siguiente_id = 1
+
+    def __len__(self):
+        return len(self._tareas)
+
+    def __contains__(self, id_tarea):
+        return id_tarea in self._tareas
+
+    def __iter__(self):
+        """Recorre las tareas en el orden de la lista."""
+        return self.rango(0, len(self))
+
+    def _nueva(self, texto, completada, id_tarea=None):
+        if id_tarea is None:
+            id_tarea = self._siguiente_id
+        elif id_tarea in self._tareas:
+            raise ValueError(f"Ya existe una tarea con ID {id_tarea}")
+        tarea = Tarea(id_tarea, texto, completada)
+        self._siguiente_id = max(self._siguiente_id, id_tarea + 1)
+        self._tareas[id_tarea] = tarea
+        return tarea
+
+    def _fijar_raiz(self, raiz):
+        self._raiz = raiz
+        if raiz is not None:
+            raiz._padre = None
+
+    # --- Altas ---
+
+    def agregar(self, texto, completada=False):
+        """Añade una tarea al final y devuelve su ID."""
+        tarea = self._nueva(texto, completada)
+        self._fijar_raiz(_unir(self._raiz, tarea))
+        return tarea.id
+
+    def agregar_muchas(self, tareas):
+        """
+        Añade al final muchas tareas, dadas como textos o como pares
+        (texto, completada). Construye el árbol de una vez en O(n).
+
+        Returns:
+            list: Los IDs asignados, en el mismo orden.
+        """
+        nuevas = []
+        for tarea in tareas:
+            texto, completada = (tarea, False) if isinstance(tarea, str) else tarea
+            nuevas.append(self._nueva(texto, completada))
+        self._fijar_raiz(_unir(self._raiz, _construir(nuevas)))
+        return [tarea.id for tarea in nuevas]
+
+    def restaurar(self, filas):
+        """
+        Añade al final tareas guardadas, dadas como (id, texto, completada),
+        conservando sus IDs. Los IDs nuevos seguirán después del mayor.
+
+        Todas las filas se comprueban antes de añadir ninguna: si alguna está
+        mal formada o su ID no es entero o ya existe, se lanza ValueError (o
+        TypeError) sin haber modificado el modelo.
+        """
+        filas = list(filas)
+        vistos = set()
+        for id_tarea, _, _ in filas:
+            if not isinstance(id_tarea, int):
+                raise ValueError(f"ID de tarea no válido: {id_tarea!r}")
+            if id_tarea in self._tareas or id_tarea in vistos:
+                raise ValueError(f"Ya existe una tarea con ID {id_tarea}")
+            vistos.add(id_tarea)
+        nuevas = [self._nueva(texto, completada, id_tarea) for id_tarea, texto, completada in filas]
+        self._fijar_raiz(_unir(self._raiz, _construir(nuevas)))
+
+    # --- Consultas ---
+
+    def obtener(self, id_tarea):
+        """Devuelve la Tarea con ese ID (KeyError si no existe)."""
+        return self._tareas[id_tarea]
+
+    def posicion(self, id_tarea):
+        """Posición (desde 0) de la tarea en la lista."""
+        nodo = self._tareas[id_tarea]
+        posicion = _tamaño(nodo._izq)
+        while nodo._padre is not None:
+            padre = nodo._padre
+            if padre._der is nodo:
+                posicion += _tamaño(padre._izq) + 1
+            nodo = padre
+        return posicion
+
+    def en_posicion(self, posicion):
+        """Tarea que ocupa la posición dada (IndexError si no existe)."""
+        if not 0 <= posicion < len(self):
+            raise IndexError("posición fuera de la lista")
+        nodo = self._raiz
+        while True:
+            izquierda = _tamaño(nodo._izq)
+            if posicion < izquierda:
+                nodo = nodo._izq
+            elif posicion == izquierda:
+                return nodo
+            else:
+                posicion -= izquierda + 1
+                nodo = nodo._der
+
+    def rango(self, inicio, fin):
+        """Genera las tareas de las posiciones [inicio, fin) en orden."""
+        fin = min(fin, len(self))
+        if inicio >= fin:
+            return
+        nodo = self.en_posicion(inicio)
+        for _ in range(fin - inicio):
+            yield nodo
+            nodo = _siguiente(nodo)
+
+    # --- Cambios ---
+
+    def completar(self, id_tarea):
+        """
+        Marca la tarea como completada.
+
+        Returns:
+            bool: False si ya estaba completada.
+        """
+        tarea = self._tareas[id_tarea]
+        if tarea.completada:
+            return False
+        tarea.completada = True
+        return True
+
+    def _desenganchar(self, nodo):
+        """Saca un nodo del árbol sustituyéndolo por la unión de sus hijos."""
+        hijo = _unir(nodo._izq, nodo._der)
+        padre = nodo._padre
+        if hijo is not None:
+            hijo._padre = padre
+        if padre is None:
+            self._raiz = hijo
+        elif padre._izq is nodo:
+            padre._izq = hijo
+        else:
+            padre._der = hijo
+        while padre is not None:
+            _recalcular(padre)
+            padre = padre._padre
+        nodo._izq = nodo._der = nodo._padre = None
+        nodo._tamaño = 1
+
+    def eliminar(self, id_tarea):
+        """Elimina la tarea y la devuelve."""
+        tarea = self._tareas.pop(id_tarea)
+        self._desenganchar(tarea)
+        return tarea
+
+    def mover(self, id_tarea, posicion):
+        """Lleva la tarea a la posición indicada (se ajusta a los límites de la lista)."""
+        tarea = self._tareas[id_tarea]
+        self._desenganchar(tarea)
+        posicion = max(0, min(posicion, len(self) - 1))
+        antes, despues = _partir(self._raiz, posicion)
+        self._fijar_raiz(_unir(_unir(antes, tarea), despues))
@@ -0,0 +1,129 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+
+from almacen_tareas import AlmacenTareas
+from modelo_tareas import ModeloTareas
+
+# -------------------------------
+# Prueba del almacén de tareas (sin pantalla):
+# - Una instantánea con un ID repetido no se carga a medias: se empieza con
+#   la lista vacía, sin excepción, y el archivo no se sobrescribe.
+# - Un registro del diario sin "texto" se salta y los siguientes se aplican.
+# - Una última línea sin terminar se recorta.
+# - Compactar con muchos cambios, mientras otro hilo sigue cambiando el
+#   modelo con el candado del almacén, deja en disco justo el modelo final.
+# -------------------------------
+CAMBIOS = 20_000
+LIMITE_DIARIO = 500
+
+
+def cargar(ruta, limite_diario=LIMITE_DIARIO):
+    """Carga el almacén y devuelve (almacen, modelo, mensajes impresos)."""
+    almacen = AlmacenTareas(ruta, limite_diario=limite_diario)
+    salida = io.StringIO()
+    with contextlib.redirect_stdout(salida):
+        modelo = almacen.cargar()
+    return almacen, modelo, salida.getvalue()
+
+
+def filas(modelo):
+    return [(tarea.id, tarea.texto, tarea.completada) for tarea in modelo]
+
+
+def probar_id_repetido(carpeta):
+    ruta = os.path.join(carpeta, "repetido.json")
+    contenido = json.dumps({"siguiente_id": 3, "tareas": [[1, "Una", False], [1, "Otra", True]]})
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(contenido)
+    almacen, modelo, mensajes = cargar(ruta, limite_diario=1)
+    assert len(modelo) == 0 and list(modelo) == [] and "[ERROR]" in mensajes, mensajes
+    modelo.restaurar([(1, "Nueva", False)])  # El modelo vacío no quedó con IDs sueltos
+    almacen.agregar(1, "Nueva")
+    almacen.cerrar()
+    with open(ruta, encoding="utf-8") as f:
+        assert f.read() == contenido, "se sobrescribió la instantánea ilegible"
+
+    # restaurar() tampoco deja nada a medias si el repetido ya estaba
+    existente = ModeloTareas()
+    existente.agregar("Primera")
+    try:
+        existente.restaurar([(5, "Nueva", False), (1, "Repetida", False)])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("restaurar() aceptó un ID repetido")
+    assert filas(existente) == [(1, "Primera", False)] and 5 not in existente
+    print("ID repetido en la instantánea: lista vacía, sin excepción y sin sobrescribirla")
+
+
+def probar_diario_dañado(carpeta):
+    ruta = os.path.join(carpeta, "dañado.json")
+    registros = [{"op": "agregar", "id": 1, "texto": "Una"},
+                 {"op": "agregar", "id": 2},  # Sin "texto"
+                 {"op": "mover", "id": 1},    # Sin "posicion"
+                 {"op": "agregar", "id": 3, "texto": "Tres"},
+                 {"op": "completar", "id": 3}]
+    with open(ruta + ".log", "w", encoding="utf-8") as f:
+        for registro in registros:
+            f.write(json.dumps(registro) + "\n")
+        f.write("{no es json\n")
+        f.write('{"op": "agregar", "id": 4, "tex')  # Escritura interrumpida
+    almacen, modelo, mensajes = cargar(ruta)
+    assert filas(modelo) == [(1, "Una", False), (3, "Tres", True)], filas(modelo)
+    assert "línea 2" in mensajes and "línea 6" in mensajes and "escritura interrumpida" in mensajes, mensajes
+    almacen.cerrar()
+    with open(ruta + ".log", "rb") as f:
+        assert f.read().endswith(b"{no es json\n"), "no se recortó la línea sin terminar"
+    print("Diario dañado: los registros malos se saltan y la línea a medias se recorta")
+
+
+def probar_compactacion_concurrente(carpeta):
+    ruta = os.path.join(carpeta, "compactar.json")
+    almacen, modelo, _ = cargar(ruta)
+    compactaciones = [0]
+    compactar = almacen._compactar
+
+    def contar():
+        compactaciones[0] += 1
+        return compactar()
+
+    almacen._compactar = contar
+
+    def cambiar(inicio):
+        for i in range(inicio, CAMBIOS, 2):
+            with almacen.candado:
+                id_tarea = modelo.agregar(f"Tarea {i}")
+                almacen.agregar(id_tarea, f"Tarea {i}")
+                if i % 3 == 0:
+                    modelo.completar(id_tarea)
+                    almacen.completar(id_tarea)
+                if i % 5 == 0:
+                    modelo.mover(id_tarea, 0)
+                    almacen.mover(id_tarea, 0)
+                if i % 7 == 0:
+                    modelo.eliminar(id_tarea)
+                    almacen.eliminar(id_tarea)
+
+    hilos = [threading.Thread(target=cambiar, args=(inicio,)) for inicio in (0, 1)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    almacen.cerrar()
+    assert compactaciones[0] > 0, "no se llegó a compactar"
+
+    _, recargado, mensajes = cargar(ruta)
+    assert filas(recargado) == filas(modelo) and not mensajes, mensajes
+    print(f"{CAMBIOS:,} cambios con {compactaciones[0]} compactaciones a la vez: "
+          f"se recargan {len(recargado):,} tareas idénticas")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as carpeta:
+        probar_id_repetido(carpeta)
+        probar_diario_dañado(carpeta)
+        probar_compactacion_concurrente(carpeta)
@@ -0,0 +1,122 @@
+import random
+import statistics
+import time
+
+from lista_virtual import ListaVirtual
+from modelo_tareas import ModeloTareas
+
+# -------------------------------
+# Prueba de rendimiento sin pantalla: tiempo de actualizar el modelo con
+# 1 millón de tareas y tiempo de calcular lo que pinta la lista virtual
+# (ventana visible + textos de esas filas) al desplazarse o refrescar.
+# El Listbox y la Scrollbar se sustituyen por objetos que solo guardan lo
+# que recibirían; el resto de ListaVirtual es el código de la aplicación.
+# -------------------------------
+NUM_TAREAS = 1_000_000
+OPERACIONES = 20_000
+FILAS = 15
+
+
+class ListboxFalso:
+    """Guarda las filas que recibiría el Listbox."""
+
+    def __init__(self):
+        self.filas = []
+        self.seleccionada = None
+
+    def delete(self, inicio, fin):
+        self.filas.clear()
+
+    def insert(self, posicion, *textos):
+        self.filas.extend(textos)
+
+    def selection_set(self, indice):
+        self.seleccionada = indice
+
+    def selection_clear(self, inicio, fin):
+        self.seleccionada = None
+
+    def activate(self, indice):
+        pass
+
+
+class ScrollbarFalsa:
+    def __init__(self):
+        self.posicion = (0, 1)
+
+    def set(self, inicio, fin):
+        self.posicion = (inicio, fin)
+
+
+def crear_lista(modelo):
+    """ListaVirtual sin ventana: mismos métodos, widgets falsos."""
+    lista = ListaVirtual.__new__(ListaVirtual)
+    lista.contar = lambda: len(modelo)
+    lista.textos = lambda inicio, fin: [f"[✔] {tarea.texto}" if tarea.completada else tarea.texto
+                                        for tarea in modelo.rango(inicio, fin)]
+    lista.filas = FILAS
+    lista.primera = 0
+    lista._seleccion = None
+    lista.listbox = ListboxFalso()
+    lista.scrollbar = ScrollbarFalsa()
+    return lista
+
+
+def percentiles(tiempos):
+    cortes = statistics.quantiles(tiempos, n=100)
+    return f"p50 {cortes[49] * 1e6:7.1f} µs | p99 {cortes[98] * 1e6:7.1f} µs"
+
+
+def cronometrar(funcion, argumentos):
+    tiempos = []
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        funcion(*argumento)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def medir_modelo(modelo, azar):
+    inicio = time.perf_counter()
+    modelo.agregar_muchas(f"Tarea {i}" for i in range(NUM_TAREAS))
+    print(f"{NUM_TAREAS:,} tareas creadas en {time.perf_counter() - inicio:.1f} s")
+
+    ids = azar.sample(range(1, NUM_TAREAS + 1), 3 * OPERACIONES)
+    completar, eliminar, mover = ids[:OPERACIONES], ids[OPERACIONES:2 * OPERACIONES], ids[2 * OPERACIONES:]
+    medidas = {
+        "agregar": cronometrar(modelo.agregar, [("Tarea nueva",)] * OPERACIONES),
+        "completar": cronometrar(modelo.completar, [(i,) for i in completar]),
+        "eliminar": cronometrar(modelo.eliminar, [(i,) for i in eliminar]),
+        "mover": cronometrar(modelo.mover, [(i, azar.randrange(NUM_TAREAS)) for i in mover]),
+        "en_posicion": cronometrar(modelo.en_posicion, [(azar.randrange(len(modelo)),) for _ in range(OPERACIONES)]),
+    }
+    assert len(modelo) == NUM_TAREAS
+    for nombre, tiempos in medidas.items():
+        print(f"Modelo {nombre:<11}: {percentiles(tiempos)}")
+
+
+def medir_ventana(modelo, azar):
+    lista = crear_lista(modelo)
+    medidas = {
+        "barra (moveto)": cronometrar(lista._al_desplazar,
+                                      [("moveto", str(azar.random())) for _ in range(OPERACIONES)]),
+        "rueda (scroll)": cronometrar(lista.desplazar, [(azar.choice((-3, 3)),) for _ in range(OPERACIONES)]),
+        "ver fila": cronometrar(lista.ver, [(azar.randrange(len(modelo)),) for _ in range(OPERACIONES)]),
+        "refrescar": cronometrar(lista.refrescar, [()] * OPERACIONES),
+    }
+    for nombre, tiempos in medidas.items():
+        print(f"Ventana {nombre:<15}: {percentiles(tiempos)}")
+
+    # Lo pintado corresponde a la ventana calculada
+    lista._al_desplazar("moveto", "1.0")
+    esperado = [tarea.texto if not tarea.completada else f"[✔] {tarea.texto}"
+                for tarea in modelo.rango(len(modelo) - FILAS, len(modelo))]
+    assert lista.primera == len(modelo) - FILAS and lista.listbox.filas == esperado
+    assert lista.scrollbar.posicion == ((len(modelo) - FILAS) / len(modelo), 1.0)
+
+
+if __name__ == "__main__":
+    azar = random.Random(16)
+    modelo = ModeloTareas()
+    medir_modelo(modelo, azar)
+    medir_ventana(modelo, azar)
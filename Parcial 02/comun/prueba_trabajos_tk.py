@@ -0,0 +1,155 @@
+import threading
+import time
+
+from trabajos_tk import TrabajosTk
+
+# -------------------------------
+# Prueba de TrabajosTk sin pantalla: una raíz falsa hace de bucle de Tk
+# (guarda lo programado con after y lo ejecuta al "girar" el bucle) y un
+# servicio falso tarda lo que se le indique en responder. Se comprueba que
+# enviar no espera al servicio, que los resultados y errores llegan en el
+# hilo del bucle, que las peticiones con la misma clave se fusionan y que
+# el sondeo se detiene cuando no queda nada pendiente.
+# -------------------------------
+RETARDO = 0.2  # Lo que tarda el servicio lento, en segundos
+
+
+class RaizFalsa:
+    """Sustituye a tk.Tk: solo after / after_cancel y un bucle manual."""
+
+    def __init__(self):
+        self._programados = {}  # Identificador -> (momento, función)
+        self._siguiente = 0
+        self.hilo = threading.current_thread()
+
+    def after(self, ms, funcion):
+        self._siguiente += 1
+        self._programados[self._siguiente] = (time.perf_counter() + ms / 1000, funcion)
+        return self._siguiente
+
+    def after_cancel(self, identificador):
+        self._programados.pop(identificador, None)
+
+    def programados(self):
+        return len(self._programados)
+
+    def girar(self, hasta, limite=5.0):
+        """Ejecuta lo programado hasta que hasta() sea True (o pase 'limite' segundos)."""
+        fin = time.perf_counter() + limite
+        while not hasta():
+            assert time.perf_counter() < fin, "el bucle no recibió los resultados a tiempo"
+            ahora = time.perf_counter()
+            for identificador, (momento, funcion) in sorted(self._programados.items()):
+                if momento <= ahora:
+                    del self._programados[identificador]
+                    funcion()
+            time.sleep(0.001)
+
+
+class ServicioLento:
+    """Servicio falso: cada llamada tarda RETARDO segundos y anota lo que empezó."""
+
+    def __init__(self):
+        self.empezadas = []
+        self.liberar = threading.Event()
+
+    def consultar(self, valor):
+        self.empezadas.append(valor)
+        time.sleep(RETARDO)
+        return valor * 2
+
+    def fallar(self, mensaje):
+        time.sleep(RETARDO)
+        raise ValueError(mensaje)
+
+    def bloquear(self):
+        """Ocupa un hilo del pool hasta que se active 'liberar'."""
+        self.empezadas.append("bloqueo")
+        self.liberar.wait()
+        return "bloqueo"
+
+
+def entregas(raiz):
+    """Callbacks que anotan lo recibido y comprueban que llega en el hilo del bucle."""
+    recibidos = []
+
+    def anotar(etiqueta):
+        def callback(valor):
+            assert threading.current_thread() is raiz.hilo
+            recibidos.append((etiqueta, valor))
+        return callback
+    return recibidos, anotar
+
+
+def probar_resultados_y_errores():
+    raiz, servicio = RaizFalsa(), ServicioLento()
+    trabajos = TrabajosTk(raiz, max_hilos=2, intervalo_ms=5)
+    recibidos, anotar = entregas(raiz)
+
+    inicio = time.perf_counter()
+    trabajos.enviar(servicio.consultar, 21, al_terminar=anotar("ok"), al_fallar=anotar("error"))
+    trabajos.enviar(servicio.fallar, "sin conexión", al_terminar=anotar("ok"), al_fallar=anotar("error"))
+    envio = time.perf_counter() - inicio
+    assert envio < RETARDO / 10, f"enviar esperó al servicio ({envio * 1e3:.0f} ms)"
+    assert trabajos.pendientes() == 2 and raiz.programados() == 1  # Un solo sondeo para los dos
+
+    raiz.girar(lambda: len(recibidos) == 2)
+    resultados = dict(recibidos)
+    assert resultados["ok"] == 42
+    assert isinstance(resultados["error"], ValueError) and str(resultados["error"]) == "sin conexión"
+    assert trabajos.pendientes() == 0 and raiz.programados() == 0  # Sin pendientes, no se sondea
+    trabajos.cerrar()
+    print(f"Resultados y errores entregados en el hilo del bucle (enviar tardó {envio * 1e6:.0f} µs)")
+
+
+def probar_fusion_por_clave():
+    raiz, servicio = RaizFalsa(), ServicioLento()
+    trabajos = TrabajosTk(raiz, max_hilos=1, intervalo_ms=5)
+    recibidos, anotar = entregas(raiz)
+
+    # Con el único hilo ocupado, las peticiones con clave esperan en cola:
+    # cada una cancela a la anterior antes de que llegue a empezar
+    trabajos.enviar(servicio.bloquear)
+    for valor in range(1, 6):
+        trabajos.enviar(servicio.consultar, valor, clave="buscar", al_terminar=anotar("buscar"))
+    servicio.liberar.set()
+    raiz.girar(lambda: trabajos.pendientes() == 0)
+    assert recibidos == [("buscar", 10)], recibidos
+    assert servicio.empezadas == ["bloqueo", 5], servicio.empezadas
+
+    # Si la anterior ya está en marcha, termina pero su resultado se descarta
+    servicio.empezadas.clear()
+    recibidos.clear()
+    trabajos.enviar(servicio.consultar, 7, clave="buscar", al_terminar=anotar("buscar"))
+    time.sleep(RETARDO / 4)
+    trabajos.enviar(servicio.consultar, 8, clave="buscar", al_terminar=anotar("buscar"))
+    raiz.girar(lambda: trabajos.pendientes() == 0)
+    assert servicio.empezadas == [7, 8] and recibidos == [("buscar", 16)], (servicio.empezadas, recibidos)
+
+    # cancelar: no se entrega nada
+    recibidos.clear()
+    trabajos.enviar(servicio.consultar, 9, clave="buscar", al_terminar=anotar("buscar"))
+    trabajos.cancelar("buscar")
+    raiz.girar(lambda: trabajos.pendientes() == 0)
+    assert recibidos == [] and raiz.programados() == 0
+    trabajos.cerrar()
+    print("Peticiones con la misma clave fusionadas: solo se entrega la más reciente")
+
+
+def probar_cierre():
+    raiz, servicio = RaizFalsa(), ServicioLento()
+    trabajos = TrabajosTk(raiz, max_hilos=1, intervalo_ms=5)
+    trabajos.enviar(servicio.consultar, 1)
+    time.sleep(RETARDO / 4)
+    trabajos.enviar(servicio.consultar, 2)  # En cola: cerrar la cancela
+    trabajos.cerrar()
+    assert servicio.empezadas == [1], servicio.empezadas
+    assert raiz.programados() == 0
+    print("cerrar espera al trabajo en marcha, cancela los que no empezaron y deja de sondear")
+
+
+if __name__ == "__main__":
+    probar_resultados_y_errores()
+    probar_fusion_por_clave()
+    probar_cierre()
+    print("Todas las pruebas de TrabajosTk han pasado.")
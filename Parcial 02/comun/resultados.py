@@ -0,0 +1,65 @@
+"""
+Resultados y sumideros de eventos
+---------------------------------
+Las operaciones de los inventarios y de la biblioteca devuelven un
+Resultado y lo emiten a un sumidero: la consola (comportamiento original),
+un buffer en memoria o ninguno (cargas masivas silenciosas).
+"""
+
+
+class Resultado:
+    """
+    Resultado de una operación: si tuvo éxito, un código con el motivo y el
+    mensaje legible. Se evalúa como booleano igual que antes. 'objeto' es el
+    producto o libro afectado, si lo hay (también accesible como
+    'producto' o 'libro').
+    """
+
+    __slots__ = ("ok", "codigo", "mensaje", "objeto")
+
+    def __init__(self, ok, codigo, mensaje, objeto=None):
+        self.ok = ok
+        self.codigo = codigo
+        self.mensaje = mensaje
+        self.objeto = objeto
+
+    @property
+    def producto(self):
+        return self.objeto
+
+    @property
+    def libro(self):
+        return self.objeto
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        return f"Resultado(ok={self.ok}, codigo={self.codigo!r}, mensaje={self.mensaje!r})"
+
+
+class SumideroNulo:
+    """Descarta los eventos (cargas masivas sin salida por consola)."""
+
+    def emitir(self, resultado):
+        pass
+
+
+class SumideroBuffer:
+    """Guarda los eventos en memoria para revisarlos después."""
+
+    def __init__(self):
+        self.eventos = []
+
+    def emitir(self, resultado):
+        self.eventos.append(resultado)
+
+
+class SumideroConsola:
+    """Imprime el mensaje de cada evento (comportamiento original del menú)."""
+
+    def emitir(self, resultado):
+        print(resultado.mensaje)
+
+
+CONSOLA = SumideroConsola()
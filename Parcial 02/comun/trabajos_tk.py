@@ -0,0 +1,118 @@
+"""
+Trabajos en segundo plano para aplicaciones Tkinter
+---------------------------------------------------
+Tkinter solo se puede tocar desde el hilo principal, y cualquier trabajo
+lento (leer o guardar en disco, buscar, sincronizar) que se haga dentro de
+un manejador de eventos congela la ventana. TrabajosTk ejecuta ese trabajo
+en un ThreadPoolExecutor y devuelve el resultado al hilo principal:
+
+- Los futuros terminados se dejan en una cola segura entre hilos.
+- Mientras haya trabajos pendientes, root.after revisa la cola cada pocos
+  milisegundos y llama a al_terminar / al_fallar en el hilo de Tk.
+- Las peticiones con la misma 'clave' se fusionan: una petición nueva
+  cancela la anterior si aún no empezó, y si ya estaba en marcha su
+  resultado se descarta. Solo llega a la interfaz el de la más reciente.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TrabajosTk:
+    """Pool de hilos cuyos resultados se entregan en el bucle de Tk."""
+
+    def __init__(self, root, max_hilos=2, intervalo_ms=20):
+        """
+        Args:
+            root: Ventana principal (se usa su método after para sondear).
+            max_hilos (int): Trabajos que pueden ejecutarse a la vez.
+            intervalo_ms (int): Cada cuánto se revisan los resultados mientras haya pendientes.
+        """
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="trabajo_tk")
+        self._terminados = queue.Queue()  # (futuro, clave, al_terminar, al_fallar)
+        self._por_clave = {}              # clave -> futuro de la petición más reciente
+        self._pendientes = 0              # Enviados y aún no entregados
+        self._sondeo = None               # Identificador del root.after programado
+
+    def enviar(self, funcion, *args, clave=None, al_terminar=None, al_fallar=None):
+        """
+        Ejecuta funcion(*args) en el pool. Solo debe llamarse desde el hilo de Tk.
+
+        Args:
+            clave: Si se indica, la petición sustituye a cualquier otra anterior
+                con la misma clave que todavía no se haya entregado.
+            al_terminar: Se llama con el resultado, en el hilo de Tk.
+            al_fallar: Se llama con la excepción, en el hilo de Tk. Si falta,
+                el error se muestra por consola.
+
+        Returns:
+            Future: El futuro del trabajo (se puede cancelar con su método cancel).
+        """
+        if clave is not None:
+            anterior = self._por_clave.get(clave)
+            if anterior is not None:
+                anterior.cancel()  # Si ya está en marcha, su resultado se descartará al entregarlo
+
+        futuro = self._ejecutor.submit(funcion, *args)
+        if clave is not None:
+            self._por_clave[clave] = futuro
+        self._pendientes += 1
+        # Se ejecuta en el hilo del trabajo (o aquí mismo si se cancela): solo encola
+        futuro.add_done_callback(lambda f: self._terminados.put((f, clave, al_terminar, al_fallar)))
+        self._programar_sondeo()
+        return futuro
+
+    def cancelar(self, clave):
+        """Cancela la petición pendiente con esa clave; su resultado no se entregará."""
+        futuro = self._por_clave.pop(clave, None)
+        if futuro is not None:
+            futuro.cancel()
+
+    def pendientes(self):
+        return self._pendientes
+
+    def cerrar(self):
+        """Cancela lo que no ha empezado y espera a que terminen los trabajos en marcha."""
+        if self._sondeo is not None:
+            self.root.after_cancel(self._sondeo)
+            self._sondeo = None
+        self._por_clave.clear()
+        self._ejecutor.shutdown(wait=True, cancel_futures=True)
+
+    # --- Entrega de resultados (hilo de Tk) ---
+
+    def _programar_sondeo(self):
+        if self._sondeo is None:
+            self._sondeo = self.root.after(self.intervalo_ms, self._sondear)
+
+    def _sondear(self):
+        self._sondeo = None
+        while True:
+            try:
+                futuro, clave, al_terminar, al_fallar = self._terminados.get_nowait()
+            except queue.Empty:
+                break
+            self._pendientes -= 1
+            if clave is not None:
+                if self._por_clave.get(clave) is not futuro:
+                    continue  # Superada por una petición más reciente (o cancelada)
+                del self._por_clave[clave]
+            if futuro.cancelled():
+                continue
+            self._entregar(futuro, al_terminar, al_fallar)
+
+        if self._pendientes:
+            self._programar_sondeo()
+
+    @staticmethod
+    def _entregar(futuro, al_terminar, al_fallar):
+        error = futuro.exception()
+        if error is None:
+            if al_terminar is not None:
+                al_terminar(futuro.result())
+        elif al_fallar is not None:
+            al_fallar(error)
+        else:
+            print(f"[ERROR] Falló un trabajo en segundo plano: {error!r}")